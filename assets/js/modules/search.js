@@ -9,6 +9,10 @@ import { debounce, highlightMatches } from './utils.js';
 
 // Constants
 const RECENT_SEARCHES_KEY = 'recentSearchesV1';
+// Prebuilt by manager.py (build_search_index) from every page and PDF; fetched on first use
+const SEARCH_INDEX_URL = 'assets/search-index.json';
+const MIN_TERM_LENGTH = 2;
+const LOCAL_PREFIX_MAX = 8; // matches SEARCH_PREFIX_MAX in manager.py
 
 // DOM Elements
 const mobileSearchIcon = document.getElementById('mobileSearchIcon');
@@ -22,6 +26,9 @@ const searchResults = document.getElementById('searchResults');
 
 // State
 let currentResultIndex = -1;
+let prebuiltIndex = null;
+let prebuiltIndexRequest = null;
+let localIndex = null;
 let searchableContent = [
     { title: 'Home', description: 'Main page with profile and introduction', link: '#home' },
     { title: 'Education', description: 'BCA, Class 12, Class 10 details', link: '#education' },
@@ -113,11 +120,158 @@ function buildSearchIndex() {
         const map = new Map(searchableContent.map(i => [key(i), i]));
         items.forEach(i => { if (!map.has(key(i))) map.set(key(i), i); });
         searchableContent = Array.from(map.values());
+        localIndex = null;
     } catch (e) {
         console.warn('Search index build warning:', e);
     }
 }
 
+/**
+ * Lower-cased, accent-folded words (mirrors _search_words in manager.py)
+ */
+function searchTerms(text) {
+    const words = text.toLowerCase().normalize('NFKD').replace(/\p{M}/gu, '').match(/[\p{L}\p{N}]+/gu) || [];
+    return words.filter(word => word.length >= MIN_TERM_LENGTH);
+}
+
+/**
+ * Resolve "page.html#section" links to a plain hash when they point into the current page
+ */
+function pageLink(link) {
+    const [page, hash] = link.split('#');
+    const current = window.location.pathname.split('/').pop() || 'index.html';
+    return hash !== undefined && page === current ? `#${hash}` : link;
+}
+
+function addPosting(map, key, id, weight) {
+    const list = map[key] || (map[key] = []);
+    for (let k = 0; k < list.length; k += 2) {
+        if (list[k] === id) {
+            list[k + 1] = Math.max(list[k + 1], weight);
+            return;
+        }
+    }
+    list.push(id, weight);
+}
+
+/**
+ * Index the in-page entries with the same prefix/trigram layout as the prebuilt index
+ */
+function indexEntries(items) {
+    const index = { prefixMax: LOCAL_PREFIX_MAX, docs: items, prefix: {}, tri: {} };
+    items.forEach((item, id) => {
+        const weights = new Map();
+        searchTerms(item.title).forEach(word => weights.set(word, (weights.get(word) || 0) + 8));
+        searchTerms(item.description).forEach(word => weights.set(word, (weights.get(word) || 0) + 1));
+        weights.forEach((weight, word) => {
+            for (let n = MIN_TERM_LENGTH; n <= Math.min(word.length, index.prefixMax); n++) {
+                addPosting(index.prefix, word.slice(0, n), id, weight);
+            }
+            for (let i = 0; i + 3 <= word.length; i++) {
+                addPosting(index.tri, word.slice(i, i + 3), id, weight);
+            }
+        });
+    });
+    return index;
+}
+
+/**
+ * Fetch the prebuilt index once; resolves to null when it is unavailable
+ */
+function loadPrebuiltIndex() {
+    if (!prebuiltIndexRequest) {
+        prebuiltIndexRequest = fetch(SEARCH_INDEX_URL)
+            .then(response => (response.ok ? response.json() : null))
+            .then(data => {
+                if (!data) return null;
+                const docs = data.docs.map(([title, description, link]) => ({ title, description, link: pageLink(link) }));
+                prebuiltIndex = { ...data, docs };
+                return prebuiltIndex;
+            })
+            .catch(error => {
+                console.warn('Search index not loaded:', error);
+                return null;
+            });
+    }
+    return prebuiltIndexRequest;
+}
+
+/**
+ * Documents sharing a word trigram with most of the term's trigrams (infix matches, near misses)
+ */
+function trigramPostings(index, term) {
+    const counts = new Map();
+    let total = 0;
+    for (let i = 0; i + 3 <= term.length; i++) {
+        total++;
+        const list = index.tri[term.slice(i, i + 3)] || [];
+        for (let k = 0; k < list.length; k += 2) {
+            counts.set(list[k], (counts.get(list[k]) || 0) + 1);
+        }
+    }
+    const postings = [];
+    counts.forEach((count, id) => {
+        if (count * 2 >= total) postings.push(id, count / total);
+    });
+    return postings;
+}
+
+/**
+ * One hash lookup per term: exact prefix postings, falling back to trigrams
+ */
+function queryIndex(index, terms, hits) {
+    terms.forEach(term => {
+        let postings = index.prefix[term.slice(0, index.prefixMax)];
+        let weightScale = 1;
+        if (!postings) {
+            postings = trigramPostings(index, term);
+            weightScale = 0.5;
+        }
+        for (let k = 0; k < postings.length; k += 2) {
+            const item = index.docs[postings[k]];
+            const key = `${item.title}|${item.link}`.toLowerCase();
+            const hit = hits.get(key) || { item, score: 0, terms: new Set() };
+            hit.score += postings[k + 1] * weightScale;
+            hit.terms.add(term);
+            hits.set(key, hit);
+        }
+    });
+}
+
+/**
+ * Entries whose title (or a word of it) starts with the query, for queries too short for the index
+ */
+function titlePrefixResults(lowerQuery) {
+    const results = [];
+    searchableContent.forEach(item => {
+        const title = item.title.toLowerCase();
+        if (title.startsWith(lowerQuery)) results.push({ item, score: 2 });
+        else if (title.split(/\s+/).some(word => word.startsWith(lowerQuery))) results.push({ item, score: 1 });
+    });
+    return results.sort((a, b) => b.score - a.score);
+}
+
+/**
+ * Ranked { item, score } results from the in-page entries and (once loaded) the prebuilt index
+ */
+function findResults(query) {
+    const lowerQuery = query.toLowerCase().trim();
+    const terms = [...new Set(searchTerms(lowerQuery))];
+    // One-letter words are not indexed, so a query like "c" or "r" scans the titles instead
+    if (!terms.length) return lowerQuery ? titlePrefixResults(lowerQuery) : [];
+    if (!localIndex) localIndex = indexEntries(searchableContent);
+    const hits = new Map();
+    queryIndex(localIndex, terms, hits);
+    if (prebuiltIndex) queryIndex(prebuiltIndex, terms, hits);
+    return Array.from(hits.values())
+        .map(hit => ({
+            item: hit.item,
+            score: hit.score * (hit.terms.size === terms.length ? 2 : 1) +
+                (hit.item.title.toLowerCase().startsWith(lowerQuery) ? 20 : 0)
+        }))
+        .sort((a, b) => b.score - a.score);
+}
+
 /**
  * Get recent searches from localStorage
  */
@@ -192,23 +346,23 @@ function handleLinkNavigation(link, query) {
 function doSearch(query) {
     const lowerQuery = query.toLowerCase().trim();
 
-    if (lowerQuery.length < 2) {
+    if (!lowerQuery) {
         renderSuggestions();
         return;
     }
 
-    const tokens = lowerQuery.split(/\s+/).filter(Boolean);
-    const results = searchableContent
-        .map(item => {
-            const hay = (item.title + ' ' + item.description).toLowerCase();
-            const score = tokens.reduce((s, t) => s + (hay.includes(t) ? 1 : 0), 0) +
-                (item.title.toLowerCase().startsWith(lowerQuery) ? 2 : 0) +
-                (item.title.toLowerCase().includes(lowerQuery) ? 1 : 0);
-            return { item, score };
-        })
-        .filter(x => x.score > 0)
-        .sort((a, b) => b.score - a.score)
-        .map(x => x.item);
+    if (!prebuiltIndex) {
+        loadPrebuiltIndex().then(index => {
+            if (index && searchModalInput.value.trim() === query.trim()) doSearch(query);
+        });
+    }
+
+    const results = findResults(query).map(x => x.item);
+
+    if (results.length === 0 && lowerQuery.length < MIN_TERM_LENGTH) {
+        renderSuggestions(); // a single letter that starts no title: keep offering suggestions
+        return;
+    }
 
     if (results.length === 0) {
         searchResults.innerHTML = '<div class="search-no-results">No results found for "' + query + '"</div>';
@@ -248,6 +402,7 @@ export function openSearchModal() {
     }, 100);
 
     currentResultIndex = -1;
+    loadPrebuiltIndex();
 
     if (!searchModalInput.value.trim()) {
         renderSuggestions();
@@ -397,18 +552,14 @@ function showDesktopSearchResults(query, container) {
         return;
     }
 
-    const lowerQuery = query.toLowerCase().trim();
-    const tokens = lowerQuery.split(/\s+/).filter(Boolean);
-    const resultsFull = searchableContent
-        .map(item => {
-            const hay = (item.title + ' ' + item.description).toLowerCase();
-            const score = tokens.reduce((s, t) => s + (hay.includes(t) ? 1 : 0), 0) +
-                (item.title.toLowerCase().startsWith(lowerQuery) ? 2 : 0) +
-                (item.title.toLowerCase().includes(lowerQuery) ? 1 : 0);
-            return { item, score };
-        })
-        .filter(x => x.score > 0)
-        .sort((a, b) => b.score - a.score);
+    if (!prebuiltIndex) {
+        loadPrebuiltIndex().then(index => {
+            const input = container.closest('.desktop-search')?.querySelector('.search-input');
+            if (index && input && input.value.trim() === query.trim()) showDesktopSearchResults(query, container);
+        });
+    }
+
+    const resultsFull = findResults(query);
 
     const totalCount = resultsFull.length;
     const results = resultsFull.slice(0, 6); // Limit to top 6 results
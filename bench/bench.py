@@ -0,0 +1,427 @@
+"""Benchmarks manager.py's stages and the dev server against a per-machine bench/baseline.json.
+
+    python bench/bench.py                      # full run, compared against the baseline
+    python bench/bench.py --scales 1,10 --no-server
+    python bench/bench.py --save-baseline      # accept the current numbers as the new baseline
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "manager"))
+import manager  # noqa: E402  (site inventory, Rich console and tables)
+
+from manager import console, Panel, Table  # noqa: E402
+
+RESULTS_VERSION = 1
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+SCALES = (1, 10, 100)
+STAGES = ("purge", "search-index", "images", "build", "maintenance")
+# Files copied once per scale step (with unique content, so content-addressed caches cannot dedupe them)
+REPLICATED = [
+    "*.html", "pages/*.html", "assets/css/*.css", "assets/js/*.js", "assets/js/modules/*.js",
+    "assets/images/*", "assets/certificates/*", "assets/docs/*.pdf",
+]
+# Binary copies stop at this scale: 100x the certificate scans and PDFs means minutes of
+# re-encoding and text extraction that say nothing new about the tooling itself
+BINARY_MAX_SCALE = 10
+STAGE_TIMEOUT = 1800
+# Load test: URLs requested round-robin by every client
+SERVER_URLS = ["/", "/contact.html", "/assets/css/core.css", "/assets/js/main.js", "/assets/js/modules/utils.js", "/manifest.json"]
+SERVER_CLIENTS = 32
+SERVER_DURATION = 10.0
+SERVER_WARMUP = 1.0
+# A metric regresses when it is this much worse than the baseline...
+REGRESSION_THRESHOLD = 0.25
+# ...and the difference is also larger than this (timer noise on millisecond stages)
+REGRESSION_MIN_MS = 20.0
+
+_TEXT_EXTS = (".html", ".css", ".js")
+
+
+# --- Synthetic trees ---
+
+def _clone_rel(rel: str, copy: int) -> str:
+    directory, name = os.path.split(rel)
+    return f"{directory}/bench-{copy}-{name}" if directory else f"bench-{copy}-{name}"
+
+
+def _clone_marker(rel: str, copy: int) -> bytes:
+    if rel.endswith(".html"):
+        return f"\n<!-- bench clone {copy} -->\n".encode("utf-8")
+    if rel.endswith(".css"):
+        return f"\n/* bench clone {copy} */\n".encode("utf-8")
+    if rel.endswith(".js"):
+        return f"\n// bench clone {copy}\n".encode("utf-8")
+    return f"bench clone {copy}".encode("utf-8")  # trailing bytes after the image/PDF end marker
+
+
+def make_tree(scale: int, parent: str) -> dict:
+    """Copies the site and manager/ into `parent` plus scale-1 clones of every replicated file; returns {"root", "files", "bytes"}."""
+    root = os.path.join(parent, f"site-{scale}x")
+    shutil.rmtree(root, ignore_errors=True)
+    files = total = 0
+    clones = []
+    for rel, abs_path in manager._iter_site_files():
+        dest = os.path.join(root, rel)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        shutil.copy2(abs_path, dest)
+        with open(abs_path, "rb") as f:
+            data = f.read()
+        files += 1
+        total += len(data)
+        if not any(manager._matches_site_pattern(rel, p) for p in REPLICATED):
+            continue
+        if not rel.endswith(_TEXT_EXTS) and scale > BINARY_MAX_SCALE:
+            continue
+        for copy in range(1, scale):
+            clone = _clone_rel(rel, copy)
+            with open(os.path.join(root, clone), "wb") as f:
+                f.write(data + _clone_marker(rel, copy))
+            files += 1
+            total += len(data)
+            clones.append(clone)
+    os.makedirs(os.path.join(root, "manager"), exist_ok=True)
+    for rel in ("manager/manager.py", "manager/__main__.py", "manager/budgets.json", "purgecss.config.js"):
+        shutil.copy2(os.path.join(ROOT_DIR, rel), os.path.join(root, rel))
+    _extend_purgecss_config(os.path.join(root, "purgecss.config.js"), clones)
+    return {"root": root, "files": files, "bytes": total}
+
+
+def _original_rel(clone: str) -> str:
+    directory, name = os.path.split(clone)
+    name = name.split("-", 2)[2]
+    return f"{directory}/{name}" if directory else name
+
+
+def _extend_purgecss_config(config_path: str, clones: list):
+    """Lists clones of purged stylesheets and root pages in purgecss.config.js, so purge work scales too."""
+    config = manager.load_purgecss_config(config_path)
+    listed = {entry[2:] if entry.startswith("./") else entry for entry in config.get("css", []) + config.get("content", [])}
+    with open(config_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    for key in ("css", "content"):
+        extra = "".join(
+            f"\n    './{rel}'," for rel in clones
+            if _original_rel(rel) in listed and rel.endswith(".css" if key == "css" else ".html")
+        )
+        source = source.replace(f"{key}: [", f"{key}: [" + extra, 1)
+    with open(config_path, "w", encoding="utf-8") as f:
+        f.write(source)
+
+
+# --- Stage timing ---
+
+def _run_manager(root: str, *args) -> float:
+    """Runs `python <root>/manager <args>` headless and returns its wall time in ms."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, os.path.join(root, "manager"), "--json", *args],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=STAGE_TIMEOUT,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"`manager {' '.join(args)}` failed: {(result.stderr or result.stdout).strip()[-500:]}")
+    return elapsed
+
+
+def _clear_caches(root: str):
+    for path in (os.path.join(root, "manager", ".cache"), os.path.join(root, "dist")):
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def time_stage(root: str, stage: str) -> dict:
+    """Cold run (no caches, no dist/) followed by a warm run of the same stage."""
+    if stage == "maintenance":
+        on = _run_manager(root, "maintenance", "on")
+        off = _run_manager(root, "maintenance", "off")
+        return {"on_ms": round(on, 1), "off_ms": round(off, 1)}
+    _clear_caches(root)
+    cold = _run_manager(root, stage)
+    warm = _run_manager(root, stage)
+    return {"cold_ms": round(cold, 1), "warm_ms": round(warm, 1)}
+
+
+# --- Dev server load test ---
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind((manager.DEV_SERVER_HOST, 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(port: int, process, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"dev server exited early: {process.stderr.read().strip()[-500:]}")
+        try:
+            with socket.create_connection((manager.DEV_SERVER_HOST, port), timeout=0.2):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"dev server did not listen on port {port} within {timeout:g}s")
+
+
+async def _client(port: int, urls: list, offset: int, deadline: float, measure_from: float, stats: dict):
+    """One keep-alive connection issuing GETs back to back; reconnects after errors."""
+    reader = writer = None
+    i = offset
+    while time.perf_counter() < deadline:
+        url = urls[i % len(urls)]
+        i += 1
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(manager.DEV_SERVER_HOST, port)
+            started = time.perf_counter()
+            writer.write(
+                f"GET {url} HTTP/1.1\r\nHost: localhost:{port}\r\nAccept-Encoding: gzip\r\n"
+                f"Connection: keep-alive\r\n\r\n".encode("ascii")
+            )
+            head = await reader.readuntil(b"\r\n\r\n")
+            status = int(head.split(b" ", 2)[1])
+            length = 0
+            for line in head.split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            finished = time.perf_counter()
+            if started >= measure_from:
+                if status >= 400:
+                    stats["errors"] += 1
+                else:
+                    stats["latencies"].append(finished - started)
+                    stats["bytes"] += length
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            stats["errors"] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+def _percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def load_test_server(root: str, clients: int = SERVER_CLIENTS, duration: float = SERVER_DURATION) -> dict:
+    """Starts the dev server of `root` on a free port and hammers it with keep-alive clients."""
+    port = _free_port()
+    launcher = (
+        "import asyncio, sys; sys.path.insert(0, sys.argv[1]); import manager; "
+        "asyncio.run(manager._serve_site(int(sys.argv[2]), open_browser=False))"
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-c", launcher, os.path.join(root, "manager"), str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    try:
+        _wait_for_port(port, process)
+        urls = [url for url in SERVER_URLS if os.path.exists(os.path.join(root, url.lstrip("/") or "index.html"))]
+        stats = {"latencies": [], "errors": 0, "bytes": 0}
+
+        async def run():
+            now = time.perf_counter()
+            measure_from, deadline = now + SERVER_WARMUP, now + SERVER_WARMUP + duration
+            await asyncio.gather(*(_client(port, urls, n, deadline, measure_from, stats) for n in range(clients)))
+
+        asyncio.run(run())
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    latencies = sorted(stats["latencies"])
+    return {
+        "clients": clients,
+        "duration_s": duration,
+        "requests": len(latencies),
+        "errors": stats["errors"],
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "transfer_mb_s": round(stats["bytes"] / duration / 1e6, 2),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+# --- Results and baseline comparison ---
+
+def flatten_metrics(results: dict) -> dict:
+    """{"build@10x.cold_ms": value, "server.p99_ms": value, ...} for comparison."""
+    metrics = {}
+    for scale, stages in results.get("stages", {}).items():
+        for stage, timings in stages.items():
+            for name, value in timings.items():
+                metrics[f"{stage}@{scale}.{name}"] = value
+    for name in ("p50_ms", "p99_ms", "throughput_rps"):
+        if name in results.get("server", {}):
+            metrics[f"server.{name}"] = results["server"][name]
+    return metrics
+
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """Returns [(metric, baseline, current, change, regressed)] for metrics present in both runs."""
+    current, previous = flatten_metrics(results), flatten_metrics(baseline)
+    rows = []
+    for metric in sorted(current.keys() & previous.keys()):
+        old, new = previous[metric], current[metric]
+        if not old:
+            continue
+        change = (new - old) / old
+        if metric.endswith("throughput_rps"):
+            regressed = change < -threshold
+        else:
+            # Server latencies are sub-millisecond, so only stage timings get the absolute floor
+            floor = 0.0 if metric.startswith("server.") else REGRESSION_MIN_MS
+            regressed = change > threshold and new - old > floor
+        rows.append((metric, old, new, change, regressed))
+    return rows
+
+
+def _print_comparison(rows: list, baseline: dict, results: dict):
+    table = Table(title="[bold cyan]Benchmark vs Baseline[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Metric", style="bold cyan", no_wrap=True)
+    table.add_column("Baseline", justify="right")
+    table.add_column("Current", justify="right")
+    table.add_column("Change", justify="right")
+    for metric, old, new, change, regressed in rows:
+        style = "bold red" if regressed else "green" if (change < 0) != metric.endswith("throughput_rps") else "dim"
+        table.add_row(metric, f"{old:,.1f}", f"{new:,.1f}", f"[{style}]{change:+.0%}[/{style}]")
+    console.print(table)
+    if baseline.get("machine") != results.get("machine"):
+        console.print("[dim yellow]Notice: the baseline was recorded on a different machine/Python, so differences may not be regressions.[/dim yellow]")
+
+
+def _print_results(results: dict):
+    table = Table(title="[bold cyan]Manager Stages (wall time, ms)[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Stage", style="bold cyan")
+    for scale in results["stages"]:
+        tree = results["trees"][scale]
+        table.add_column(f"{scale} ({tree['files']:,} files)", justify="right")
+    stage_names = [stage for stage in STAGES if any(stage in stages for stages in results["stages"].values())]
+    for stage in stage_names:
+        cells = []
+        for stages in results["stages"].values():
+            timings = stages.get(stage)
+            if timings is None:
+                cells.append("[dim]—[/dim]")
+            elif "cold_ms" in timings:
+                cells.append(f"{timings['cold_ms']:,.0f} cold / {timings['warm_ms']:,.0f} warm")
+            else:
+                cells.append(f"{timings['on_ms']:,.0f} on / {timings['off_ms']:,.0f} off")
+        table.add_row(stage, *cells)
+    console.print(table)
+    server = results.get("server")
+    if server:
+        console.print(Panel(
+            f"Clients: [bold white]{server['clients']}[/bold white] keep-alive for {server['duration_s']:g}s\n"
+            f"Throughput: [bold white]{server['throughput_rps']:,.0f} req/s[/bold white] ({server['transfer_mb_s']:,.1f} MB/s)\n"
+            f"Latency: p50 [bold white]{server['p50_ms']:,.2f} ms[/bold white] · p99 [bold white]{server['p99_ms']:,.2f} ms[/bold white] "
+            f"· max {server['max_ms']:,.1f} ms\n"
+            f"Errors: {'[bold red]' if server['errors'] else '[green]'}{server['errors']}",
+            title="[bold cyan]Dev Server Load Test[/bold cyan]",
+            border_style="cyan"
+        ))
+
+
+def run_benchmarks(args) -> dict:
+    scales = [int(s) for s in args.scales.split(",") if s]
+    stages = [s for s in args.stages.split(",") if s]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        raise ValueError(f"unknown stage(s): {', '.join(sorted(unknown))} (choose from {', '.join(STAGES)})")
+    results = {
+        "version": RESULTS_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "trees": {}, "stages": {},
+    }
+    parent = args.trees or tempfile.mkdtemp(prefix="manager-bench-")
+    try:
+        for scale in scales:
+            with console.status(f"[bold cyan]Generating the {scale}x tree...[/bold cyan]"):
+                tree = make_tree(scale, parent)
+            key = f"{scale}x"
+            results["trees"][key] = {"files": tree["files"], "mb": round(tree["bytes"] / 1e6, 1)}
+            results["stages"][key] = {}
+            for stage in stages:
+                if stage == "images" and manager._load_pillow() is None:
+                    continue
+                with console.status(f"[bold cyan]{stage} @ {key}...[/bold cyan]"):
+                    results["stages"][key][stage] = time_stage(tree["root"], stage)
+            if scale == scales[0] and not args.no_server:
+                with console.status(f"[bold cyan]Load-testing the dev server ({args.clients} clients)...[/bold cyan]"):
+                    results["server"] = load_test_server(tree["root"], args.clients, args.duration)
+            if not args.trees:
+                shutil.rmtree(tree["root"], ignore_errors=True)
+    finally:
+        if not args.trees:
+            shutil.rmtree(parent, ignore_errors=True)
+    return results
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(prog="bench", description="Benchmark manager.py stages and the dev server.")
+    parser.add_argument("--scales", default=",".join(str(s) for s in SCALES), help="comma-separated tree scales (default: 1,10,100)")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"comma-separated stages (default: {','.join(STAGES)})")
+    parser.add_argument("--no-server", action="store_true", help="skip the dev server load test")
+    parser.add_argument("--clients", type=int, default=SERVER_CLIENTS, help="concurrent keep-alive clients")
+    parser.add_argument("--duration", type=float, default=SERVER_DURATION, help="load test duration in seconds")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="relative slowdown that counts as a regression")
+    parser.add_argument("--trees", help="keep the synthetic trees in this directory instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    try:
+        results = run_benchmarks(args)
+    except (OSError, ValueError, RuntimeError, subprocess.TimeoutExpired) as e:
+        console.print(f"[bold red]Benchmark failed:[/bold red] {e}")
+        return 1
+    _print_results(results)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+        f.write("\n")
+    console.print(f"[dim]Results written to {os.path.relpath(args.output)}.[/dim]")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        shutil.copyfile(args.output, args.baseline)
+        console.print(f"[bold green]✔ Baseline saved to {os.path.relpath(args.baseline)}.[/bold green]")
+        if not args.save_baseline:
+            console.print("[dim]No baseline existed on this machine yet; later runs are compared against this one.[/dim]")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    _print_comparison(rows, baseline, results)
+    regressions = [row for row in rows if row[4]]
+    if regressions:
+        console.print(f"[bold red]✘ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}.[/bold red]")
+        return 1
+    console.print("[bold green]✔ No regressions against the baseline.[/bold green]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,8 +8,8 @@ if (-not (Test-Path (Join-Path $venvDir "Scripts\python.exe"))) {
 # Verify if rich is installed, if not, run pip install
 & (Join-Path $venvDir "Scripts\python.exe") -c "import rich" 2>$null
 if ($LASTEXITCODE -ne 0) {
-    Write-Host "Installing dependencies (rich, livereload)..." -ForegroundColor Cyan
-    & (Join-Path $venvDir "Scripts\pip.exe") install rich livereload
+    Write-Host "Installing dependencies (rich)..." -ForegroundColor Cyan
+    & (Join-Path $venvDir "Scripts\pip.exe") install rich
 }
 
 Write-Host "Running manager using virtual environment python..." -ForegroundColor Cyan
@@ -0,0 +1,7 @@
+"""Fast entry point: `python manager <command>` imports manager.py from its cached bytecode."""
+import sys
+
+import manager
+
+if __name__ == "__main__":
+    sys.exit(manager.entry_point(sys.argv[1:]))
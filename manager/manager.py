@@ -1,106 +1,561 @@
 import os
 import sys
-import subprocess
 import re
 import importlib
-import socket
 import time
 import json
 import threading
+import posixpath
+import io
+import collections
 
 # Resolve root path of the project
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 INDEX_PATH = os.path.join(ROOT_DIR, "index.html")
 
-# --- Auto-install and import Rich for beautiful terminal UX ---
-try:
-    from rich.console import Console
-    from rich.panel import Panel
-    from rich.table import Table
-    from rich.prompt import Prompt
-    from rich.align import Align
-    from rich.status import Status
-except ImportError:
-    print("[📦] Installing 'rich' library for a premium terminal interface...")
-    try:
-        subprocess.run([sys.executable, "-m", "pip", "install", "rich"], check=True)
-        from rich.console import Console
-        from rich.panel import Panel
-        from rich.table import Table
-        from rich.prompt import Prompt
-        from rich.align import Align
-        from rich.status import Status
-    except Exception as e:
-        print(f"Failed to install 'rich': {e}. Exiting.")
-        sys.exit(1)
+# --- Startup: stages import their heavier modules and compile their patterns on first use ---
+
+
+class _LazyPattern:
+    """Stands in for a module-level re.compile() result; the pattern is compiled on first use."""
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.pattern, self.flags = pattern, flags
+
+    def __getattr__(self, attr):
+        value = getattr(re.compile(self.pattern, self.flags), attr)
+        setattr(self, attr, value)  # later lookups of .sub/.search/... skip __getattr__
+        return value
+
+
+# --- Rich terminal UX, imported (and auto-installed) on first use ---
+
+# Set by `--json` before anything is printed: human-readable output then goes to stderr
+CONSOLE_TO_STDERR = False
+
+
+def _import_rich(module_name: str):
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        print("[📦] Installing 'rich' library for a premium terminal interface...", file=sys.stderr)
+        import subprocess
+        try:
+            subprocess.run([sys.executable, "-m", "pip", "install", "rich"], check=True)
+            importlib.invalidate_caches()
+            return importlib.import_module(module_name)
+        except Exception as e:
+            print(f"Failed to install 'rich': {e}. Exiting.", file=sys.stderr)
+            sys.exit(1)
+
+
+class _LazyRich:
+    """Stands in for a Rich class until first use, then replaces itself in the module globals."""
+
+    def __init__(self, module_name: str, name: str):
+        self._module_name = module_name
+        self._name = name
+
+    def _resolve(self):
+        if self._name == "console":
+            real = _import_rich("rich.console").Console(stderr=CONSOLE_TO_STDERR)
+        else:
+            real = getattr(_import_rich(self._module_name), self._name)
+        globals()[self._name] = real
+        return real
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._resolve(), attr)
+
+
+Panel = _LazyRich("rich.panel", "Panel")
+Table = _LazyRich("rich.table", "Table")
+Prompt = _LazyRich("rich.prompt", "Prompt")
+Align = _LazyRich("rich.align", "Align")
+Status = _LazyRich("rich.status", "Status")
+Group = _LazyRich("rich.console", "Group")
+Live = _LazyRich("rich.live", "Live")
+console = _LazyRich("rich.console", "console")
+
+
+# --- Tracing (spans and counters over git, AI queries, file writes and server requests) ---
+
+TRACE_DIR = os.path.join(ROOT_DIR, "manager", ".cache", "traces")
+# MANAGER_TRACE=1 writes a Chrome trace when the interactive menu exits (the CLI uses --trace)
+TRACE_EXPORT = os.environ.get("MANAGER_TRACE", "") not in ("", "0")
+# "cpu" (cProfile), "memory" (tracemalloc) or "cpu,memory"; the CLI's --profile means both
+TRACE_PROFILE = os.environ.get("MANAGER_PROFILE", "")
+# Finished spans kept for the dashboard; every span is also kept (up to TRACE_MAX_EVENTS) for export
+TRACE_RECENT_SPANS = 256
+TRACE_MAX_EVENTS = 200_000
+# Upper bounds of the request latency histogram; slower requests land in a final bucket
+TRACE_LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+TRACE_DASHBOARD_ROWS = 10
+TRACE_DASHBOARD_REFRESH = 0.5
+TRACE_MEMORY_FRAMES = 16
+
+
+class _Span:
+    __slots__ = ("tracer", "category", "name", "args", "start_ns")
+
+    def __init__(self, tracer: "Tracer", category: str, name: str, args: dict):
+        self.tracer, self.category, self.name, self.args = tracer, category, name, args
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.category, self.name, self.start_ns, time.perf_counter_ns(), self.args)
+        return False
 
-# Initialize console
-console = Console()
 
-def run_command(command, cwd=ROOT_DIR):
-    """Utility to run a system command and print output."""
+class Tracer:
+    """Spans and counters for the manager's hot paths, cheap enough to leave on."""
+
+    def __init__(self):
+        self.origin_ns = time.perf_counter_ns()
+        self.lock = threading.Lock()
+        self.totals = {}  # category -> [count, total_ns, max_ns]
+        self.tallies = {}
+        self.recent = collections.deque(maxlen=TRACE_RECENT_SPANS)
+        self.events = collections.deque(maxlen=TRACE_MAX_EVENTS)
+        self.threads = {}
+        self.latency = [0] * (len(TRACE_LATENCY_BUCKETS_MS) + 1)
+        self.profiler = None
+        self.tracing_memory = False
+
+    def span(self, category: str, name: str, **args) -> _Span:
+        return _Span(self, category, name, args)
+
+    def record(self, category: str, name: str, start_ns: int, end_ns: int, args: dict = None, bucket: int = None):
+        duration = end_ns - start_ns
+        tid = threading.get_ident()
+        with self.lock:
+            if bucket is not None:
+                self.latency[bucket] += 1
+            if tid not in self.threads:
+                self.threads[tid] = threading.current_thread().name
+            total = self.totals.get(category)
+            if total is None:
+                total = self.totals[category] = [0, 0, 0]
+            total[0] += 1
+            total[1] += duration
+            if duration > total[2]:
+                total[2] = duration
+            self.recent.append((duration, category, name))
+            self.events.append((category, name, start_ns, duration, tid, args))
+
+    def count(self, name: str, amount: int = 1):
+        with self.lock:
+            self.tallies[name] = self.tallies.get(name, 0) + amount
+
+    def observe_request(self, name: str, start_ns: int, end_ns: int):
+        ms = (end_ns - start_ns) / 1e6
+        bucket = next((i for i, bound in enumerate(TRACE_LATENCY_BUCKETS_MS) if ms <= bound), len(TRACE_LATENCY_BUCKETS_MS))
+        self.record("http", name, start_ns, end_ns, bucket=bucket)
+
+    def start_profiling(self, modes: set):
+        """Starts cProfile (the calling thread only) and/or tracemalloc for `modes` {"cpu", "memory"}."""
+        if "cpu" in modes and self.profiler is None:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if "memory" in modes and not self.tracing_memory:
+            import tracemalloc
+            tracemalloc.start(TRACE_MEMORY_FRAMES)
+            self.tracing_memory = True
+
+    def stop_profiling(self, stem: str) -> list:
+        """Stops profiling and writes <stem>.prof (pstats) and <stem>.cpu.txt / <stem>.memory.txt; returns the paths."""
+        paths = []
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        if self.profiler is not None:
+            import pstats
+            self.profiler.disable()
+            self.profiler.dump_stats(stem + ".prof")
+            report = io.StringIO()
+            pstats.Stats(self.profiler, stream=report).sort_stats("cumulative").print_stats(40)
+            with open(stem + ".cpu.txt", "w", encoding="utf-8") as f:
+                f.write(report.getvalue())
+            paths += [stem + ".prof", stem + ".cpu.txt"]
+            self.profiler = None
+        if self.tracing_memory:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            top = tracemalloc.take_snapshot().statistics("lineno")[:40]
+            tracemalloc.stop()
+            self.tracing_memory = False
+            self.count("memory.current_bytes", current)
+            self.count("memory.peak_bytes", peak)
+            with open(stem + ".memory.txt", "w", encoding="utf-8") as f:
+                f.write(f"current {current:,} bytes, peak {peak:,} bytes\n\n" + "\n".join(map(str, top)) + "\n")
+            paths.append(stem + ".memory.txt")
+        return paths
+
+    def export_chrome_trace(self, path: str) -> str:
+        """Writes every recorded span as Chrome trace JSON ("X" events, counters as one "C" event)."""
+        with self.lock:
+            spans, threads, tallies = list(self.events), dict(self.threads), dict(self.tallies)
+        pid = os.getpid()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "args": {"name": " ".join(["manager", *sys.argv[1:]])}}]
+        events.extend({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}} for tid, name in threads.items())
+        for category, name, start_ns, duration, tid, args in spans:
+            event = {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+                     "ts": (start_ns - self.origin_ns) / 1000, "dur": duration / 1000}
+            if args:
+                event["args"] = args
+            events.append(event)
+        if tallies:
+            events.append({"name": "counters", "ph": "C", "pid": pid, "ts": (time.perf_counter_ns() - self.origin_ns) / 1000, "args": tallies})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str))
+        return path
+
+
+_tracer = None  # one per process, see get_tracer()
+
+
+def get_tracer() -> Tracer:
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer()
+    return _tracer
+
+
+def trace_span(category: str, name: str, **args) -> _Span:
+    """`with trace_span("git", "git status"):` times the block into the process tracer."""
+    return get_tracer().span(category, name, **args)
+
+
+def start_trace_session(profile: str = TRACE_PROFILE):
+    """Starts the cProfile/tracemalloc capture named by `profile` ("cpu", "memory" or both, comma-separated)."""
+    modes = {mode.strip() for mode in profile.split(",") if mode.strip()}
+    unknown = modes - {"cpu", "memory"}
+    if unknown:
+        console.print(f"[yellow]Ignoring unknown profile mode(s): {', '.join(sorted(unknown))} (use cpu, memory).[/yellow]")
+    if modes - unknown:
+        get_tracer().start_profiling(modes - unknown)
+
+
+def finish_trace_session(export: bool = TRACE_EXPORT) -> list:
+    """Stops profiling and, with `export` or a profile, writes the Chrome trace; returns the written paths."""
+    if _tracer is None:
+        return []
+    stem = os.path.join(TRACE_DIR, time.strftime("%Y%m%d-%H%M%S"))
+    paths = _tracer.stop_profiling(stem)
+    if export or paths:
+        paths.insert(0, _tracer.export_chrome_trace(stem + ".trace.json"))
+    for path in paths:
+        console.print(f"[dim]Wrote {os.path.relpath(path, ROOT_DIR)}[/dim]")
+    return paths
+
+
+def render_trace_dashboard(tracer: Tracer = None):
+    """Rich renderable: slowest recent operations, totals per category and the request latency histogram."""
+    tracer = tracer or get_tracer()
+    with tracer.lock:
+        slowest = sorted(tracer.recent, key=lambda span: span[0], reverse=True)[:TRACE_DASHBOARD_ROWS]
+        totals = {category: list(total) for category, total in tracer.totals.items()}
+        latency = list(tracer.latency)
+    recent = Table(title="Slowest recent operations", header_style="bold magenta", expand=True)
+    recent.add_column("Category", style="cyan", no_wrap=True)
+    recent.add_column("Operation", overflow="ellipsis", no_wrap=True)
+    recent.add_column("ms", justify="right", style="bold")
+    for duration, category, name in slowest:
+        recent.add_row(category, name, f"{duration / 1e6:,.2f}")
+    summary = Table(title="Totals", header_style="bold magenta", expand=True)
+    for column in ("Category", "Count", "Total ms", "Mean ms", "Max ms"):
+        summary.add_column(column, justify="left" if column == "Category" else "right", style="cyan" if column == "Category" else None)
+    for category, (count, total_ns, max_ns) in sorted(totals.items(), key=lambda item: -item[1][1]):
+        summary.add_row(category, f"{count:,}", f"{total_ns / 1e6:,.1f}", f"{total_ns / count / 1e6:,.2f}", f"{max_ns / 1e6:,.2f}")
+    histogram = Table(title="Request latency", header_style="bold magenta", expand=True)
+    histogram.add_column("Latency", justify="right", no_wrap=True)
+    histogram.add_column("Requests", justify="right")
+    histogram.add_column("", style="green", ratio=1)
+    labels = [f"≤ {bound:g} ms" for bound in TRACE_LATENCY_BUCKETS_MS] + [f"> {TRACE_LATENCY_BUCKETS_MS[-1]:g} ms"]
+    peak = max(latency) or 1
+    for label, count in zip(labels, latency):
+        histogram.add_row(label, f"{count:,}", "█" * round(30 * count / peak))
+    return Panel(Group(recent, summary, histogram), title="[bold cyan]Timing Dashboard[/bold cyan]", border_style="cyan")
+
+
+def show_trace_dashboard():
+    """Menu action: prints this session's dashboard and offers a Chrome trace export."""
+    console.print(render_trace_dashboard())
+    if Prompt.ask("Export a Chrome trace of this session?", choices=["y", "n"], default="n") == "y":
+        finish_trace_session(export=True)
+
+
+async def _dashboard_worker():
+    """Server worker: keeps a live dashboard on screen until cancelled."""
+    import asyncio
+    with Live(render_trace_dashboard(), console=console, refresh_per_second=4) as live:
+        while True:
+            await asyncio.sleep(TRACE_DASHBOARD_REFRESH)
+            live.update(render_trace_dashboard())
+
+
+def run_command(command, cwd=ROOT_DIR, stdout=None):
+    """Utility to run a system command and print output (to `stdout` when given, e.g. sys.stderr)."""
+    import subprocess
     try:
         console.print(f"\n[bold blue]> Running:[/bold blue] {' '.join(command)}")
-        result = subprocess.run(command, cwd=cwd, text=True, capture_output=False)
+        with trace_span("git" if command[0] == "git" else "subprocess", " ".join(command[:2])):
+            result = subprocess.run(command, cwd=cwd, text=True, stdout=stdout)
         return result.returncode == 0
     except Exception as e:
         console.print(f"[bold red]Error running command:[/bold red] {e}")
         return False
 
+# --- Maintenance mode (every page + service worker, atomic, status cached by mtime) ---
+
+MAINTENANCE_PAGE = "pages/maintenance.html"
+# Pages that redirect to MAINTENANCE_PAGE while maintenance mode is on
+MAINTENANCE_PAGES = ["*.html", "pages/*.html"]
+MAINTENANCE_STATE_FILE = os.path.join(ROOT_DIR, "manager", ".cache", "maintenance.json")
+MAINTENANCE_STATE_VERSION = 1
+
+# The redirect tags are marked with an attribute (not comments) so they survive HTML minification
+_MAINTENANCE_TAG_RE = _LazyPattern(
+    r"<meta\b[^>]*\bdata-maintenance\b[^>]*>|<script\b[^>]*\bdata-maintenance\b[^>]*>.*?</script\s*>", re.I | re.S
+)
+_HEAD_OPEN_RE = _LazyPattern(r"<head\b[^>]*>", re.I)
+_META_CHARSET_RE = _LazyPattern(r"<meta\s+charset\b[^>]*>", re.I)
+_SW_MAINTENANCE_RE = _LazyPattern(r"\bMAINTENANCE_MODE\s*=\s*(true|false)\b")
+
+_maintenance_memo = None  # (stamps, state) of the last status check in this process
+
+
+def _maintenance_targets(include_dist: bool = True) -> dict:
+    """{key: absolute path} of every page and service worker the toggle rewrites; built files are keyed "dist/<rel>"."""
+    import glob
+    pages = sorted(
+        posixpath.relpath(path.replace(os.sep, "/"), ROOT_DIR.replace(os.sep, "/"))
+        for pattern in MAINTENANCE_PAGES for path in glob.glob(os.path.join(ROOT_DIR, pattern))
+    )
+    rels = [rel for rel in pages if rel != MAINTENANCE_PAGE] + [SW_FILE]
+    targets = {rel: os.path.join(ROOT_DIR, rel) for rel in rels}
+    if include_dist and os.path.isdir(DIST_DIR):
+        for rel in rels:
+            if os.path.isfile(os.path.join(DIST_DIR, rel)):
+                targets[f"dist/{rel}"] = os.path.join(DIST_DIR, rel)
+    return targets
+
+
+def _read_preserving_newlines(path: str) -> str:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def _maintenance_flag(key: str, text: str) -> bool:
+    """True when a page carries the redirect tags in its <head>, or a service worker has the flag set."""
+    if key.endswith(".js"):
+        match = _SW_MAINTENANCE_RE.search(text)
+        return bool(match) and match.group(1) == "true"
+    head_end = text.find("</head>")
+    return _MAINTENANCE_TAG_RE.search(text, 0, head_end if head_end >= 0 else len(text)) is not None
+
+
+def maintenance_state() -> dict:
+    """Returns {"enabled", "files": {key: bool}}; "enabled" follows index.html."""
+    global _maintenance_memo
+    targets = _maintenance_targets()
+    stamps = {}
+    for key, path in targets.items():
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        stamps[key] = [st.st_mtime_ns, st.st_size]
+    if _maintenance_memo is not None and _maintenance_memo[0] == stamps:
+        return _maintenance_memo[1]
+
+    cache = _load_json_cache(MAINTENANCE_STATE_FILE, MAINTENANCE_STATE_VERSION, {"files": {}})
+    files, dirty = {}, False
+    for key, stamp in stamps.items():
+        entry = cache["files"].get(key)
+        if not entry or entry["stat"] != stamp:
+            entry = {"stat": stamp, "enabled": _maintenance_flag(key, _read_preserving_newlines(targets[key]))}
+            dirty = True
+        files[key] = entry
+    if dirty or files.keys() != cache["files"].keys():
+        cache["files"] = files
+        _save_json_cache(MAINTENANCE_STATE_FILE, cache)
+    state = {
+        "enabled": files.get("index.html", {}).get("enabled", False),
+        "files": {key: entry["enabled"] for key, entry in files.items()},
+    }
+    _maintenance_memo = (stamps, state)
+    return state
+
+
 def get_maintenance_status():
-    """Reads index.html to check if maintenance mode redirects are active."""
+    """True when maintenance mode redirects are active (None when index.html is missing)."""
     if not os.path.exists(INDEX_PATH):
         console.print(f"[bold red]Error:[/bold red] {INDEX_PATH} not found.")
         return None
-    
-    with open(INDEX_PATH, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Check if the redirection tags are commented or uncommented
-    meta_active = re.search(r'(?<!<!--\s)<meta http-equiv="refresh" content="0; url=pages/maintenance.html">', content)
-    script_active = re.search(r"(?<!<!--\s)<script>window.location.replace\('pages/maintenance.html'\);</script>", content)
-    
-    if meta_active or script_active:
-        return True
-    return False
+    return maintenance_state()["enabled"]
+
+
+def _set_page_maintenance(rel: str, text: str, enable: bool) -> str:
+    """Adds or removes the redirect tags right after <head>; the rest of the page is left untouched."""
+    head = _HEAD_OPEN_RE.search(text)
+    if head is None:
+        raise ValueError(f"{rel} has no <head> element")
+    head_end = text.find("</head>", head.end())
+    pieces, last = [], 0
+    for match in _MAINTENANCE_TAG_RE.finditer(text, head.end(), head_end if head_end >= 0 else len(text)):
+        start = match.start()
+        line_start = text.rfind("\n", 0, start)
+        if line_start >= 0 and not text[line_start + 1:start].strip():
+            start = line_start - 1 if text[line_start - 1:line_start] == "\r" else line_start
+        pieces.append(text[last:start])
+        last = match.end()
+    pieces.append(text[last:])
+    text = "".join(pieces)
+    if not enable:
+        return text
 
-def toggle_maintenance(enable):
-    """Enables or disables maintenance mode by modifying index.html."""
+    target = posixpath.relpath(MAINTENANCE_PAGE, posixpath.dirname(rel) or ".")
+    tags = [
+        f'<meta http-equiv="refresh" content="0; url={target}" data-maintenance>',
+        f"<script data-maintenance>window.location.replace('{target}');</script>",
+    ]
+    head = _HEAD_OPEN_RE.search(text)
+    head_end = text.find("</head>", head.end())
+    charset = _META_CHARSET_RE.search(text, head.end(), head_end if head_end >= 0 else len(text))
+    at = charset.end() if charset else head.end()  # the charset declaration stays first
+    layout = re.match(r"(\r?\n)([ \t]*)", text[at:])
+    # Formatted pages get one tag per line; minified dist/ pages get them inline
+    joined = "".join(layout.group(1) + layout.group(2) + tag for tag in tags) if layout else "".join(tags)
+    return text[:at] + joined + text[at:]
+
+
+def _set_sw_maintenance(key: str, text: str, enable: bool) -> str:
+    match = _SW_MAINTENANCE_RE.search(text)
+    if match is None:
+        raise ValueError(f"{key} has no MAINTENANCE_MODE flag")
+    return text[:match.start(1)] + ("true" if enable else "false") + text[match.end(1):]
+
+
+def _set_dist_precache_revisions(sw_text: str, revisions: dict) -> str:
+    """Points the built manifest's entries for {"./url": revision} at the rewritten pages."""
+    for url, revision in revisions.items():
+        sw_text = re.sub(
+            r"(\{\s*url:\s*'" + re.escape(url) + r"',\s*revision:\s*')[0-9a-f]+'",
+            lambda m: m.group(1) + revision + "'", sw_text,
+        )
+    return sw_text
+
+
+def _atomic_write_all(updates: dict, removals: list = ()):
+    """Writes every {path: bytes} to an fsynced temp file first, then renames them all into place."""
+    temps = []
+    get_tracer().count("fs.bytes_written", sum(len(data) for data in updates.values()))
+    with trace_span("fs", "atomic write", files=len(updates), removals=len(removals)):
+        try:
+            for path, data in updates.items():
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                temps.append((tmp_path, path))
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+        except OSError:
+            for tmp_path, _ in temps:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+        for tmp_path, path in temps:
+            os.replace(tmp_path, path)
+        for path in removals:
+            if os.path.exists(path):
+                os.remove(path)
+        if os.name != "nt":  # make the renames themselves durable
+            for directory in {os.path.dirname(path) for path in updates}:
+                fd = os.open(directory, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+
+
+def toggle_maintenance(enable, include_dist=True):
+    """Turns maintenance mode on or off for every page, sw.js and dist/ in one atomic pass; False on failure."""
+    import hashlib
     if not os.path.exists(INDEX_PATH):
         console.print(f"[bold red]Error:[/bold red] {INDEX_PATH} not found.")
-        return
-    
-    with open(INDEX_PATH, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Search patterns
-    meta_commented = r'<!-- <meta http-equiv="refresh" content="0; url=pages/maintenance.html"> -->'
-    meta_uncommented = r'<meta http-equiv="refresh" content="0; url=pages/maintenance.html">'
-    
-    script_commented = r"<!-- <script>window.location.replace\('pages/maintenance.html'\);</script> -->"
-    script_uncommented = r"<script>window.location.replace\('pages/maintenance.html'\);</script>"
-
-    if enable:
-        if meta_commented in content:
-            content = content.replace(meta_commented, meta_uncommented)
-        if script_commented in content:
-            content = content.replace(script_commented, script_uncommented)
-        status_msg = "ENABLED 🛠️"
-        color = "yellow"
-    else:
-        if meta_uncommented in content and meta_commented not in content:
-            content = content.replace(meta_uncommented, meta_commented)
-        if script_uncommented in content and script_commented not in content:
-            content = content.replace(script_uncommented, script_commented)
-        status_msg = "DISABLED 🟢"
-        color = "green"
-
-    with open(INDEX_PATH, "w", encoding="utf-8") as f:
-        f.write(content)
-    
-    console.print(Panel(f"[bold {color}]Maintenance mode successfully {status_msg}[/bold {color}]", border_style=color))
+        return False
+    try:
+        targets = _maintenance_targets(include_dist)
+        texts = {key: _read_preserving_newlines(path) for key, path in targets.items()}
+        new_texts = {
+            key: _set_page_maintenance(key.removeprefix("dist/"), text, enable)
+            for key, text in texts.items() if key.endswith(".html")
+        }
+        new_texts[SW_FILE] = _set_sw_maintenance(SW_FILE, texts[SW_FILE], enable)
+        site_files = dict(_iter_site_files())
+        overrides = {key: text.encode("utf-8") for key, text in new_texts.items() if key in site_files}
+        revisions, _ = _precache_revisions(site_files, overrides)
+        new_texts[SW_FILE] = _inject_precache_block(new_texts[SW_FILE], _render_precache_block(revisions))
+
+        dist_sw = f"dist/{SW_FILE}"
+        if dist_sw in texts:
+            dist_revisions = {}
+            for key, text in new_texts.items():
+                if key.startswith("dist/") and text != texts[key]:
+                    revision = hashlib.sha256(text.encode("utf-8")).hexdigest()[:10]
+                    dist_revisions[f"./{key.removeprefix('dist/')}"] = revision
+                    if key == "dist/index.html":
+                        dist_revisions["./"] = revision
+            sw_text = _set_sw_maintenance(dist_sw, texts[dist_sw], enable)
+            new_texts[dist_sw] = _set_dist_precache_revisions(sw_text, dist_revisions)
+
+        updates, removals = {}, []
+        brotli_module = _load_brotli() if any(key.startswith("dist/") for key in new_texts) else None
+        for key, text in new_texts.items():
+            if text == texts[key]:
+                continue
+            data = text.encode("utf-8")
+            updates[targets[key]] = data
+            if key.startswith("dist/"):  # keep the precompressed siblings in step
+                variants = _compress_variants(data, brotli_module)
+                for suffix in (".gz", ".br"):
+                    if suffix in variants:
+                        updates[targets[key] + suffix] = variants[suffix]
+                    else:
+                        removals.append(targets[key] + suffix)
+        _atomic_write_all(updates, removals)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Maintenance toggle failed:[/bold red] {e}")
+        return False
+
+    status_msg, color = ("ENABLED 🛠️", "yellow") if enable else ("DISABLED 🟢", "green")
+    changed = [key for key in new_texts if new_texts[key] != texts[key]]
+    console.print(Panel(
+        f"[bold {color}]Maintenance mode successfully {status_msg}[/bold {color}]\n\n"
+        f"[dim]{len(changed)} of {len(targets)} files rewritten"
+        f"{' (dist/ included)' if any(key.startswith('dist/') for key in targets) else ''}.[/dim]",
+        border_style=color,
+    ))
+    return True
 
 ORBIT_AI_PATH = r"C:\BhasaGrid-Application-Project"
+# "orbit" (BhasaGrid checkout), "stub" (offline, deterministic) or "package.module:factory"
+AI_BACKEND = os.environ.get("MANAGER_AI_BACKEND", "orbit")
+AI_TIMEOUT_SECONDS = float(os.environ.get("MANAGER_AI_TIMEOUT", "60"))
+AI_CACHE_FILE = os.path.join(ROOT_DIR, "manager", ".cache", "ai-responses.json")
+AI_CACHE_VERSION = 1
+AI_CACHE_ENTRIES = 64
+
+_ai_backend = None  # loaded once, then reused for the rest of the session
 
 def get_orbit_ai_instance():
     """Dynamically loads OrbitAIDebugger from BhasaGrid project."""
@@ -114,47 +569,557 @@ def get_orbit_ai_instance():
             console.print(f"[dim yellow]Notice: Could not load Orbit AI ({e}).[/dim yellow]")
     return None
 
+class OrbitAIBackend:
+    """Orbit AI from the BhasaGrid checkout at ORBIT_AI_PATH."""
+    name = "orbit"
+
+    def __init__(self):
+        self.debugger = get_orbit_ai_instance()
+        if self.debugger is None:
+            raise RuntimeError(f"Orbit AI not available at {ORBIT_AI_PATH} (set MANAGER_AI_BACKEND=stub to work offline)")
+
+    def query(self, prompt: str, system_prompt: str) -> str:
+        return self.debugger.query_ai(prompt=prompt, system_prompt=system_prompt)
+
+class StubAIBackend:
+    """Offline backend: derives a conventional commit message from the diff digest in the prompt."""
+    name = "stub"
+    _CHANGE_RE = _LazyPattern(r"^(\S.*?) \((added|deleted|modified|renamed|copied|type changed)\b", re.M)
+
+    def __init__(self):
+        self.delay = float(os.environ.get("MANAGER_AI_STUB_DELAY", "0"))
+
+    def query(self, prompt: str, system_prompt: str) -> str:
+        time.sleep(self.delay)
+        changes = self._CHANGE_RE.findall(prompt)
+        if not changes:
+            return "chore: update project files"
+        paths = [path.split(" → ")[-1] for path, _ in changes]
+        statuses = {status for _, status in changes}
+        extensions = {posixpath.splitext(path)[1].lower() for path in paths}
+        if extensions <= {".md", ".txt"}:
+            kind = "docs"
+        elif extensions <= {".css"}:
+            kind = "style"
+        elif statuses == {"added"}:
+            kind = "feat"
+        elif statuses == {"deleted"}:
+            kind = "chore"
+        else:
+            kind = "refactor"
+        common = posixpath.commonpath(paths) if len(paths) > 1 else posixpath.dirname(paths[0])
+        if not common:
+            top_dirs = [path.split("/", 1)[0] for path in paths if "/" in path]
+            common = max(set(top_dirs), key=top_dirs.count) if top_dirs else ""
+        scope = posixpath.basename(common) or posixpath.splitext(posixpath.basename(paths[0]))[0]
+        verb = {"added": "add", "deleted": "remove"}.get(next(iter(statuses)), "update") if len(statuses) == 1 else "update"
+        target = posixpath.basename(paths[0]) if len(paths) == 1 else f"{len(paths)} files"
+        return f"{kind}({scope}): {verb} {target}"
+
+def get_ai_backend():
+    """Loads the backend named by MANAGER_AI_BACKEND once and keeps it in memory."""
+    global _ai_backend
+    if _ai_backend is None:
+        if AI_BACKEND == "orbit":
+            _ai_backend = OrbitAIBackend()
+        elif AI_BACKEND == "stub":
+            _ai_backend = StubAIBackend()
+        else:
+            module_name, _, factory = AI_BACKEND.partition(":")
+            _ai_backend = getattr(importlib.import_module(module_name), factory or "Backend")()
+    return _ai_backend
+
+def query_ai(prompt: str, system_prompt: str, label: str, timeout: float = AI_TIMEOUT_SECONDS) -> str:
+    """Runs one backend query off the UI thread behind a spinner; repeated prompts are answered from an on-disk cache."""
+    import hashlib
+    backend = get_ai_backend()
+    key = hashlib.sha256(f"{backend.name}\0{system_prompt}\0{prompt}".encode("utf-8")).hexdigest()
+    cache = _load_json_cache(AI_CACHE_FILE, AI_CACHE_VERSION, {"entries": {}})
+    entries = cache["entries"]
+    if key in entries:
+        get_tracer().count("ai.cache_hits")
+        entries[key] = entries.pop(key)  # most recently used last
+        _save_json_cache(AI_CACHE_FILE, cache)
+        return entries[key]
+
+    outcome = {}
+    done = threading.Event()
+
+    def worker():
+        try:
+            outcome["answer"] = backend.query(prompt, system_prompt)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    # A daemon thread rather than an executor: an abandoned query must never block exit
+    threading.Thread(target=worker, name="ai-query", daemon=True).start()
+    deadline = time.monotonic() + timeout
+    with trace_span("ai", f"{backend.name} query", prompt_chars=len(prompt)), \
+            Status(f"{label} [dim](Ctrl+C to cancel)[/dim]", console=console):
+        while not done.wait(0.1):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"no answer from the {backend.name} backend within {timeout:g} s")
+    if "error" in outcome:
+        raise outcome["error"]
+    entries[key] = outcome["answer"]
+    cache["entries"] = dict(list(entries.items())[-AI_CACHE_ENTRIES:])
+    _save_json_cache(AI_CACHE_FILE, cache)
+    return outcome["answer"]
+
+# --- Git session (porcelain v2 status + staged diff, cached until the index changes) ---
+
+# Worktree-only edits do not touch the index, so a snapshot is also refreshed after this long
+GIT_STATUS_MAX_AGE = 30.0
+
+_git_session = None  # one per process, see get_git_session()
+
+
+def _load_pygit2():
+    """Returns the optional `pygit2` module, or None when it is not installed."""
+    try:
+        return importlib.import_module("pygit2")
+    except ImportError:
+        return None
+
+
+def _parse_porcelain_v2(out: str, staged_entries: list) -> dict:
+    """Parses `git status --porcelain=v2 -z --branch` into a repository snapshot."""
+    snapshot = {
+        "branch": None, "oid": None, "upstream": None, "ahead": 0, "behind": 0,
+        "staged": [], "unstaged": [], "untracked": [], "conflicts": [], "staged_entries": staged_entries,
+    }
+    fields = out.split("\0")
+    i = 0
+    while i < len(fields):
+        field = fields[i]
+        i += 1
+        if not field:
+            continue
+        kind = field[0]
+        if kind == "#":
+            key, _, value = field[2:].partition(" ")
+            if key == "branch.oid":
+                snapshot["oid"] = None if value == "(initial)" else value
+            elif key == "branch.head":
+                snapshot["branch"] = None if value == "(detached)" else value
+            elif key == "branch.upstream":
+                snapshot["upstream"] = value
+            elif key == "branch.ab":
+                ahead, behind = value.split()
+                snapshot["ahead"], snapshot["behind"] = int(ahead), -int(behind)
+        elif kind in "12":
+            parts = field.split(" ", 8 if kind == "1" else 9)
+            xy, path = parts[1], parts[-1]
+            if kind == "2":  # renamed or copied: the original path follows in the next field
+                path = f"{fields[i]} → {path}"
+                i += 1
+            if xy[0] != ".":
+                snapshot["staged"].append([xy[0], path])
+            if xy[1] != ".":
+                snapshot["unstaged"].append([xy[1], path])
+        elif kind == "u":
+            snapshot["conflicts"].append(field.split(" ", 10)[-1])
+        elif kind == "?":
+            snapshot["untracked"].append(field[2:])
+    return snapshot
+
+
+class GitSession:
+    """Repository state for the git menu, read in one batch and reused until the index or refs change."""
+
+    def __init__(self, root: str = ROOT_DIR):
+        import subprocess
+        self.root = root
+        self.repo = None
+        self.reads = 0
+        self._snapshot = None
+        self._stamp = None
+        self._taken = 0.0
+        pygit2 = _load_pygit2()
+        if pygit2 is not None:
+            try:
+                self.repo = pygit2.Repository(root)
+            except pygit2.GitError:
+                self.repo = None
+        if self.repo is not None:
+            self.git_dir = self.repo.path.rstrip("/\\")
+        else:
+            with trace_span("git", "git rev-parse"):
+                self.git_dir = subprocess.run(
+                    ["git", "rev-parse", "--absolute-git-dir"], cwd=root, capture_output=True, text=True, check=True
+                ).stdout.strip()
+
+    def _current_stamp(self) -> list:
+        """(mtime_ns, size) of the index and of every ref the snapshot depends on."""
+        names = ["index", "HEAD", "packed-refs"]
+        if self._snapshot:
+            if self._snapshot["branch"]:
+                names.append(f"refs/heads/{self._snapshot['branch']}")
+            if self._snapshot["upstream"]:
+                names.append(f"refs/remotes/{self._snapshot['upstream']}")
+        stamp = []
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.git_dir, name))
+                stamp.append([name, st.st_mtime_ns, st.st_size])
+            except OSError:
+                stamp.append([name, None, None])
+        return stamp
+
+    def snapshot(self, refresh: bool = False) -> dict:
+        """Returns the cached snapshot, re-reading the repository only when something changed."""
+        if (
+            not refresh
+            and self._snapshot is not None
+            and time.monotonic() - self._taken < GIT_STATUS_MAX_AGE
+            and self._current_stamp() == self._stamp
+        ):
+            return self._snapshot
+        with trace_span("git", "status snapshot", pygit2=self.repo is not None):
+            snapshot = self._read_with_pygit2() if self.repo is not None else None
+            self._snapshot = snapshot or self._read_with_cli()
+        self._stamp = self._current_stamp()
+        self._taken = time.monotonic()
+        self.reads += 1
+        return self._snapshot
+
+    def _read_with_cli(self) -> dict:
+        import subprocess
+        status = subprocess.Popen(
+            ["git", "--no-optional-locks", "status", "--porcelain=v2", "-z", "--branch"],
+            cwd=self.root, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        try:
+            staged_entries = _changed_files(True)  # runs while `git status` walks the worktree
+        finally:
+            out, err = status.communicate()
+        if status.returncode:
+            raise subprocess.CalledProcessError(status.returncode, status.args, out, err)
+        return _parse_porcelain_v2(out.decode("utf-8", "replace"), staged_entries)
+
+    def _read_with_pygit2(self) -> dict:
+        """Same snapshot as _read_with_cli without spawning git; None falls back to the CLI."""
+        pygit2 = _load_pygit2()
+        repo = self.repo
+        try:
+            if repo.head_is_unborn:
+                return None
+            repo.index.read(False)
+            snapshot = {
+                "branch": None, "oid": str(repo.head.target), "upstream": None, "ahead": 0, "behind": 0,
+                "staged": [], "unstaged": [], "untracked": [], "conflicts": [], "staged_entries": [],
+            }
+            if not repo.head_is_detached:
+                snapshot["branch"] = repo.head.shorthand
+                upstream = repo.branches.local[snapshot["branch"]].upstream
+                if upstream is not None:
+                    snapshot["upstream"] = upstream.shorthand
+                    snapshot["ahead"], snapshot["behind"] = repo.ahead_behind(repo.head.target, upstream.target)
+            index_flags = {
+                pygit2.GIT_STATUS_INDEX_NEW: "A", pygit2.GIT_STATUS_INDEX_MODIFIED: "M",
+                pygit2.GIT_STATUS_INDEX_DELETED: "D", pygit2.GIT_STATUS_INDEX_RENAMED: "R",
+                pygit2.GIT_STATUS_INDEX_TYPECHANGE: "T",
+            }
+            worktree_flags = {
+                pygit2.GIT_STATUS_WT_MODIFIED: "M", pygit2.GIT_STATUS_WT_DELETED: "D",
+                pygit2.GIT_STATUS_WT_RENAMED: "R", pygit2.GIT_STATUS_WT_TYPECHANGE: "T",
+            }
+            for path, flags in sorted(repo.status().items()):
+                if flags & pygit2.GIT_STATUS_CONFLICTED:
+                    snapshot["conflicts"].append(path)
+                elif flags & pygit2.GIT_STATUS_WT_NEW:
+                    snapshot["untracked"].append(path)
+                snapshot["staged"] += [[code, path] for flag, code in index_flags.items() if flags & flag]
+                snapshot["unstaged"] += [[code, path] for flag, code in worktree_flags.items() if flags & flag]
+            diff = repo.index.diff_to_tree(repo.head.peel(pygit2.Tree))
+            diff.find_similar()
+            for patch in diff:
+                delta = patch.delta
+                _, added, deleted = patch.line_stats
+                snapshot["staged_entries"].append({
+                    "path": delta.new_file.path, "old_path": delta.old_file.path, "status": delta.status_char(),
+                    "blobs": [str(delta.old_file.id), str(delta.new_file.id)],
+                    "added": added, "deleted": deleted, "binary": delta.is_binary,
+                })
+            return snapshot
+        except (pygit2.GitError, KeyError, ValueError) as e:
+            console.print(f"[dim yellow]Notice: pygit2 could not read the repository ({e}); using the git CLI.[/dim yellow]")
+            self.repo = None
+            return None
+
+
+def get_git_session() -> GitSession:
+    """Returns the process-wide GitSession, creating it on first use."""
+    global _git_session
+    if _git_session is None:
+        _git_session = GitSession()
+    return _git_session
+
+
+def _describe_git_state() -> str:
+    """One-line repository summary for menu captions; cheap enough to call on every redraw."""
+    import subprocess
+    try:
+        snap = get_git_session().snapshot()
+    except (OSError, subprocess.CalledProcessError) as e:
+        return f"[dim]Repository state unavailable: {e}[/dim]"
+    branch = snap["branch"] or f"detached at {(snap['oid'] or '?')[:7]}"
+    parts = [f"[bold]{branch}[/bold]"]
+    if snap["upstream"]:
+        parts[0] += f" → {snap['upstream']} ↑{snap['ahead']} ↓{snap['behind']}"
+    counts = [
+        (len(snap["staged"]), "staged", "green"), (len(snap["unstaged"]), "modified", "yellow"),
+        (len(snap["untracked"]), "untracked", "dim"), (len(snap["conflicts"]), "conflicted", "bold red"),
+    ]
+    changes = [f"[{style}]{count} {label}[/{style}]" for count, label, style in counts if count]
+    parts.append(" · ".join(changes) if changes else "[green]clean[/green]")
+    return "  ".join(parts)
+
+
+def _print_git_status(snap: dict):
+    """Renders a snapshot in place of `git status` output."""
+    table = Table(title="[bold cyan]Repository Status[/bold cyan]", caption=_describe_git_state(), show_header=True, header_style="bold magenta")
+    table.add_column("Area", style="bold")
+    table.add_column("Change")
+    table.add_column("File", style="cyan")
+    rows = (
+        [("[green]staged[/green]", code, path) for code, path in snap["staged"]]
+        + [("[yellow]not staged[/yellow]", code, path) for code, path in snap["unstaged"]]
+        + [("[bold red]conflict[/bold red]", "U", path) for path in snap["conflicts"]]
+        + [("[dim]untracked[/dim]", "?", path) for path in snap["untracked"]]
+    )
+    for area, code, path in rows:
+        table.add_row(area, _DIFF_STATUS_NAMES.get(code, "untracked" if code == "?" else code), path)
+    if not rows:
+        table.add_row("", "", "[green]nothing to commit, working tree clean[/green]")
+    console.print(table)
+
+
+# --- Diff digest for AI commit messages (streamed per file, cached by blob) ---
+
+DIFF_DIGEST_MAX_CHARS = 6000
+# Upper bound for one file's summary before the shared budget is applied
+DIFF_DIGEST_FILE_MAX_CHARS = 2000
+DIFF_DIGEST_CONTEXT_LINES = 1
+DIFF_DIGEST_WORKERS = 8
+DIFF_DIGEST_CACHE_FILE = os.path.join(ROOT_DIR, "manager", ".cache", "diff-digest.json")
+DIFF_DIGEST_CACHE_VERSION = 1
+DIFF_DIGEST_CACHE_ENTRIES = 512
+# Files summarised by their --stat line only; so is any file with a changed line longer than this
+DIFF_STAT_ONLY_PATTERNS = ("*.min.js", "*.min.css", "*.map", "*.lock", "package-lock.json", "*.pdf")
+DIFF_MINIFIED_LINE_CHARS = 400
+_NULL_BLOB = "0" * 40
+_DIFF_STATUS_NAMES = {"A": "added", "D": "deleted", "M": "modified", "R": "renamed", "C": "copied", "T": "type changed"}
+
+
+def _changed_files(staged: bool) -> list:
+    """Lists changed files with blob ids and line counts from one `git diff --raw --numstat -z` call."""
+    import subprocess
+    args = ["git", "--no-optional-locks", "diff", "--raw", "--numstat", "-z", "--full-index", "--no-color", "--no-ext-diff"]
+    if staged:
+        args.append("--staged")
+    with trace_span("git", "git diff --raw --numstat", staged=staged):
+        out = subprocess.run(args, cwd=ROOT_DIR, capture_output=True, check=True).stdout.decode("utf-8", "replace")
+    fields = out.split("\0")
+    entries, i = {}, 0
+    while i < len(fields):
+        field = fields[i]
+        if not field:
+            i += 1
+        elif field.startswith(":"):
+            meta = field[1:].split()
+            if meta[4][0] in "RC":
+                old_path, path = fields[i + 1], fields[i + 2]
+                i += 3
+            else:
+                old_path = path = fields[i + 1]
+                i += 2
+            entries[path] = {
+                "path": path, "old_path": old_path, "status": meta[4][0], "blobs": [meta[2], meta[3]],
+                "added": 0, "deleted": 0, "binary": False,
+            }
+        else:
+            added, deleted, path = field.split("\t", 2)
+            if path:
+                i += 1
+            else:  # renames: "added\tdeleted\t" NUL old NUL new
+                path = fields[i + 2]
+                i += 3
+            if path in entries:
+                entries[path].update(
+                    added=0 if added == "-" else int(added),
+                    deleted=0 if deleted == "-" else int(deleted),
+                    binary=added == "-",
+                )
+    return list(entries.values())
+
+
+def _diff_stat_line(entry: dict) -> str:
+    path = entry["path"] if entry["old_path"] == entry["path"] else f"{entry['old_path']} → {entry['path']}"
+    change = "binary" if entry["binary"] else f"+{entry['added']} -{entry['deleted']}"
+    return f"{path} ({_DIFF_STATUS_NAMES.get(entry['status'], entry['status'])}, {change})"
+
+
+def _digest_cache_key(entry: dict) -> str:
+    """Identifies a file's change by its blobs; unstaged files use the worktree stat instead."""
+    new_blob = entry["blobs"][1]
+    if new_blob == _NULL_BLOB and entry["status"] != "D":
+        try:
+            st = os.stat(os.path.join(ROOT_DIR, entry["path"]))
+        except OSError:
+            return None
+        new_blob = f"worktree:{st.st_mtime_ns}:{st.st_size}"
+    return f"{entry['old_path']}:{entry['blobs'][0]}>{entry['path']}:{new_blob}"
+
+
+def _summarize_file_diff(entry: dict, staged: bool) -> str:
+    """Streams one file's diff, keeping hunk headers and changed lines up to DIFF_DIGEST_FILE_MAX_CHARS."""
+    import fnmatch
+    import subprocess
+    header = _diff_stat_line(entry)
+    if entry["binary"] or any(fnmatch.fnmatch(posixpath.basename(entry["path"]), p) for p in DIFF_STAT_ONLY_PATTERNS):
+        return header
+    args = ["git", "diff", "--no-color", "--no-ext-diff", f"--unified={DIFF_DIGEST_CONTEXT_LINES}"]
+    if staged:
+        args.append("--staged")
+    args += ["--", *dict.fromkeys([entry["old_path"], entry["path"]])]
+    lines, used, in_hunks = [header], len(header), False
+    started_ns = time.perf_counter_ns()
+    proc = subprocess.Popen(args, cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        for raw in proc.stdout:
+            line = raw.decode("utf-8", "replace").rstrip("\r\n")
+            if line.startswith("@@"):
+                in_hunks = True
+            elif not in_hunks:
+                continue  # diff/index/---/+++ headers: the stat line already says this
+            if line[:1] in "+-" and len(line) > DIFF_MINIFIED_LINE_CHARS:
+                return header.replace(")", ", minified/generated)", 1)
+            if used + len(line) + 1 > DIFF_DIGEST_FILE_MAX_CHARS:
+                lines.append("…")
+                break
+            lines.append(line)
+            used += len(line) + 1
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+        get_tracer().record("git", "git diff", started_ns, time.perf_counter_ns(), {"path": entry["path"]})
+    return "\n".join(lines)
+
+
+def _assemble_digest(summaries: list, max_chars: int) -> str:
+    """Joins per-file summaries into at most ~max_chars, always keeping every file's stat line."""
+    heads = [summary.split("\n", 1)[0] for summary in summaries]
+    bodies = [summary.split("\n", 1)[1] if "\n" in summary else "" for summary in summaries]
+    remaining = max_chars - sum(len(head) + 1 for head in heads)
+    if remaining < 0:
+        groups = {}
+        for head in heads:
+            directory = posixpath.dirname(head.split(" (", 1)[0].split(" → ")[-1]) or "."
+            groups[directory] = groups.get(directory, 0) + 1
+        return "\n".join(f"{directory}/ ({count} files changed)" for directory, count in sorted(groups.items()))
+    allowance = [0] * len(bodies)
+    for rank, i in enumerate(sorted(range(len(bodies)), key=lambda i: len(bodies[i]))):
+        allowance[i] = min(len(bodies[i]), remaining // (len(bodies) - rank))
+        remaining -= allowance[i]
+    parts = []
+    for head, body, allowed in zip(heads, bodies, allowance):
+        parts.append(head)
+        if body and allowed < len(body):
+            body = body[:allowed].rsplit("\n", 1)[0] + "\n…" if "\n" in body[:allowed] else ""
+        if body:
+            parts.append(body)
+    return "\n".join(parts)
+
+
+def build_diff_digest(max_chars: int = DIFF_DIGEST_MAX_CHARS) -> dict:
+    """Summarises the staged (or else unstaged) changes into a bounded digest: {"text", "files", "cached", "staged"}."""
+    for staged in (True, False):
+        entries = get_git_session().snapshot()["staged_entries"] if staged else _changed_files(False)
+        if entries:
+            break
+    else:
+        return {"text": "", "files": 0, "cached": 0, "staged": False}
+
+    settings = [DIFF_DIGEST_FILE_MAX_CHARS, DIFF_DIGEST_CONTEXT_LINES, DIFF_MINIFIED_LINE_CHARS, list(DIFF_STAT_ONLY_PATTERNS)]
+    cache = _load_json_cache(DIFF_DIGEST_CACHE_FILE, DIFF_DIGEST_CACHE_VERSION, {"settings": None, "entries": {}})
+    if cache["settings"] != settings:
+        cache["entries"] = {}
+    cache["settings"] = settings
+    cached_entries = cache["entries"]
+    keys = [_digest_cache_key(entry) for entry in entries]
+    missing = [entry for entry, key in zip(entries, keys) if key is None or key not in cached_entries]
+    fresh = {}
+    if missing:
+        import concurrent.futures
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(DIFF_DIGEST_WORKERS, len(missing))) as pool:
+            fresh = dict(zip(
+                (entry["path"] for entry in missing),
+                pool.map(lambda entry: _summarize_file_diff(entry, staged), missing),
+            ))
+
+    summaries = []
+    for entry, key in zip(entries, keys):
+        summary = fresh[entry["path"]] if entry["path"] in fresh else cached_entries.pop(key)
+        if key:
+            cached_entries[key] = summary  # re-inserted last: the oldest entries are evicted first
+        summaries.append(summary)
+    if missing:
+        cache["entries"] = dict(list(cached_entries.items())[-DIFF_DIGEST_CACHE_ENTRIES:])
+        _save_json_cache(DIFF_DIGEST_CACHE_FILE, cache)
+    return {
+        "text": _assemble_digest(summaries, max_chars),
+        "files": len(entries),
+        "cached": len(entries) - len(missing),
+        "staged": staged,
+    }
+
+
 def generate_ai_commit_message():
     """Generates a smart git commit message using Orbit AI based on staged git diff."""
     try:
-        diff_res = subprocess.run(["git", "diff", "--staged"], cwd=ROOT_DIR, text=True, capture_output=True)
-        diff_text = diff_res.stdout.strip()
-        
-        if not diff_text:
-            diff_res = subprocess.run(["git", "diff"], cwd=ROOT_DIR, text=True, capture_output=True)
-            diff_text = diff_res.stdout.strip()
-            
+        digest = build_diff_digest()
+        diff_text = digest["text"]
+
         if not diff_text:
-            status_res = subprocess.run(["git", "status", "--short"], cwd=ROOT_DIR, text=True, capture_output=True)
-            diff_text = status_res.stdout.strip()
+            snap = get_git_session().snapshot()
+            diff_text = "\n".join(f"?? {path}" for path in snap["untracked"])
             
         if not diff_text:
             console.print("[yellow]No changes detected in working tree or staging area.[/yellow]")
             return None
-            
-        debugger = get_orbit_ai_instance()
-        if not debugger:
-            console.print("[bold red]Orbit AI not available at C:\\BhasaGrid-Application-Project.[/bold red]")
-            return None
-
-        with Status("[bold cyan]🤖 Orbit AI is analyzing git changes and generating commit message...[/bold cyan]", console=console):
-            prompt = (
-                f"Analyze the following git diff/changes from my personal portfolio project and generate ONE concise, "
-                f"professional git commit message using Conventional Commits format (e.g., 'fix(settings): adjust top offset' or 'refactor(sw): clean up sw logic'). "
-                f"Return ONLY the commit message text, with no markdown code blocks, no quotes, and no extra commentary.\n\n"
-                f"Git Changes:\n{diff_text[:4000]}"
+        if digest["files"]:
+            console.print(
+                f"[dim]Diff digest: {digest['files']} {'staged' if digest['staged'] else 'unstaged'} files, "
+                f"{len(diff_text):,} chars ({digest['cached']} from cache).[/dim]"
             )
-            system_prompt = "You are Orbit AI, BhasaGrid's intelligent Git commit assistant. Provide concise, high-quality conventional commit messages."
             
-            raw_message = debugger.query_ai(prompt=prompt, system_prompt=system_prompt)
-            
-            message = raw_message.strip().strip('"').strip("'").strip('`')
-            lines = [line.strip() for line in message.splitlines() if line.strip()]
-            if lines:
-                message = lines[0]
-            if message.lower().startswith("commit message:"):
-                message = message[15:].strip()
-            return message
+        prompt = (
+            f"Analyze the following git diff/changes from my personal portfolio project and generate ONE concise, "
+            f"professional git commit message using Conventional Commits format (e.g., 'fix(settings): adjust top offset' or 'refactor(sw): clean up sw logic'). "
+            f"Return ONLY the commit message text, with no markdown code blocks, no quotes, and no extra commentary.\n\n"
+            f"Git Changes (one line per changed file, followed by its most relevant hunks):\n{diff_text}"
+        )
+        system_prompt = "You are Orbit AI, BhasaGrid's intelligent Git commit assistant. Provide concise, high-quality conventional commit messages."
+        
+        raw_message = query_ai(
+            prompt, system_prompt, "[bold cyan]🤖 Orbit AI is analyzing git changes and generating commit message...[/bold cyan]"
+        )
+        
+        message = raw_message.strip().strip('"').strip("'").strip('`')
+        lines = [line.strip() for line in message.splitlines() if line.strip()]
+        if lines:
+            message = lines[0]
+        if message.lower().startswith("commit message:"):
+            message = message[15:].strip()
+        return message
+    except KeyboardInterrupt:
+        console.print("[yellow]AI request cancelled.[/yellow]")
+        return None
     except Exception as e:
         console.print(f"[bold red]Orbit AI Error:[/bold red] {e}")
         return None
@@ -185,7 +1150,7 @@ def _commit_manually():
 def git_menu():
     """Git management menu with Orbit AI assistance."""
     while True:
-        table = Table(title="[bold purple]Git Repository Controls (Powered by Orbit AI 🤖)[/bold purple]", show_header=True, header_style="bold magenta")
+        table = Table(title="[bold purple]Git Repository Controls (Powered by Orbit AI 🤖)[/bold purple]", caption=_describe_git_state(), show_header=True, header_style="bold magenta")
         table.add_column("Option", style="dim", width=6)
         table.add_column("Action", style="bold cyan")
         
@@ -201,7 +1166,7 @@ def git_menu():
         choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5", "6", "7"])
         
         if choice == "1":
-            run_command(["git", "status"])
+            _print_git_status(get_git_session().snapshot(refresh=True))
         elif choice == "2":
             run_command(["git", "add", "."])
             console.print("[bold green]✔ Added all changes to staging area.[/bold green]")
@@ -218,44 +1183,6 @@ def git_menu():
         elif choice == "7":
             break
 
-def _try_kill_listening_process(port: int):
-    """Attempt to terminate process bound to specified port on Windows."""
-    if os.name != 'nt':
-        return
-    for p in (port, 35729):
-        try:
-            res = subprocess.run(f'netstat -ano | findstr :{p}', shell=True, capture_output=True, text=True)
-            pids = set()
-            for line in res.stdout.splitlines():
-                parts = line.strip().split()
-                if len(parts) >= 5 and parts[3] == "LISTENING":
-                    pids.add(parts[-1])
-            for pid in pids:
-                subprocess.run(f'taskkill /F /PID {pid}', shell=True, capture_output=True)
-            time.sleep(0.3)
-        except Exception:
-            pass
-
-def _free_or_find_port(preferred_port: int = 8431) -> int:
-    """Ensure port is available by terminating lingering processes or finding next open port."""
-    def is_in_use(p: int) -> bool:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            return s.connect_ex(("127.0.0.1", p)) == 0
-
-    if not is_in_use(preferred_port):
-        return preferred_port
-
-    _try_kill_listening_process(preferred_port)
-
-    if not is_in_use(preferred_port):
-        return preferred_port
-
-    for port in range(preferred_port + 1, preferred_port + 20):
-        if not is_in_use(port):
-            return port
-
-    return preferred_port
-
 BROWSER_CHOICE_FILE = os.path.join(ROOT_DIR, "manager", ".browser_choice.json")
 
 def get_preferred_browser_config() -> dict:
@@ -291,6 +1218,7 @@ def _get_browser_incognito_flags(browser: str) -> list:
 
 def open_url_in_browser(url: str, force_incognito: bool = None) -> bool:
     """Opens a URL using BhasaGrid browser engine preferences."""
+    import subprocess
     config = get_preferred_browser_config()
     browser = config.get("browser", "default")
     incognito = config.get("incognito", False) if force_incognito is None else force_incognito
@@ -360,11 +1288,13 @@ def configure_browser_menu():
         status = "ENABLED 🔒" if new_incognito else "DISABLED 🌐"
         console.print(f"[bold green]✔ Incognito mode {status}[/bold green]")
     elif choice == "8":
-        open_url_in_browser("http://localhost:8431/")
-        console.print("[bold green]✔ Opened http://localhost:8431/ in configured browser.[/bold green]")
+        url = f"http://localhost:{server_port('dev')}/"
+        open_url_in_browser(url)
+        console.print(f"[bold green]✔ Opened {url} in configured browser.[/bold green]")
 
 def open_terminal_menu():
     """BhasaGrid-style Terminal & Environment Management Menu."""
+    import subprocess
     console.print(Panel(
         "[bold cyan]Terminal & Shell Utilities (Powered by BhasaGrid Engine)[/bold cyan]",
         title="[bold blue]💻 Terminal Options[/bold blue]",
@@ -391,51 +1321,14 @@ def open_terminal_menu():
     elif choice == "3":
         os.system("cls" if os.name == "nt" else "clear")
 
-def start_server():
-    """Starts a local development server with auto-reload and auto-opens browser."""
-    port = _free_or_find_port(8431)
-    
-    try:
-        livereload_module = __import__('livereload')
-    except ImportError:
-        console.print("\n[bold yellow][📦] 'livereload' library not found. Installing it automatically...[/bold yellow]")
-        try:
-            subprocess.run([sys.executable, "-m", "pip", "install", "livereload"], check=True)
-            livereload_module = __import__('livereload')
-        except Exception as e:
-            console.print(f"[bold red]Failed to install livereload library:[/bold red] {e}")
-            console.print("[bold yellow]Falling back to standard python http.server (no auto-reload)...[/bold yellow]")
-            try:
-                threading.Thread(target=lambda: (time.sleep(1), open_url_in_browser(f"http://localhost:{port}/")), daemon=True).start()
-                subprocess.run([sys.executable, "-m", "http.server", str(port)], cwd=ROOT_DIR)
-            except KeyboardInterrupt:
-                console.print("\n[bold red][🛑] Server stopped.[/bold red]")
-            return
-
-    # Automatically launch preferred browser after 1 second
-    threading.Thread(target=lambda: (time.sleep(1), open_url_in_browser(f"http://localhost:{port}/")), daemon=True).start()
-
-    console.print(Panel(
-        f"[bold green]🚀 Live development server starting...[/bold green]\n\n"
-        f"URL: [bold underline]http://localhost:{port}/[/bold underline]\n"
-        f"Watching: [dim]HTML, CSS, JS modifications[/dim]\n\n"
-        f"[bold red][Ctrl+C][/bold red] to stop the server & return to menu.",
-        title="[bold cyan]Hot-Reload Server[/bold cyan]",
-        border_style="cyan"
-    ))
-    
+def start_server(open_browser: bool = True, production: bool = False, dashboard: bool = False):
+    """Starts the built-in asyncio dev server (or, with `production`, a preview of dist/) and opens the browser."""
+    import asyncio
     try:
-        server = livereload_module.Server()
-        server.watch(os.path.join(ROOT_DIR, "*.html"))
-        server.watch(os.path.join(ROOT_DIR, "pages", "*.html"))
-        server.watch(os.path.join(ROOT_DIR, "assets", "css", "*.css"))
-        server.watch(os.path.join(ROOT_DIR, "assets", "js", "*.js"))
-        server.watch(os.path.join(ROOT_DIR, "assets", "js", "modules", "*.js"))
-        
-        server.serve(port=port, host="127.0.0.1", root=ROOT_DIR)
+        asyncio.run(_serve_site(None, open_browser, production, dashboard))
     except KeyboardInterrupt:
         console.print("\n[bold red][🛑] Server stopped.[/bold red]")
-    except Exception as e:
+    except OSError as e:
         console.print(f"[bold red]Error starting live server:[/bold red] {e}")
 
 def _select_pdf_from_root(pdf_files):
@@ -447,9 +1340,13 @@ def _select_pdf_from_root(pdf_files):
     choice = Prompt.ask("Select resume PDF number", choices=[str(i) for i in range(1, len(pdf_files) + 1)])
     return os.path.join(ROOT_DIR, pdf_files[int(choice) - 1])
 
+def _root_pdf_files():
+    """PDFs dropped into the project root as candidates for the new resume."""
+    return [f for f in os.listdir(ROOT_DIR) if f.lower().endswith('.pdf') and f.lower() != 'resume.pdf']
+
 def manage_resume():
     """Interactive utility for uploading/updating resume PDF."""
-    pdf_files = [f for f in os.listdir(ROOT_DIR) if f.lower().endswith('.pdf') and f.lower() != 'resume.pdf']
+    pdf_files = _root_pdf_files()
     
     if not pdf_files:
         console.print(Panel(
@@ -465,63 +1362,5122 @@ def manage_resume():
     else:
         selected_pdf = _select_pdf_from_root(pdf_files)
 
-    resume_dest_dir = os.path.join(ROOT_DIR, "assets", "pdf")
-    os.makedirs(resume_dest_dir, exist_ok=True)
-    resume_dest_path = os.path.join(resume_dest_dir, "resume.pdf")
-
     try:
-        import shutil
-        shutil.copy(selected_pdf, resume_dest_path)
-        console.print(Panel(
-            f"[bold green]✔ Resume updated successfully![/bold green]\n\n"
-            f"Copied from: [dim]{selected_pdf}[/dim]\n"
-            f"Active path: [bold underline]{resume_dest_path}[/bold underline]",
-            title="Success",
-            border_style="green"
-        ))
+        _print_publish_report(publish_document(selected_pdf, RESUME_DOC_NAME), selected_pdf)
     except Exception as e:
-        console.print(f"[bold red]Failed to copy resume file:[/bold red] {e}")
+        console.print(f"[bold red]Failed to publish resume:[/bold red] {e}")
 
-def _handle_main_choice(choice: str, status_text: str) -> bool:
-    """Dispatches main menu selections. Returns False if exiting."""
-    if choice == "1":
-        console.print(Panel(f"Current Status: {status_text}"))
-    elif choice == "2":
-        toggle_maintenance(enable=True)
-    elif choice == "3":
-        toggle_maintenance(enable=False)
-    elif choice == "4":
-        git_menu()
-    elif choice == "5":
-        manage_resume()
-    elif choice == "6":
-        start_server()
-    elif choice == "7":
-        configure_browser_menu()
-    elif choice == "8":
-        open_terminal_menu()
-    elif choice == "9":
-        orbit_script = r"C:\BhasaGrid-Application-Project\tools\orbit_ai\orbit_ai.py"
-        if os.path.exists(orbit_script):
-            subprocess.run([sys.executable, orbit_script, "chat"], cwd=ROOT_DIR)
-        else:
-            console.print(f"[bold red]Orbit AI not found at {orbit_script}[/bold red]")
-    elif choice == "10":
-        console.print("\n[bold yellow]Exiting Manager. Goodbye![/bold yellow]\n")
-        return False
-    return True
+# --- Production build pipeline (minify, content-hash, precompress into dist/) ---
 
-def main():
-    while True:
-        status = get_maintenance_status()
-        status_text = "[bold yellow]ACTIVE 🛠️[/bold yellow]" if status else "[bold green]INACTIVE 🟢[/bold green]"
-        
-        is_venv = sys.prefix != sys.base_prefix
-        env_text = "[bold green]Virtual Environment (.venv)[/bold green]" if is_venv else "[bold red]Global System Python[/bold red]"
-        
-        console.print("\n")
-        console.print(Panel(
-            Align.center(f"[bold white]Portfolio Maintenance & Dev Tool[/bold white]\n\n"
+DIST_DIR = os.path.join(ROOT_DIR, "dist")
+CACHE_DIR = os.path.join(ROOT_DIR, "manager", ".cache")
+BUILD_CACHE_FILE = os.path.join(CACHE_DIR, "build.json")
+BUILD_CACHE_VERSION = 4
+
+# Top-level entries that are tooling/source-only and never shipped to visitors
+BUILD_EXCLUDES = {
+    ".git", ".github", ".gitignore", ".venv", "venv", "__pycache__", "manager", "dist", "bench", "tests",
+    "manage.ps1", "purgecss.config.js", "README.md", "DOCUMENTATION.md", "requests.jsonl",
+    "assets/css/purged",
+}
+# Ship the purged stylesheets from purgecss.config.js instead of the full sources
+PURGE_CSS_IN_BUILD = True
+HASHED_ASSET_EXTS = (".css", ".js")
+COMPRESSIBLE_EXTS = (".html", ".css", ".js", ".json", ".svg", ".xml", ".txt", ".webmanifest")
+MIN_COMPRESS_BYTES = 256
+
+_ASSET_REF_RE = _LazyPattern(r"""(?<=["'(])([^"'()\s<>]+?\.(?:css|js))(\?[^"'()\s<>]*)?(?=["')])""")
+
+
+def _site_subdirs(rel_dir: str, dirnames: list) -> list:
+    """Filters the child directories of `rel_dir` ("" for the root) down to those that belong to the site."""
+    if not rel_dir:
+        return sorted(d for d in dirnames if d not in BUILD_EXCLUDES and (not d.startswith(".") or d == ".well-known"))
+    return sorted(d for d in dirnames if d != "__pycache__" and f"{rel_dir}/{d}" not in BUILD_EXCLUDES)
+
+
+def _iter_site_files():
+    """Yields (relative_path, absolute_path) for every file that belongs in the deployed site."""
+    for dirpath, dirnames, filenames in os.walk(ROOT_DIR):
+        rel_dir = os.path.relpath(dirpath, ROOT_DIR).replace(os.sep, "/")
+        if rel_dir == ".":
+            rel_dir = ""
+        dirnames[:] = _site_subdirs(rel_dir, dirnames)
+        for name in sorted(filenames):
+            if not rel_dir and (name in BUILD_EXCLUDES or name.startswith(".")):
+                continue
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            yield rel, os.path.join(dirpath, name)
+
+
+def _is_hashed_asset(rel: str) -> bool:
+    return rel.startswith("assets/") and rel.endswith(HASHED_ASSET_EXTS)
+
+
+def _hashed_name(rel: str, data: bytes) -> str:
+    """Returns `dir/name.<hash>.ext` for the given content."""
+    import hashlib
+    stem, ext = os.path.splitext(rel)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+
+
+# References that never become a request for a site file
+_UNFETCHED_REF_PREFIXES = ("data:", "blob:", "#", "mailto:", "tel:", "javascript:")
+
+
+def _is_external_ref(ref: str) -> bool:
+    return "://" in ref or ref.startswith("//")
+
+
+def _resolve_asset_ref(from_rel: str, ref: str, exists, root_fallback: bool = True) -> str:
+    """Resolves a reference in `from_rel` to a site-relative path in `exists`; None for external, data: and missing targets."""
+    import urllib.parse
+    if ref.startswith(_UNFETCHED_REF_PREFIXES) or _is_external_ref(ref):
+        return None
+    path = urllib.parse.unquote(ref.split("?", 1)[0].split("#", 1)[0])
+    if not path:
+        return None
+    if not callable(exists):
+        exists = exists.__contains__
+    if path.startswith("/"):
+        candidates = [path.lstrip("/")]
+    else:
+        candidates = [posixpath.join(posixpath.dirname(from_rel), path)]
+        if root_fallback:
+            candidates.append(path)
+    for candidate in candidates:
+        candidate = posixpath.normpath(candidate)
+        if candidate.startswith(".."):
+            continue
+        for target in (candidate, posixpath.normpath(posixpath.join(candidate, "index.html"))):
+            if exists(target):
+                return target
+    return None
+
+
+def _site_file_exists(root: str = ROOT_DIR):
+    """A predicate for `_resolve_asset_ref` that checks the files under `root`."""
+    return lambda rel: os.path.isfile(os.path.join(root, rel))
+
+
+def _find_asset_refs(rel: str, text: str, assets) -> list:
+    """Lists every hashed asset referenced from a text file."""
+    refs = set()
+    for match in _ASSET_REF_RE.finditer(text):
+        target = _resolve_asset_ref(rel, match.group(1), assets)
+        if target and target != rel:
+            refs.add(target)
+    return sorted(refs)
+
+
+def _rewrite_asset_refs(rel: str, text: str, assets, output_names: dict) -> str:
+    """Points references at hashed filenames; the hash replaces any `?v=` cache-busting query."""
+    def replace(match):
+        target = _resolve_asset_ref(rel, match.group(1), assets)
+        if not target or target not in output_names:
+            return match.group(0)
+        ref_dir, _ = os.path.split(match.group(1))
+        new_base = os.path.basename(output_names[target])
+        return f"{ref_dir}/{new_base}" if ref_dir else new_base
+    return _ASSET_REF_RE.sub(replace, text)
+
+
+_CSS_TOKEN_RE = _LazyPattern(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|(/\*.*?\*/)|(\s+)|([^"'/\s]+|/)""", re.S)
+
+
+def minify_css(source: str) -> str:
+    """Strips comments and redundant whitespace from a stylesheet without touching strings."""
+    out = []
+    pending_space = False
+    for string, comment, space, other in (m.groups() for m in _CSS_TOKEN_RE.finditer(source)):
+        if comment is not None:
+            continue
+        if space is not None:
+            pending_space = True
+            continue
+        if string is not None:
+            chunk = string
+        else:
+            chunk = other.replace(";}", "}")
+            if chunk[0] == "}" and out and out[-1][-1] == ";" and out[-1][0] not in "\"'":
+                out[-1] = out[-1][:-1]
+        if pending_space and out and out[-1]:
+            # `and (` must keep its space or it turns into a function token
+            if out[-1][-1] not in "{};,>:(" and chunk[0] not in "{};,>)":
+                out.append(" ")
+        pending_space = False
+        out.append(chunk)
+    return "".join(out).strip()
+
+
+_JS_WHITESPACE = " \t\r\n\f\v\u00a0\ufeff"
+_JS_WORD_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$\\")
+_JS_REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%~^<>")
+_JS_REGEX_KEYWORDS = {
+    "return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void",
+    "throw", "instanceof", "yield", "await",
+}
+
+
+def _is_js_word_char(ch: str) -> bool:
+    return ch in _JS_WORD_CHARS or ord(ch) > 127
+
+
+def _skip_js_string(source: str, i: int) -> int:
+    """Returns the index just past the quoted string or template literal starting at `i`."""
+    quote = source[i]
+    i += 1
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == quote:
+            return i + 1
+        if quote == "`" and source.startswith("${", i):
+            i = _skip_js_template_expr(source, i + 2)
+            continue
+        if ch == "\n" and quote != "`":
+            return i
+        i += 1
+    return n
+
+
+def _skip_js_template_expr(source: str, i: int) -> int:
+    """Returns the index just past the `}` closing a template `${...}` expression."""
+    depth = 1
+    n = len(source)
+    while i < n:
+        ch = source[i]
+        if ch in "'\"`":
+            i = _skip_js_string(source, i)
+            continue
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _skip_js_regex(source: str, i: int) -> int:
+    """Returns the index just past the regex literal (and flags) starting at `i`."""
+    n = len(source)
+    i += 1
+    in_class = False
+    while i < n:
+        ch = source[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if ch == "\n":
+            return i
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "/":
+            i += 1
+            while i < n and _is_js_word_char(source[i]):
+                i += 1
+            return i
+        i += 1
+    return n
+
+
+def minify_js(source: str) -> str:
+    """Conservative JS minifier: drops comments and collapses whitespace, keeping the line breaks ASI depends on."""
+    out = []
+    last = ""        # last significant character emitted
+    last_word = ""   # last identifier/keyword emitted
+    pending = ""     # "", " " or "\n"
+    i, n = 0, len(source)
+
+    def emit(token: str):
+        nonlocal last, pending
+        if pending and out:
+            first = token[0]
+            needs_space = (
+                (_is_js_word_char(last) and _is_js_word_char(first))
+                or (last in "+-" and first == last)
+                or (last.isdigit() and first == ".")
+            )
+            if pending == "\n" and last not in "{;,([" and first not in ")],;.?:}" and last not in "=&|?:*%<>!~^":
+                out.append("\n")
+            elif needs_space:
+                out.append(" ")
+        pending = ""
+        out.append(token)
+        last = token[-1]
+
+    while i < n:
+        ch = source[i]
+        if ch in _JS_WHITESPACE:
+            j = i
+            while j < n and source[j] in _JS_WHITESPACE:
+                j += 1
+            pending = "\n" if ("\n" in source[i:j] or pending == "\n") else " "
+            i = j
+            continue
+        if source.startswith("//", i):
+            j = source.find("\n", i)
+            i = n if j == -1 else j
+            continue
+        if source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            block = source[i:n if j == -1 else j]
+            if "\n" in block:
+                pending = "\n"
+            elif not pending:
+                pending = " "
+            i = n if j == -1 else j + 2
+            continue
+        if ch in "'\"`":
+            j = _skip_js_string(source, i)
+            emit(source[i:j])
+            last_word = ""
+            i = j
+            continue
+        if ch == "/" and (not last or last in _JS_REGEX_PRECEDERS or last_word in _JS_REGEX_KEYWORDS):
+            j = _skip_js_regex(source, i)
+            emit(source[i:j])
+            last_word = ""
+            i = j
+            continue
+        if _is_js_word_char(ch):
+            j = i
+            while j < n and (_is_js_word_char(source[j]) or (source[j] == "." and source[i].isdigit())):
+                j += 1
+            word = source[i:j]
+            emit(word)
+            last_word = word
+            i = j
+            continue
+        emit(ch)
+        last_word = ""
+        i += 1
+    return "".join(out).strip()
+
+
+_HTML_CHUNK_RE = _LazyPattern(
+    r"(<!--.*?-->)"
+    r"|(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\3\s*>)"
+    r"|(<[^>]+>)"
+    r"|([^<]+|<)",
+    re.S | re.I,
+)
+_HTML_TAG_NAME_RE = _LazyPattern(r"</?\s*([a-zA-Z][a-zA-Z0-9-]*)")
+_HTML_BLOCK_TAGS = {
+    "html", "head", "body", "meta", "link", "title", "script", "style", "noscript", "base",
+    "div", "section", "header", "footer", "main", "nav", "aside", "article", "p", "ul", "ol",
+    "li", "h1", "h2", "h3", "h4", "h5", "h6", "form", "table", "thead", "tbody", "tr", "td",
+    "th", "br", "hr", "figure", "figcaption", "select", "option", "fieldset", "dl", "dt", "dd",
+    "svg", "path", "defs", "g", "template", "!doctype",
+}
+
+
+def _minify_inline_script(open_tag: str, body: str) -> str:
+    type_match = re.search(r"""\btype\s*=\s*["']?([^"'\s>]+)""", open_tag, re.I)
+    script_type = type_match.group(1).lower() if type_match else "text/javascript"
+    if script_type.endswith("json"):
+        try:
+            return json.dumps(json.loads(body), separators=(",", ":"), ensure_ascii=False)
+        except ValueError:
+            return body.strip()
+    if script_type in ("text/javascript", "module", "application/javascript"):
+        return minify_js(body)
+    return body
+
+
+def _html_tag_name(chunk: str) -> str:
+    if chunk.lower().startswith("<!doctype"):
+        return "!doctype"
+    match = _HTML_TAG_NAME_RE.match(chunk)
+    return match.group(1).lower() if match else ""
+
+
+def minify_html(source: str) -> str:
+    """Minifies markup plus inline <script>/<style>; <pre>/<textarea> bodies are preserved."""
+    chunks = []  # (kind, text, tag_name)
+    for m in _HTML_CHUNK_RE.finditer(source):
+        comment, raw_open, raw_name, raw_body, raw_close, tag, text = m.groups()
+        if comment is not None:
+            if comment.startswith("<!--[if"):
+                chunks.append(("tag", comment, ""))
+            continue
+        if raw_open is not None:
+            name = raw_name.lower()
+            open_tag = re.sub(r"\s+", " ", raw_open)
+            if name == "script":
+                body = _minify_inline_script(raw_open, raw_body)
+            elif name == "style":
+                body = minify_css(raw_body)
+            else:
+                body = raw_body
+            chunks.append(("tag", open_tag + body + raw_close, name))
+        elif tag is not None:
+            chunks.append(("tag", re.sub(r"\s+", " ", tag), _html_tag_name(tag)))
+        else:
+            chunks.append(("text", text, ""))
+
+    out = []
+    for idx, (kind, text, name) in enumerate(chunks):
+        if kind == "text":
+            collapsed = re.sub(r"\s+", " ", text)
+            if collapsed == " ":
+                prev_name = chunks[idx - 1][2] if idx > 0 else "html"
+                next_name = chunks[idx + 1][2] if idx + 1 < len(chunks) else "html"
+                if prev_name in _HTML_BLOCK_TAGS or next_name in _HTML_BLOCK_TAGS:
+                    continue
+            out.append(collapsed)
+        else:
+            out.append(text)
+    return "".join(out).strip()
+
+
+def _minify_text(rel: str, text: str) -> str:
+    if ".min." in posixpath.basename(rel):
+        return text  # already minified upstream (e.g. self-hosted vendor scripts)
+    if rel.endswith(".html"):
+        return minify_html(text)
+    if rel.endswith(".css"):
+        return minify_css(text)
+    if rel.endswith(".js"):
+        return minify_js(text)
+    if rel.endswith((".json", ".webmanifest")):
+        try:
+            return json.dumps(json.loads(text), separators=(",", ":"), ensure_ascii=False)
+        except ValueError:
+            return text
+    return text
+
+
+def _load_brotli():
+    """Returns the optional `brotli` module, or None when it is not installed."""
+    try:
+        return importlib.import_module("brotli")
+    except ImportError:
+        return None
+
+
+def _compress_variants(data: bytes, brotli_module) -> dict:
+    """{".gz": bytes, ".br": bytes} for each encoding that actually makes `data` smaller."""
+    import gzip
+    variants = {}
+    if len(data) < MIN_COMPRESS_BYTES:
+        return variants
+    gz_data = gzip.compress(data, compresslevel=9, mtime=0)
+    if len(gz_data) < len(data):
+        variants[".gz"] = gz_data
+    if brotli_module is not None:
+        br_data = brotli_module.compress(data, quality=11)
+        if len(br_data) < len(data):
+            variants[".br"] = br_data
+    return variants
+
+
+def _precompress(out_path: str, data: bytes, brotli_module) -> tuple:
+    """Writes .gz (and .br when available) siblings; returns their sizes (0 = not written)."""
+    for suffix in (".gz", ".br"):
+        if os.path.exists(out_path + suffix):
+            os.remove(out_path + suffix)
+    variants = _compress_variants(data, brotli_module)
+    for suffix, payload in variants.items():
+        with open(out_path + suffix, "wb") as f:
+            f.write(payload)
+    return len(variants.get(".gz", b"")), len(variants.get(".br", b""))
+
+
+def _load_json_cache(path: str, version: int, default: dict) -> dict:
+    """Loads a manager/.cache/ JSON file, falling back to `default` when missing or outdated."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("version") == version:
+            return cache
+    except (OSError, ValueError):
+        pass
+    return dict(default, version=version)
+
+
+def _save_json_cache(path: str, cache: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with trace_span("fs", f"cache {os.path.basename(path)}"), open(tmp_path, "w", encoding="utf-8") as f:
+        # json.dumps runs the C encoder; json.dump to a file falls back to the pure-Python one
+        f.write(json.dumps(cache, separators=(",", ":")))
+    os.replace(tmp_path, path)
+
+
+# --- Build graph (what every stage read and wrote, in SQLite) ---
+
+BUILD_GRAPH_FILE = os.path.join(CACHE_DIR, "graph.sqlite")
+BUILD_GRAPH_VERSION = 1
+# Bundle, search index, purge and images only read sources, so the build runs them side by side
+BUILD_STAGE_WORKERS = 4
+_MANAGER_SOURCE = os.path.abspath(__file__)
+
+
+def _graph_rel(abs_path: str) -> str:
+    return os.path.relpath(abs_path, ROOT_DIR).replace(os.sep, "/")
+
+
+def _file_digest(abs_path: str) -> str:
+    import hashlib
+    digest = hashlib.sha256()
+    with open(abs_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class BuildGraph:
+    """Records, per node ("build", "purge", ...), the settings key, the input and output files and the result."""
+
+    def __init__(self, path: str = BUILD_GRAPH_FILE):
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._db is not None:
+            return self._db
+        import sqlite3
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        for attempt in range(2):
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            try:
+                if db.execute("PRAGMA user_version").fetchone()[0] != BUILD_GRAPH_VERSION:
+                    db.executescript(
+                        "DROP TABLE IF EXISTS nodes; DROP TABLE IF EXISTS files;"
+                        "CREATE TABLE nodes (name TEXT PRIMARY KEY, key TEXT NOT NULL, result TEXT NOT NULL);"
+                        "CREATE TABLE files (node TEXT NOT NULL, path TEXT NOT NULL, output INTEGER NOT NULL,"
+                        " mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL, digest TEXT NOT NULL,"
+                        " PRIMARY KEY (node, path)) WITHOUT ROWID;"
+                        f"PRAGMA user_version = {BUILD_GRAPH_VERSION};"
+                    )
+                break
+            except sqlite3.DatabaseError:
+                db.close()
+                if attempt:
+                    raise
+                os.remove(self.path)  # not a database (or a damaged one); it is only a cache
+        self._db = db
+        return db
+
+    @staticmethod
+    def stamp(inputs: dict) -> dict:
+        """{rel: (abs_path, mtime_ns, size)} for {rel: abs_path}; take it before the node runs."""
+        stamps = {}
+        for rel, abs_path in [*inputs.items(), (_graph_rel(_MANAGER_SOURCE), _MANAGER_SOURCE)]:
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                continue
+            stamps[rel] = (abs_path, st.st_mtime_ns, st.st_size)
+        return stamps
+
+    def lookup(self, node: str, key, stamps: dict):
+        """Returns the recorded result when nothing `node` depends on changed, otherwise None."""
+        key_text = json.dumps(key, sort_keys=True, default=str)
+        with self._lock:
+            db = self._connect()
+            row = db.execute("SELECT key, result FROM nodes WHERE name = ?", (node,)).fetchone()
+            if row is None or row[0] != key_text:
+                return None
+            files = db.execute("SELECT path, output, mtime_ns, size, digest FROM files WHERE node = ?", (node,)).fetchall()
+        recorded = {}
+        for path, output, mtime_ns, size, digest in files:
+            if not output:
+                recorded[path] = (mtime_ns, size, digest)
+                continue
+            try:
+                st = os.stat(os.path.join(ROOT_DIR, path))
+            except OSError:
+                return None
+            if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+                return None
+        if recorded.keys() != stamps.keys():
+            return None
+        touched = []
+        for path, (mtime_ns, size, digest) in recorded.items():
+            abs_path, current_mtime, current_size = stamps[path]
+            if (current_mtime, current_size) == (mtime_ns, size):
+                continue
+            if current_size != size or not digest or _file_digest(abs_path) != digest:
+                return None
+            touched.append((current_mtime, node, path))
+        if touched:
+            with self._lock:
+                self._db.executemany("UPDATE files SET mtime_ns = ? WHERE node = ? AND path = ?", touched)
+        return json.loads(row[1])
+
+    def record(self, node: str, key, stamps: dict, outputs, result: dict):
+        """Stores a finished node; `stamps` must come from before it ran and `outputs` are absolute paths."""
+        with self._lock:
+            db = self._connect()
+            previous = {
+                path: (mtime_ns, size, digest)
+                for path, mtime_ns, size, digest in db.execute(
+                    "SELECT path, mtime_ns, size, digest FROM files WHERE node = ? AND output = 0", (node,)
+                )
+            }
+        rows = []
+        for path, (abs_path, mtime_ns, size) in stamps.items():
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                continue  # deleted while the node ran, so the input set will not match next time
+            if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+                digest = ""  # edited while the node ran: never treat this run as fresh
+            elif previous.get(path, (None, None, ""))[:2] == (mtime_ns, size) and previous[path][2]:
+                digest = previous[path][2]
+            else:
+                digest = _file_digest(abs_path)
+            rows.append((node, path, 0, mtime_ns, size, digest))
+        for abs_path in outputs:
+            try:
+                st = os.stat(abs_path)
+            except OSError:
+                continue
+            rows.append((node, _graph_rel(abs_path), 1, st.st_mtime_ns, st.st_size, ""))
+        with self._lock:
+            db.execute("BEGIN")
+            try:
+                db.execute("DELETE FROM files WHERE node = ?", (node,))
+                db.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+                db.execute(
+                    "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?)",
+                    (node, json.dumps(key, sort_keys=True, default=str), json.dumps(result, default=str)),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+
+_build_graph = None
+
+
+def get_build_graph() -> BuildGraph:
+    """Returns the process-wide BuildGraph, creating it on first use."""
+    global _build_graph
+    if _build_graph is None:
+        _build_graph = BuildGraph()
+    return _build_graph
+
+
+def _traced_stage(name: str, func, *args):
+    with trace_span("stage", name):
+        return func(*args)
+
+
+def build_production_bundle(verbose: bool = True) -> dict:
+    """Builds dist/: minified + content-hashed assets with .gz/.br siblings; returns build statistics."""
+    import hashlib
+    import importlib.util
+    import shutil
+    started = time.perf_counter()
+    pipeline = {
+        "brotli": importlib.util.find_spec("brotli") is not None, "purge": PURGE_CSS_IN_BUILD,
+        "critical": CRITICAL_CSS_IN_BUILD, "bundle": BUNDLE_JS_IN_BUILD, "search": SEARCH_INDEX_IN_BUILD,
+    }
+    sources = dict(_iter_site_files())
+    graph = get_build_graph()
+    graph_key = dict(pipeline, version=BUILD_CACHE_VERSION, images=IMAGES_IN_BUILD and importlib.util.find_spec("PIL") is not None)
+    graph_inputs = dict(sources)
+    if os.path.exists(PURGECSS_CONFIG_PATH):
+        graph_inputs[_graph_rel(PURGECSS_CONFIG_PATH)] = PURGECSS_CONFIG_PATH
+    stamps = graph.stamp(graph_inputs)
+    previous = graph.lookup("build", graph_key, stamps)
+    if previous is not None:
+        stats = dict(
+            previous, rebuilt=0, skipped=previous["rebuilt"] + previous["skipped"], removed=0, cached=True,
+            elapsed_ms=(time.perf_counter() - started) * 1000,
+        )
+        if verbose:
+            _print_build_report(stats)
+        return stats
+
+    brotli_module = _load_brotli()
+    cache = _load_json_cache(BUILD_CACHE_FILE, BUILD_CACHE_VERSION, {"pipeline": None, "files": {}})
+    if cache.get("pipeline") != pipeline:
+        cache["files"] = {}  # enabled stages changed, regenerate every output
+    cache["pipeline"] = pipeline
+    old_entries = cache["files"]
+    new_entries = {}
+    # The stages feeding the build only read sources, so they run side by side
+    use_purge = PURGE_CSS_IN_BUILD and os.path.exists(PURGECSS_CONFIG_PATH)
+    use_images = IMAGES_IN_BUILD and _load_pillow() is not None
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=BUILD_STAGE_WORKERS) as pool:
+        bundle_job = None
+        if BUNDLE_JS_IN_BUILD and JS_ENTRY in sources:
+            bundle_job = pool.submit(_traced_stage, "bundle", bundle_js_modules, dict(sources))
+        search_job = pool.submit(_traced_stage, "search-index", build_search_index, dict(sources), False) if SEARCH_INDEX_IN_BUILD else None
+        purge_job = pool.submit(_traced_stage, "purge", purge_unused_css, True, False) if use_purge else None
+        images_job = pool.submit(_traced_stage, "images", optimize_images, False) if use_images else None
+    bundle = None
+    if bundle_job:
+        try:
+            bundle = bundle_job.result()
+        except ValueError as e:
+            console.print(f"[yellow]JS bundling skipped, shipping the modules unbundled:[/yellow] {e}")
+        else:
+            # The bundled entry and its chunks are built like any other source file
+            sources[JS_ENTRY] = bundle["entry_path"]
+            sources.update(bundle["chunks"])
+    if search_job:
+        sources[SEARCH_INDEX_REL] = search_job.result()["path"]
+    text_cache = {}
+
+    def read_text(rel):
+        if rel not in text_cache:
+            with open(sources[rel], "r", encoding="utf-8") as f:
+                text_cache[rel] = f.read()
+        return text_cache[rel]
+
+    precache_files = _select_precache_files(sources) if SW_FILE in sources else []
+    if bundle and precache_files:
+        precache_files = sorted((set(precache_files) - set(bundle["bundled"])) | {JS_ENTRY} | set(bundle["chunks"]))
+
+    # Bundled modules ship inside the entry and its chunks; one stays in dist/ only while a file outside
+    # the bundle still loads it. Their modulepreload hints and sw.js precache entries are dropped on render.
+    if bundle:
+        bundled_sources = set(bundle["bundled"]) - {JS_ENTRY}
+        skip = bundled_sources | {JS_ENTRY, SW_FILE} | set(bundle["chunks"])
+        for rel in sorted(sources):
+            if rel.endswith((".html", ".js", ".mjs")) and rel not in skip:
+                text = read_text(rel)
+                if rel.endswith(".html"):
+                    text = _drop_bundled_module_hints(rel, text, bundled_sources)
+                bundled_sources -= set(_find_asset_refs(rel, text, bundled_sources))
+        for rel in bundled_sources:
+            del sources[rel]
+    assets = {rel for rel in sources if _is_hashed_asset(rel)}
+
+    # 1. Stat every source; only re-read/re-hash the ones whose stat changed
+    for rel, abs_path in sources.items():
+        st = os.stat(abs_path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        old = old_entries.get(rel)
+        # References are re-scanned once one of them no longer ships (e.g. a module that is now bundled)
+        if old and old.get("stat") == stamp and assets.issuperset(old.get("refs", [])):
+            new_entries[rel] = dict(old)
+            continue
+        with open(abs_path, "rb") as f:
+            raw = f.read()
+        entry = {"stat": stamp, "digest": hashlib.sha256(raw).hexdigest()}
+        if rel.endswith(COMPRESSIBLE_EXTS):
+            text_cache[rel] = raw.decode("utf-8")
+            entry["refs"] = _find_asset_refs(rel, text_cache[rel], assets)
+        new_entries[rel] = entry
+
+    stats = {
+        "rebuilt": 0, "skipped": 0, "source_bytes": 0, "output_bytes": 0,
+        "gzip_bytes": 0, "brotli_bytes": 0, "binary_bytes": 0,
+    }
+    output_names = {}
+    visiting = set()
+    purged_css = purge_job.result() if purge_job else {}
+    critical_pages = set(_critical_css_pages(sources)) if CRITICAL_CSS_IN_BUILD else set()
+    images = images_job.result() if images_job else {}
+    images_signature = _images_signature(images) if images else ""
+
+    def css_source(rel):
+        return purged_css.get(rel) or read_text(rel)
+
+    def render(rel):
+        """Renders one source into dist/, recursing into the assets it references first."""
+        if rel in output_names:
+            return output_names[rel]
+        if rel in visiting:
+            raise RuntimeError(f"Circular asset reference involving {rel}")
+        visiting.add(rel)
+        entry = new_entries[rel]
+        refs = entry.get("refs", [])
+        for ref in refs:
+            render(ref)
+        key_src = entry["digest"] + "".join(f"|{ref}>{output_names[ref]}" for ref in refs)
+        if rel in purged_css:
+            key_src += "|purged:" + hashlib.sha256(purged_css[rel].encode("utf-8")).hexdigest()
+        if rel.endswith(".html"):
+            key_src += "|images:" + images_signature
+            if bundle:
+                key_src += "|bundled:" + ",".join(bundle["bundled"])
+        precache_block = None
+        if rel == SW_FILE:
+            for other in precache_files:
+                render(other)
+            # Hashed URLs are their own revision; other files are revisioned by their build key
+            precache_block = _render_precache_block({
+                other: (output_names[other], None if other in assets else new_entries[other]["key"][:10])
+                for other in precache_files
+            })
+            key_src += precache_block
+        key = hashlib.sha256(key_src.encode("utf-8")).hexdigest()
+        old = old_entries.get(rel)
+        out_rel = old.get("output") if old else None
+        out_path = os.path.join(DIST_DIR, out_rel) if out_rel else ""
+        # An output deleted or edited in dist/ is rewritten even though its sources are unchanged
+        if old and old.get("key") == key and os.path.isfile(out_path) and os.path.getsize(out_path) == old["sizes"][0]:
+            for field in ("output", "sizes", "critical"):
+                if field in old:
+                    entry[field] = old[field]
+            stats["skipped"] += 1
+        else:
+            if rel.endswith(COMPRESSIBLE_EXTS):
+                text = purged_css.get(rel) or read_text(rel)
+                if bundle and rel.endswith(".html"):
+                    text = _drop_bundled_module_hints(rel, text, set(bundle["bundled"]))
+                if rel in critical_pages:
+                    text, entry["critical"] = extract_critical_css(rel, text, css_source)
+                if images and rel.endswith(".html"):
+                    text = rewrite_img_tags(rel, text, images)
+                if refs:
+                    text = _rewrite_asset_refs(rel, text, assets, output_names)
+                if precache_block:
+                    text = _inject_precache_block(text, precache_block)
+                data = _minify_text(rel, text).encode("utf-8")
+            else:
+                data = None
+            out_rel = _hashed_name(rel, data) if rel in assets else rel
+            out_path = os.path.join(DIST_DIR, out_rel)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            if data is None:
+                shutil.copy2(sources[rel], out_path)
+                sizes = [entry["stat"][1], 0, 0]
+            else:
+                with open(out_path, "wb") as f:
+                    f.write(data)
+                sizes = [len(data), *_precompress(out_path, data, brotli_module)]
+            entry["output"] = out_rel
+            entry["sizes"] = sizes
+            stats["rebuilt"] += 1
+        entry["key"] = key
+        visiting.discard(rel)
+        output_names[rel] = entry["output"]
+        out_size, gz_size, br_size = entry["sizes"]
+        if rel.endswith(COMPRESSIBLE_EXTS):
+            stats["source_bytes"] += entry["stat"][1]
+            stats["output_bytes"] += out_size
+            stats["gzip_bytes"] += gz_size or out_size
+            stats["brotli_bytes"] += br_size
+        else:
+            stats["binary_bytes"] += out_size
+        return entry["output"]
+
+    for rel in sources:
+        render(rel)
+
+    # 2. Responsive image variants are content-addressed, so an existing file is always current
+    expected = set()
+    stats["image_variants"] = stats["image_variant_bytes"] = 0
+    for rel, entry in images.items():
+        for fmt, items in _useful_variants(entry).items():
+            for width, size in items:
+                out_rel = _image_variant_path(rel, entry, width, fmt)
+                out_path = os.path.join(DIST_DIR, out_rel)
+                if not os.path.exists(out_path):
+                    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                    shutil.copy2(os.path.join(IMAGE_STORE_DIR, entry["sha"], f"{width}.{fmt}"), out_path)
+                expected.add(out_rel)
+                stats["image_variants"] += 1
+                stats["image_variant_bytes"] += size
+
+    # 3. Drop outputs left behind by renamed/deleted sources (e.g. stale hashed names)
+    for entry in new_entries.values():
+        expected.add(entry["output"])
+        expected.update(entry["output"] + suffix for suffix, size in zip((".gz", ".br"), entry["sizes"][1:]) if size)
+    removed = 0
+    for dirpath, _, filenames in os.walk(DIST_DIR, topdown=False):
+        for name in filenames:
+            out_rel = os.path.relpath(os.path.join(dirpath, name), DIST_DIR).replace(os.sep, "/")
+            if out_rel not in expected:
+                os.remove(os.path.join(dirpath, name))
+                removed += 1
+        if dirpath != DIST_DIR and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
+    cache["files"] = new_entries
+    _save_json_cache(BUILD_CACHE_FILE, cache)
+    stats["removed"] = removed
+    stats["brotli"] = brotli_module is not None
+    if not any(entry["sizes"][2] for entry in new_entries.values()):
+        stats["brotli_bytes"] = None  # no .br siblings in dist/, so there is no brotli transfer size to report
+    stats["pillow"] = not IMAGES_IN_BUILD or _load_pillow() is not None
+    stats["elapsed_ms"] = (time.perf_counter() - started) * 1000
+
+    stats["critical"] = [new_entries[rel]["critical"] for rel in sorted(critical_pages) if "critical" in new_entries[rel]]
+    stats["bundle"] = bundle
+    stats["cached"] = False
+    graph.record("build", graph_key, stamps, [os.path.join(DIST_DIR, rel) for rel in expected], stats)
+    if verbose:
+        _print_build_report(stats)
+    return stats
+
+
+def _print_build_report(stats: dict):
+    table = Table(title="[bold cyan]Production Bundle (dist/)[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Metric", style="bold cyan")
+    table.add_column("Value", justify="right")
+    table.add_row("HTML/CSS/JS source", f"{stats['source_bytes'] / 1024:,.1f} KB")
+    table.add_row("HTML/CSS/JS minified", f"{stats['output_bytes'] / 1024:,.1f} KB")
+    table.add_row("Transfer size (gzip)", f"{stats['gzip_bytes'] / 1024:,.1f} KB")
+    if stats["brotli_bytes"] is not None:
+        table.add_row("Brotli siblings (.br)", f"{stats['brotli_bytes'] / 1024:,.1f} KB")
+    table.add_row("Images/docs (copied as-is)", f"{stats['binary_bytes'] / 1024:,.1f} KB")
+    if stats["image_variants"]:
+        table.add_row("Responsive image variants", f"{stats['image_variants']} ({stats['image_variant_bytes'] / 1024:,.1f} KB)")
+    table.add_row("Files rebuilt / unchanged", f"{stats['rebuilt']} / {stats['skipped']}")
+    table.add_row("Stale outputs removed", str(stats["removed"]))
+    table.add_row("Build time", f"{stats['elapsed_ms']:,.0f} ms" + (" (up to date)" if stats.get("cached") else ""))
+    console.print(table)
+    if stats.get("critical"):
+        _print_critical_report(stats["critical"])
+    if stats.get("bundle"):
+        _print_bundle_report(stats["bundle"])
+    if not stats["brotli"]:
+        console.print("[dim yellow]Notice: 'brotli' is not installed, so only .gz siblings were written (pip install brotli).[/dim yellow]")
+    if not stats["pillow"]:
+        console.print("[dim yellow]Notice: 'Pillow' is not installed, so responsive image variants were skipped (pip install pillow).[/dim yellow]")
+    console.print(f"[bold green]✔ Production bundle ready in[/bold green] [bold underline]{DIST_DIR}[/bold underline]")
+
+
+def run_build():
+    """Menu/CLI wrapper around build_production_bundle that reports failures."""
+    try:
+        build_production_bundle()
+        return True
+    except Exception as e:
+        console.print(f"[bold red]Build failed:[/bold red] {e}")
+        return False
+
+# --- Service worker precache manifest ---
+
+SW_FILE = "sw.js"
+SW_PATH = os.path.join(ROOT_DIR, SW_FILE)
+# Awaited during install; every other precached file is fetched in the background on activate
+PRECACHE_CORE = [
+    "index.html",
+    "assets/css/preloader.css",
+    "assets/css/core.css",
+    "assets/js/main.js",
+    "assets/js/modules/preloader.js",
+    "assets/js/modules/utils.js",
+    "assets/js/modules/theme.js",
+]
+PRECACHE_PATTERNS = [
+    "*.html",
+    "pages/*.html",
+    "assets/css/*.css",
+    "assets/js/*.js",
+    "assets/js/modules/*.js",
+    "assets/icons/*",
+    "assets/images/*",
+]
+_PRECACHE_BLOCK_RE = _LazyPattern(r"(// <precache-manifest>[^\n]*\n).*?(?=// </precache-manifest>)", re.S)
+
+
+def _matches_site_pattern(rel: str, pattern: str) -> bool:
+    """Glob match where `*` never crosses a directory boundary."""
+    import fnmatch
+    return posixpath.dirname(rel) == posixpath.dirname(pattern) and fnmatch.fnmatch(posixpath.basename(rel), posixpath.basename(pattern))
+
+
+def _select_precache_files(site_files) -> list:
+    """Returns the site files to precache; fails when a core entry has no matching file."""
+    missing = [rel for rel in PRECACHE_CORE if rel not in site_files]
+    if missing:
+        raise FileNotFoundError(f"Precache manifest entries without a matching file: {', '.join(missing)}")
+    return sorted(
+        rel for rel in site_files
+        if rel != SW_FILE and (rel in PRECACHE_CORE or any(_matches_site_pattern(rel, p) for p in PRECACHE_PATTERNS))
+    )
+
+
+def _js_string(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+
+def _render_precache_block(revisions: dict) -> str:
+    """Renders the PRECACHE_MANIFEST declaration from {rel: (url_path, revision or None)}."""
+    entries = []
+    for rel, (url_path, revision) in revisions.items():
+        entries.append((rel not in PRECACHE_CORE, f"./{url_path}", revision, rel in PRECACHE_CORE))
+        if rel == "index.html":
+            entries.append((False, "./", revision, True))
+    entries.sort()
+    lines = ["const PRECACHE_MANIFEST = ["]
+    for _, url, revision, core in entries:
+        rev = _js_string(revision) if revision else "null"
+        lines.append(f"    {{ url: {_js_string(url)}, revision: {rev}, core: {'true' if core else 'false'} }},")
+    lines.append("];")
+    return "\n".join(lines) + "\n"
+
+
+def _inject_precache_block(sw_source: str, block: str) -> str:
+    if not _PRECACHE_BLOCK_RE.search(sw_source):
+        raise ValueError(f"{SW_FILE} has no '// <precache-manifest>' block to update")
+    return _PRECACHE_BLOCK_RE.sub(lambda m: m.group(1) + block, sw_source, count=1)
+
+
+def _precache_revisions(site_files: dict, overrides: dict = None) -> tuple:
+    """Returns ({rel: (rel, revision)}, total_bytes); `overrides` supplies {rel: bytes} not yet on disk."""
+    import hashlib
+    overrides = overrides or {}
+    revisions = {}
+    total_bytes = 0
+    for rel in _select_precache_files(site_files):
+        data = overrides.get(rel)
+        if data is None:
+            with open(site_files[rel], "rb") as f:
+                data = f.read()
+        total_bytes += len(data)
+        revisions[rel] = (rel, hashlib.sha256(data).hexdigest()[:10])
+    return revisions, total_bytes
+
+
+def generate_precache_manifest(verbose: bool = True) -> int:
+    """Hashes every precached file into the sw.js manifest block; returns the number of entries."""
+    revisions, total_bytes = _precache_revisions(dict(_iter_site_files()))
+
+    with open(SW_PATH, "r", encoding="utf-8") as f:
+        sw_source = f.read()
+    updated = _inject_precache_block(sw_source, _render_precache_block(revisions))
+    changed = updated != sw_source
+    if changed:
+        tmp_path = SW_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(updated)
+        os.replace(tmp_path, SW_PATH)
+
+    if verbose:
+        core_count = sum(1 for rel in revisions if rel in PRECACHE_CORE)
+        console.print(Panel(
+            f"[bold green]✔ Precache manifest {'updated' if changed else 'already up to date'}[/bold green]\n\n"
+            f"Entries: [bold white]{len(revisions)}[/bold white] "
+            f"([cyan]{core_count} core[/cyan], [dim]{len(revisions) - core_count} background[/dim])\n"
+            f"Precache size: [bold white]{total_bytes / 1024:,.1f} KB[/bold white]",
+            title="[bold cyan]Service Worker Precache[/bold cyan]",
+            border_style="cyan"
+        ))
+    return len(revisions)
+
+
+def run_precache():
+    """Menu/CLI wrapper around generate_precache_manifest that reports failures."""
+    try:
+        generate_precache_manifest()
+        return True
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Precache manifest generation failed:[/bold red] {e}")
+        return False
+
+# --- Document publishing (linearized, content-addressed PDFs with first-page previews) ---
+
+DOCS_DIR = "assets/docs"
+RESUME_DOC_NAME = "kumar-sreyan-pattanayak-resume"
+# Keep in sync with the preview lookup in pages/pdf-viewer.html
+DOC_PREVIEW_WIDTH = 640
+DOC_PREVIEW_QUALITY = 80
+# Files whose links to a published document are rewritten (the search index re-crawls assets/docs itself)
+DOC_REFERENCE_PATTERNS = ["*.html", "pages/*.html", "assets/js/*.js", "assets/js/modules/*.js", SW_FILE]
+
+_HASHED_SUFFIX_RE = _LazyPattern(r"\.[0-9a-f]{10}$")
+
+
+def _doc_name(source_path: str) -> str:
+    """URL-safe document name from a file name, without any earlier content hash."""
+    stem = _HASHED_SUFFIX_RE.sub("", os.path.splitext(os.path.basename(source_path))[0])
+    return re.sub(r"[^\w.-]+", "-", stem).strip("-").lower() or "document"
+
+
+def _doc_ref_re(name: str):
+    """Matches `assets/docs/<name>.pdf` as well as any earlier `assets/docs/<name>.<sha10>.pdf`."""
+    return re.compile(re.escape(f"{DOCS_DIR}/{name}") + r"(?:\.[0-9a-f]{10})?\.pdf\b")
+
+
+def _is_linearized(data: bytes) -> bool:
+    """A linearized ("fast web view") PDF opens with its linearization dictionary."""
+    return b"/Linearized" in data[:1024]
+
+
+def _load_pikepdf():
+    """Returns the optional `pikepdf` module, or None when it is not installed."""
+    try:
+        return importlib.import_module("pikepdf")
+    except ImportError:
+        return None
+
+
+def _load_pymupdf():
+    """Returns the optional PyMuPDF module (`pymupdf`, formerly `fitz`), or None when it is not installed."""
+    for name in ("pymupdf", "fitz"):
+        try:
+            return importlib.import_module(name)
+        except ImportError:
+            continue
+    return None
+
+
+def optimize_pdf(data: bytes) -> tuple:
+    """Linearizes and recompresses a PDF; returns (bytes, method), keeping the input when no tool improves it."""
+    import shutil
+    import subprocess
+    import tempfile
+    pikepdf = _load_pikepdf()
+    if pikepdf is not None:
+        out = io.BytesIO()
+        with pikepdf.open(io.BytesIO(data)) as pdf:
+            pdf.save(out, linearize=True, compress_streams=True, recompress_flate=True,
+                     object_stream_mode=pikepdf.ObjectStreamMode.generate)
+        return out.getvalue(), "pikepdf linearization"
+    if shutil.which("qpdf"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            src, dst = os.path.join(tmp_dir, "in.pdf"), os.path.join(tmp_dir, "out.pdf")
+            with open(src, "wb") as f:
+                f.write(data)
+            result = subprocess.run(
+                ["qpdf", "--linearize", "--object-streams=generate", "--compress-streams=y",
+                 "--recompress-flate", "--compression-level=9", src, dst],
+                capture_output=True, text=True,
+            )
+            if result.returncode in (0, 3):  # 3 = succeeded with warnings
+                with open(dst, "rb") as f:
+                    return f.read(), "qpdf linearization"
+            console.print(f"[yellow]qpdf could not optimize the PDF:[/yellow] {result.stderr.strip()}")
+    pypdf_module = _load_pypdf()
+    if pypdf_module is not None and not _is_linearized(data):
+        out = io.BytesIO()
+        try:
+            writer = pypdf_module.PdfWriter(clone_from=pypdf_module.PdfReader(io.BytesIO(data)))
+            for page in writer.pages:
+                page.compress_content_streams(level=9)
+            writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+            writer.write(out)
+        except (ValueError, pypdf_module.errors.PyPdfError) as e:
+            console.print(f"[yellow]pypdf could not recompress the PDF:[/yellow] {e}")
+        if 0 < out.tell() < len(data):
+            return out.getvalue(), "pypdf recompression"
+    return data, "already linearized" if _is_linearized(data) else "unchanged"
+
+
+def render_pdf_preview(data: bytes, width: int = DOC_PREVIEW_WIDTH):
+    """Renders page 1 as WebP bytes with PyMuPDF or poppler's pdftoppm; None without a renderer or Pillow."""
+    import shutil
+    import subprocess
+    import tempfile
+    pil_image = _load_pillow()
+    if pil_image is None:
+        return None
+    png = None
+    pymupdf = _load_pymupdf()
+    if pymupdf is not None:
+        with pymupdf.open(stream=data, filetype="pdf") as doc:
+            page = doc[0]
+            zoom = width / page.rect.width
+            png = page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom), alpha=False).tobytes("png")
+    elif shutil.which("pdftoppm"):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            src = os.path.join(tmp_dir, "in.pdf")
+            with open(src, "wb") as f:
+                f.write(data)
+            result = subprocess.run(
+                ["pdftoppm", "-png", "-singlefile", "-f", "1", "-l", "1",
+                 "-scale-to-x", str(width), "-scale-to-y", "-1", src, os.path.join(tmp_dir, "preview")],
+                capture_output=True,
+            )
+            if result.returncode == 0:
+                with open(os.path.join(tmp_dir, "preview.png"), "rb") as f:
+                    png = f.read()
+    if png is None:
+        return None
+    out = io.BytesIO()
+    with pil_image.open(io.BytesIO(png)) as image:
+        image.convert("RGB").save(out, format="WEBP", quality=DOC_PREVIEW_QUALITY)
+    return out.getvalue()
+
+
+def publish_document(source_path: str, name: str = None) -> dict:
+    """Publishes a PDF as assets/docs/<name>.<sha10>.pdf with a first-page preview and points every link at it."""
+    import hashlib
+    name = name or _doc_name(source_path)
+    with open(source_path, "rb") as f:
+        source = f.read()
+    if not source.startswith(b"%PDF-"):
+        raise ValueError(f"{source_path} is not a PDF file")
+    data, method = optimize_pdf(source)
+    sha = hashlib.sha256(data).hexdigest()[:10]
+    published_rel = f"{DOCS_DIR}/{name}.{sha}.pdf"
+    updates = {os.path.join(ROOT_DIR, published_rel): data}
+    preview = render_pdf_preview(data)
+    preview_rel = f"{DOCS_DIR}/{name}.{sha}-{DOC_PREVIEW_WIDTH}.webp" if preview else None
+    if preview:
+        updates[os.path.join(ROOT_DIR, preview_rel)] = preview
+
+    site_files = dict(_iter_site_files())
+    ref_re = _doc_ref_re(name)
+    texts = {}
+    for rel in sorted(site_files):
+        if any(_matches_site_pattern(rel, p) for p in DOC_REFERENCE_PATTERNS):
+            text = _read_preserving_newlines(site_files[rel])
+            new_text = ref_re.sub(published_rel, text)
+            if new_text != text:
+                texts[rel] = new_text
+    rewritten = sorted(texts)
+    overrides = {rel: text.encode("utf-8") for rel, text in texts.items()}
+    revisions, _ = _precache_revisions(site_files, overrides)
+    sw_text = texts.get(SW_FILE) or _read_preserving_newlines(SW_PATH)
+    sw_updated = _inject_precache_block(sw_text, _render_precache_block(revisions))
+    if sw_updated != sw_text or SW_FILE in texts:
+        texts[SW_FILE] = sw_updated
+    for rel, text in texts.items():
+        updates[site_files[rel]] = text.encode("utf-8")
+
+    # Earlier copies of this document: the unhashed original and every older hash and preview
+    old_re = re.compile(re.escape(name) + r"(?:(?:\.[0-9a-f]{10})?\.pdf|\.[0-9a-f]{10}-\d+\.webp)$")
+    docs_dir = os.path.join(ROOT_DIR, DOCS_DIR)
+    os.makedirs(docs_dir, exist_ok=True)
+    removals = [
+        os.path.join(docs_dir, entry) for entry in sorted(os.listdir(docs_dir))
+        if old_re.match(entry) and os.path.join(docs_dir, entry) not in updates
+    ]
+    _atomic_write_all(updates, removals)
+    return {
+        "path": published_rel,
+        "preview": preview_rel,
+        "method": method,
+        "linearized": _is_linearized(data),
+        "source_bytes": len(source),
+        "bytes": len(data),
+        "rewritten": rewritten,
+        "removed": [posixpath.join(DOCS_DIR, os.path.basename(path)) for path in removals],
+    }
+
+
+def _print_publish_report(result: dict, source_path: str):
+    console.print(Panel(
+        f"[bold green]✔ Document published[/bold green]\n\n"
+        f"Source: [dim]{source_path}[/dim]\n"
+        f"Published as: [bold underline]{result['path']}[/bold underline]\n"
+        f"Size: [bold white]{result['source_bytes'] / 1024:,.1f} KB → {result['bytes'] / 1024:,.1f} KB[/bold white] "
+        f"[dim]({result['method']})[/dim]\n"
+        f"Preview: {result['preview'] or '[dim]none[/dim]'}\n"
+        f"Links rewritten in: {', '.join(result['rewritten']) or '[dim]no files[/dim]'}"
+        + (f"\nRemoved: [dim]{', '.join(result['removed'])}[/dim]" if result["removed"] else ""),
+        title="[bold cyan]Publish Document[/bold cyan]",
+        border_style="green"
+    ))
+    if not result["linearized"]:
+        console.print("[dim yellow]Notice: no linearizer found, so viewers must download the whole PDF before rendering (pip install pikepdf, or install qpdf).[/dim yellow]")
+    if not result["preview"]:
+        console.print("[dim yellow]Notice: no first-page preview was rendered (pip install pymupdf pillow, or install poppler-utils).[/dim yellow]")
+
+
+# --- Unused CSS elimination (native equivalent of purgecss.config.js) ---
+
+PURGECSS_CONFIG_PATH = os.path.join(ROOT_DIR, "purgecss.config.js")
+PURGE_CACHE_FILE = os.path.join(CACHE_DIR, "purge.json")
+PURGE_CACHE_VERSION = 1
+
+# At-rules whose bodies are rule lists and get purged recursively; others (@keyframes, @font-face) are kept whole
+_CSS_GROUPING_AT_RULES = {"media", "supports", "layer", "container", "document"}
+_CSS_STRUCTURE_RE = _LazyPattern(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|([{};])""")
+_CSS_COMMENT_RE = _LazyPattern(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')|/\*.*?\*/""", re.S)
+_CSS_IDENT_RE = _LazyPattern(r"-?(?:[A-Za-z_]|\\.|[^\x00-\x7f])(?:[\w-]|\\.|[^\x00-\x7f])*")
+_CONTENT_TOKEN_RE = _LazyPattern(r"[A-Za-z0-9_-]+")
+_JS_OBJECT_KEY_RE = _LazyPattern(r"""["']?([\w$-]+)["']?\s*:""")
+_JS_BARE_LITERAL_RE = _LazyPattern(r"[\w.$-]+")
+
+
+def _parse_js_literal(source: str, i: int = 0):
+    """Parses the JS object/array/string/regex literal of a PurgeCSS config at `i`; returns (value, end)."""
+    def skip_ws(pos):
+        while True:
+            while pos < len(source) and source[pos] in _JS_WHITESPACE:
+                pos += 1
+            if source.startswith("//", pos):
+                pos = source.find("\n", pos)
+                pos = len(source) if pos == -1 else pos
+            elif source.startswith("/*", pos):
+                end = source.find("*/", pos)
+                pos = len(source) if end == -1 else end + 2
+            else:
+                return pos
+
+    i = skip_ws(i)
+    ch = source[i]
+    if ch in "{[":
+        closing = "}" if ch == "{" else "]"
+        result = {} if ch == "{" else []
+        i += 1
+        while True:
+            i = skip_ws(i)
+            if source[i] == closing:
+                return result, i + 1
+            if ch == "{":
+                key_match = _JS_OBJECT_KEY_RE.match(source, i)
+                if not key_match:
+                    raise ValueError(f"Unsupported object key near: {source[i:i + 30]!r}")
+                value, i = _parse_js_literal(source, key_match.end())
+                result[key_match.group(1)] = value
+            else:
+                value, i = _parse_js_literal(source, i)
+                result.append(value)
+            i = skip_ws(i)
+            if source[i] == ",":
+                i += 1
+    if ch in "'\"`":
+        end = _skip_js_string(source, i)
+        return source[i + 1:end - 1], end
+    if ch == "/":
+        end = _skip_js_regex(source, i)
+        body, _, flags = source[i + 1:end].rpartition("/")
+        return re.compile(body, re.I if "i" in flags else 0), end
+    word = _JS_BARE_LITERAL_RE.match(source, i)
+    if not word:
+        raise ValueError(f"Unsupported JS literal near: {source[i:i + 30]!r}")
+    literals = {"true": True, "false": False, "null": None}
+    text = word.group(0)
+    if text in literals:
+        return literals[text], word.end()
+    return float(text) if "." in text else int(text), word.end()
+
+
+def load_purgecss_config(path: str = PURGECSS_CONFIG_PATH) -> dict:
+    """Reads purgecss.config.js (the same file the Node PurgeCSS CLI uses)."""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    start = source.find("{", source.find("module.exports"))
+    if start == -1:
+        raise ValueError(f"No `module.exports = {{...}}` object found in {path}")
+    config, _ = _parse_js_literal(source, start)
+    safelist = config.get("safelist", {})
+    if isinstance(safelist, list):
+        safelist = {"standard": safelist}
+    config["safelist"] = {kind: list(safelist.get(kind, [])) for kind in ("standard", "deep", "greedy")}
+    return config
+
+
+def _expand_config_globs(patterns) -> list:
+    """Resolves config globs (relative to the project root) to site-relative paths."""
+    import glob
+    found = set()
+    for pattern in patterns:
+        for path in glob.glob(os.path.join(ROOT_DIR, pattern), recursive=True):
+            if os.path.isfile(path):
+                found.add(os.path.relpath(path, ROOT_DIR).replace(os.sep, "/"))
+    return sorted(found)
+
+
+def _split_selector_list(prelude: str) -> list:
+    """Splits `a, b:is(c, d)` on top-level commas only."""
+    parts, depth, start = [], 0, 0
+    for idx, ch in enumerate(prelude):
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(prelude[start:idx].strip())
+            start = idx + 1
+    parts.append(prelude[start:].strip())
+    return [p for p in parts if p]
+
+
+def _selector_atoms(selector: str) -> list:
+    """Extracts the [kind, name] pairs (class, id, tag, attr) that must be used for a selector to match."""
+    atoms = []
+    i, n = 0, len(selector)
+    compound_start = True
+    while i < n:
+        ch = selector[i]
+        if ch in ".#":
+            match = _CSS_IDENT_RE.match(selector, i + 1)
+            if match:
+                atoms.append(["class" if ch == "." else "id", match.group(0).replace("\\", "")])
+                i = match.end()
+            else:
+                i += 1
+            compound_start = False
+        elif ch == "[":
+            end = selector.find("]", i)
+            end = n if end == -1 else end
+            match = _CSS_IDENT_RE.match(selector, i + 1)
+            if match:
+                atoms.append(["attr", match.group(0)])
+            i = end + 1
+            compound_start = False
+        elif ch == ":":
+            match = _CSS_IDENT_RE.match(selector, i + 2 if selector.startswith("::", i) else i + 1)
+            i = match.end() if match else i + 1
+            if i < n and selector[i] == "(":
+                depth = 0
+                while i < n:
+                    depth += {"(": 1, ")": -1}.get(selector[i], 0)
+                    i += 1
+                    if depth == 0:
+                        break
+            compound_start = False
+        elif ch in " \t\n>+~,":
+            compound_start = True
+            i += 1
+        elif compound_start and (ch.isalpha() or ch == "_" or ord(ch) > 127):
+            match = _CSS_IDENT_RE.match(selector, i)
+            atoms.append(["tag", match.group(0).lower()])
+            i = match.end()
+            compound_start = False
+        else:
+            compound_start = ch == "*" and compound_start
+            i += 1
+    return atoms
+
+
+def _parse_css_rules(css: str) -> list:
+    """Parses a stylesheet into ["rule", [[selector, atoms], ...], body], ["at", prelude, children] and ["raw", text] nodes."""
+    css = _CSS_COMMENT_RE.sub(lambda m: m.group(1) or "", css)
+    marks = [(m.start(2), m.group(2)) for m in _CSS_STRUCTURE_RE.finditer(css) if m.group(2)]
+
+    def parse(text_pos: int, mark_idx: int, depth: int):
+        nodes = []
+        while mark_idx < len(marks):
+            pos, ch = marks[mark_idx]
+            prelude = css[text_pos:pos].strip()
+            if ch == "}":
+                if depth:
+                    return nodes, pos + 1, mark_idx + 1
+                text_pos, mark_idx = pos + 1, mark_idx + 1  # stray closing brace
+                continue
+            if ch == ";":
+                if prelude:
+                    nodes.append(["raw", prelude + ";"])
+                text_pos, mark_idx = pos + 1, mark_idx + 1
+                continue
+            at_name = re.match(r"@([\w-]+)", prelude)
+            if at_name and at_name.group(1).lower() in _CSS_GROUPING_AT_RULES:
+                children, text_pos, mark_idx = parse(pos + 1, mark_idx + 1, depth + 1)
+                nodes.append(["at", prelude, children])
+                continue
+            # Leaf block: skip to the matching brace, keeping any nested blocks inside the body
+            level, end_idx = 0, mark_idx
+            while end_idx < len(marks):
+                level += {"{": 1, "}": -1}.get(marks[end_idx][1], 0)
+                if level == 0:
+                    break
+                end_idx += 1
+            end_pos = marks[end_idx][0] if end_idx < len(marks) else len(css)
+            body = css[pos + 1:end_pos]
+            if at_name:
+                nodes.append(["raw", f"{prelude} {{{body}}}"])
+            else:
+                nodes.append(["rule", [[s, _selector_atoms(s)] for s in _split_selector_list(prelude)], body])
+            text_pos, mark_idx = end_pos + 1, end_idx + 1
+        return nodes, len(css), mark_idx
+
+    return parse(0, 0, 0)[0]
+
+
+def _make_selector_filter(used_tokens: set, safelist: dict):
+    """Returns keep(selector, atoms) implementing PurgeCSS standard/deep/greedy safelist semantics."""
+    standard, deep, greedy = safelist["standard"], safelist["deep"], safelist["greedy"]
+    decisions = {}
+
+    def keep(selector, atoms):
+        if selector in decisions:
+            return decisions[selector]
+        if any(p.search(selector) for p in greedy):
+            result = True
+        elif any(p.search(name) for _, name in atoms for p in deep):
+            result = True
+        else:
+            result = all(name in used_tokens or any(p.search(name) for p in standard) for _, name in atoms)
+        decisions[selector] = result
+        return result
+
+    return keep
+
+
+def _emit_purged_css(nodes: list, keep, indent: str = "") -> str:
+    out = []
+    for node in nodes:
+        if node[0] == "raw":
+            out.append(indent + node[1])
+        elif node[0] == "at":
+            inner = _emit_purged_css(node[2], keep, indent + "  ")
+            if inner:
+                out.append(f"{indent}{node[1]} {{\n{inner}\n{indent}}}")
+        else:
+            kept = [selector for selector, atoms in node[1] if keep(selector, atoms)]
+            if kept:
+                out.append(f"{indent}{(',' + chr(10) + indent).join(kept)} {{{node[2]}}}")
+    return "\n".join(out)
+
+
+def purge_unused_css(write: bool = True, verbose: bool = True) -> dict:
+    """Removes rules whose selectors never match the configured content; returns {css_rel: purged_css}."""
+    import hashlib
+    started = time.perf_counter()
+    config = load_purgecss_config()
+    css_files = _expand_config_globs(config.get("css", []))
+    content_files = _expand_config_globs(config.get("content", []))
+    output_dir = os.path.join(ROOT_DIR, config.get("output", "assets/css/purged/"))
+    outputs = {rel: os.path.join(output_dir, os.path.basename(rel)) for rel in css_files}
+    if write:
+        graph = get_build_graph()
+        graph_key = {"version": PURGE_CACHE_VERSION, "output": _graph_rel(output_dir)}
+        stamps = graph.stamp({
+            rel: os.path.join(ROOT_DIR, rel) for rel in [_graph_rel(PURGECSS_CONFIG_PATH), *css_files, *content_files]
+        })
+        previous = graph.lookup("purge", graph_key, stamps)
+        if previous is not None:
+            results = {}
+            for rel, out_path in outputs.items():
+                with open(out_path, "r", encoding="utf-8", newline="") as f:
+                    results[rel] = f.read()
+            if verbose:
+                _print_purge_report(previous["report"], (time.perf_counter() - started) * 1000)
+            return results
+    cache = _load_json_cache(PURGE_CACHE_FILE, PURGE_CACHE_VERSION, {"css": {}, "content": {}})
+    dirty = False
+
+    def cached(section, rel, build):
+        nonlocal dirty
+        st = os.stat(os.path.join(ROOT_DIR, rel))
+        stamp = [st.st_mtime_ns, st.st_size]
+        entry = cache[section].get(rel)
+        if not entry or entry["stat"] != stamp:
+            with open(os.path.join(ROOT_DIR, rel), "r", encoding="utf-8") as f:
+                entry = {"stat": stamp, "data": build(f.read()), "size": stamp[1]}
+            cache[section][rel] = entry
+            dirty = True
+        return entry
+
+    used_tokens = set()
+    for rel in content_files:
+        used_tokens.update(cached("content", rel, lambda text: sorted(set(_CONTENT_TOKEN_RE.findall(text))))["data"])
+    keep = _make_selector_filter(used_tokens, config["safelist"])
+    # With unchanged rules and used tokens, a stylesheet's purged output (if untouched) is still current
+    signature = hashlib.sha256(json.dumps([sorted(used_tokens), config["safelist"]], default=str).encode("utf-8")).hexdigest()
+
+    results, report = {}, []
+    for rel in css_files:
+        entry = cached("css", rel, _parse_css_rules)
+        purged = None
+        if write and entry.get("output", [None])[0] == signature:
+            try:
+                st = os.stat(outputs[rel])
+                if [st.st_mtime_ns, st.st_size] == entry["output"][1:]:
+                    with open(outputs[rel], "r", encoding="utf-8", newline="") as f:
+                        purged = f.read()
+            except OSError:
+                pass
+        if purged is None:
+            purged = _emit_purged_css(entry["data"], keep) + "\n"
+        results[rel] = purged
+        report.append((rel, entry["size"], len(purged.encode("utf-8"))))
+
+    if write:
+        os.makedirs(output_dir, exist_ok=True)
+        for rel, purged in results.items():
+            out_path = outputs[rel]
+            if os.path.exists(out_path):
+                with open(out_path, "r", encoding="utf-8", newline="") as f:
+                    unchanged = f.read() == purged
+            else:
+                unchanged = False
+            if not unchanged:
+                with open(out_path + ".tmp", "w", encoding="utf-8", newline="\n") as f:
+                    f.write(purged)
+                os.replace(out_path + ".tmp", out_path)
+            st = os.stat(out_path)
+            written = [signature, st.st_mtime_ns, st.st_size]
+            if cache["css"][rel].get("output") != written:
+                cache["css"][rel]["output"] = written
+                dirty = True
+
+    for section, live in (("css", css_files), ("content", content_files)):
+        for rel in set(cache[section]) - set(live):
+            del cache[section][rel]
+            dirty = True
+    if dirty:
+        _save_json_cache(PURGE_CACHE_FILE, cache)
+    if write:
+        graph.record("purge", graph_key, stamps, outputs.values(), {"report": report})
+
+    if verbose:
+        _print_purge_report(report, (time.perf_counter() - started) * 1000)
+    return results
+
+
+def _print_purge_report(report: list, elapsed_ms: float):
+    table = Table(title="[bold cyan]Unused CSS Purge[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Stylesheet", style="bold cyan")
+    table.add_column("Before", justify="right")
+    table.add_column("After", justify="right")
+    table.add_column("Saved", justify="right", style="green")
+    for rel, before, after in report:
+        saved = (1 - after / before) * 100 if before else 0
+        table.add_row(rel, f"{before / 1024:,.1f} KB", f"{after / 1024:,.1f} KB", f"{saved:.0f}%")
+    total_before = sum(r[1] for r in report)
+    total_after = sum(r[2] for r in report)
+    table.add_row("[bold]Total[/bold]", f"{total_before / 1024:,.1f} KB", f"{total_after / 1024:,.1f} KB",
+                  f"{(1 - total_after / total_before) * 100 if total_before else 0:.0f}%")
+    console.print(table)
+    console.print(f"[dim]Purge finished in {elapsed_ms:,.0f} ms.[/dim]")
+
+
+def run_purge():
+    """Menu/CLI wrapper around purge_unused_css that reports failures."""
+    try:
+        purge_unused_css()
+        return True
+    except (OSError, ValueError, re.error) as e:
+        console.print(f"[bold red]CSS purge failed:[/bold red] {e}")
+        return False
+
+# --- Critical CSS extraction and inlining ---
+
+# Pages handled by the critical-CSS stage (index.html, contact.html and pages/*.html)
+CRITICAL_CSS_PAGES = ["*.html", "pages/*.html"]
+CRITICAL_CSS_IN_BUILD = True
+# Gzipped size of the inline <style> block that still fits the first round trip (~14 KB initial
+# congestion window, counted on the wire); pages over budget keep their render-blocking <link>s
+CRITICAL_CSS_MAX_BYTES = 14 * 1024
+# The above-the-fold DOM ends after the first of these landmarks closes; a page header alone is not the fold
+FOLD_LANDMARKS = {"section"}
+# Fallback when a page has no landmark: number of elements treated as above the fold
+FOLD_ELEMENT_BUDGET = 200
+
+_LINK_TAG_RE = _LazyPattern(r"<link\b[^>]*>", re.I)
+_NOSCRIPT_RE = _LazyPattern(r"<noscript\b.*?</noscript\s*>", re.I | re.S)
+_HTML_ATTR_RE = _LazyPattern(r"""([\w:-]+)\s*=\s*("[^"]*"|'[^']*'|[^\s"'>]+)""")
+_ANIMATION_NAME_RE = _LazyPattern(r"animation(?:-name)?\s*:\s*([^;}]+)", re.I)
+
+
+class _HTMLCollector:
+    """Base of the page collectors: handle_* callbacks driven by an html.parser.HTMLParser made on feed()."""
+
+    def handle_starttag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        pass
+
+    def handle_data(self, data):
+        pass
+
+    def feed(self, text: str):
+        import html.parser
+        parser = html.parser.HTMLParser(convert_charrefs=True)
+        parser.handle_starttag, parser.handle_endtag, parser.handle_data = self.handle_starttag, self.handle_endtag, self.handle_data
+        parser.feed(text)
+
+
+class _FoldCollector(_HTMLCollector):
+    """Collects the tags, classes and ids used by the above-the-fold part of <body>."""
+
+    def __init__(self):
+        self.present = {"tag": {"html", "body"}, "class": set(), "id": set()}
+        self.in_body = False
+        self.done = False
+        self.landmark = None
+        self.landmark_depth = 0
+        self.element_count = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.in_body = True
+        if not self.in_body:
+            return
+        self.present["tag"].add(tag)
+        for name, value in attrs:
+            if name == "class" and value:
+                self.present["class"].update(value.split())
+            elif name == "id" and value:
+                self.present["id"].add(value)
+        self.element_count += 1
+        if self.landmark is None and tag in FOLD_LANDMARKS:
+            self.landmark = tag
+        if tag == self.landmark:
+            self.landmark_depth += 1
+        if self.landmark is None and self.element_count >= FOLD_ELEMENT_BUDGET:
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if not self.done and tag == self.landmark:
+            self.landmark_depth -= 1
+            self.done = self.landmark_depth == 0
+
+
+def _above_the_fold_atoms(page_html: str) -> dict:
+    collector = _FoldCollector()
+    collector.feed(page_html)
+    return collector.present
+
+
+def _page_stylesheet_links(page_html: str) -> list:
+    """Returns (match, attrs) for every <link> that loads a stylesheet outside <noscript>."""
+    hidden = [(m.start(), m.end()) for m in _NOSCRIPT_RE.finditer(page_html)]
+    links = []
+    for match in _LINK_TAG_RE.finditer(page_html):
+        if any(start <= match.start() < end for start, end in hidden):
+            continue
+        attrs = {k.lower(): v.strip("\"'") for k, v in _HTML_ATTR_RE.findall(match.group(0))}
+        rel = attrs.get("rel", "").lower()
+        if rel == "stylesheet" or (rel == "preload" and attrs.get("as") == "style"):
+            links.append((match, attrs))
+    return links
+
+
+def _is_render_blocking(attrs: dict) -> bool:
+    return attrs.get("rel", "").lower() == "stylesheet" and attrs.get("media", "all").lower() not in ("print", "not all")
+
+
+def _select_critical_rules(nodes: list, present: dict) -> tuple:
+    """Returns (critical_css, keyframes) where keyframes maps animation name -> @keyframes text."""
+    out, keyframes = [], {}
+    for node in nodes:
+        if node[0] == "raw":
+            at_rule = re.match(r"@(-\w+-)?keyframes\s+([\w-]+)", node[1])
+            if at_rule:
+                keyframes[at_rule.group(2)] = node[1]
+            elif node[1].lower().startswith("@font-face"):
+                out.append(node[1])
+        elif node[0] == "at":
+            inner, inner_keyframes = _select_critical_rules(node[2], present)
+            keyframes.update(inner_keyframes)
+            if inner:
+                out.append(f"{node[1]}{{{inner}}}")
+        else:
+            # Attribute atoms are mostly toggled by scripts (data-theme, aria-*), so they never exclude a rule
+            kept = [
+                selector for selector, atoms in node[1]
+                if all(name in present[kind] for kind, name in atoms if kind != "attr")
+            ]
+            if kept:
+                out.append(f"{','.join(kept)}{{{node[2]}}}")
+    return "".join(out), keyframes
+
+
+def extract_critical_css(page_rel: str, page_html: str, read_css) -> tuple:
+    """Inlines the above-the-fold rules of a page and loads its stylesheets asynchronously; returns (new_html, report)."""
+    import gzip
+    present = _above_the_fold_atoms(page_html)
+    links = _page_stylesheet_links(page_html)
+    site_file = _site_file_exists()
+    report = {"page": page_rel, "blocking_bytes": 0, "blocking_requests": 0, "critical_bytes": 0,
+              "critical_gzip_bytes": 0, "inlined": False, "inline_bytes": 0, "saved_bytes": 0}
+    if not any(_is_render_blocking(attrs) and _resolve_asset_ref(page_rel, attrs.get("href", ""), site_file) for _, attrs in links):
+        return page_html, report
+
+    critical_parts, keyframes, seen = [], {}, set()
+    for match, attrs in links:
+        css_rel = _resolve_asset_ref(page_rel, attrs.get("href", ""), site_file)
+        if not css_rel:
+            continue
+        # Stylesheets the page already loads asynchronously stay off the critical path
+        if not _is_render_blocking(attrs) or css_rel in seen:
+            continue
+        css_text = read_css(css_rel)
+        report["blocking_requests"] += 1
+        report["blocking_bytes"] += len(minify_css(css_text).encode("utf-8"))
+        seen.add(css_rel)
+        rules, sheet_keyframes = _select_critical_rules(_parse_css_rules(css_text), present)
+        critical_parts.append(rules)
+        keyframes.update(sheet_keyframes)
+
+    critical = "".join(critical_parts)
+    used_animations = set()
+    for declaration in _ANIMATION_NAME_RE.findall(critical):
+        used_animations.update(re.findall(r"[\w-]+", declaration))
+    critical += "".join(text for name, text in keyframes.items() if name in used_animations)
+    critical = minify_css(critical)
+    style = f"<style data-critical>{critical}</style>"
+    report["critical_bytes"] = len(critical.encode("utf-8"))
+    report["critical_gzip_bytes"] = len(gzip.compress(style.encode("utf-8"), 9))
+    if report["critical_gzip_bytes"] > CRITICAL_CSS_MAX_BYTES:
+        return page_html, report
+
+    # Blocking <link rel="stylesheet"> becomes the preload/onload pattern the pages already use
+    pieces, last = [], 0
+    first_link_pos = links[0][0].start()
+    for match, attrs in links:
+        css_rel = _resolve_asset_ref(page_rel, attrs.get("href", ""), site_file)
+        if not css_rel or not _is_render_blocking(attrs):
+            continue
+        pieces.append(page_html[last:match.start()])
+        href = attrs["href"]
+        pieces.append(
+            f'<link rel="preload" href="{href}" as="style" onload="this.onload=null;this.rel=\'stylesheet\'">'
+            f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+        )
+        last = match.end()
+    pieces.append(page_html[last:])
+    new_html = "".join(pieces)
+    new_html = new_html[:first_link_pos] + style + "\n    " + new_html[first_link_pos:]
+    # The document grows by the inline <style> and the preload markup, all of it still on the critical path
+    report["inline_bytes"] = len(new_html.encode("utf-8")) - len(page_html.encode("utf-8"))
+    report["saved_bytes"] = report["blocking_bytes"] - report["inline_bytes"]
+    report["inlined"] = True
+    return new_html, report
+
+
+def _critical_css_pages(site_files) -> list:
+    return sorted(rel for rel in site_files if any(_matches_site_pattern(rel, p) for p in CRITICAL_CSS_PAGES))
+
+
+def _print_critical_report(reports: list):
+    table = Table(title="[bold cyan]Critical CSS (render-blocking stylesheets → inline)[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Page", style="bold cyan", no_wrap=True)
+    table.add_column("Blocking CSS before", justify="right")
+    table.add_column("Inlined critical CSS", justify="right")
+    table.add_column("Saved from critical path", justify="right", style="green")
+    table.add_column("Blocking requests", justify="right")
+    for r in reports:
+        if r["inlined"] or not r["blocking_requests"]:
+            inlined = f"{r['inline_bytes'] / 1024:,.1f} KB [dim]({r['critical_gzip_bytes'] / 1024:,.1f} KB gz)[/dim]"
+            requests = f"{r['blocking_requests']} → 0"
+        else:
+            inlined = f"[yellow]{r['critical_gzip_bytes'] / 1024:,.1f} KB gz (over)[/yellow]"
+            requests = f"{r['blocking_requests']} (kept)"
+        table.add_row(
+            r["page"],
+            f"{r['blocking_bytes'] / 1024:,.1f} KB",
+            inlined,
+            f"{r['saved_bytes'] / 1024:,.1f} KB",
+            requests,
+        )
+    console.print(table)
+    console.print(f"[dim]Inline size counts the <style> block and preload markup added to the page; "
+                  f"pages whose gzipped <style> exceeds {CRITICAL_CSS_MAX_BYTES // 1024} KB keep their stylesheet links.[/dim]")
+
+
+def report_critical_css() -> list:
+    """Dry run of the critical-CSS stage: prints per-page critical-path savings without writing files."""
+    purged = purge_unused_css(write=False, verbose=False) if PURGE_CSS_IN_BUILD and os.path.exists(PURGECSS_CONFIG_PATH) else {}
+    css_cache = {}
+
+    def read_css(rel):
+        if rel not in css_cache:
+            with open(os.path.join(ROOT_DIR, rel), "r", encoding="utf-8") as f:
+                css_cache[rel] = purged.get(rel) or f.read()
+        return css_cache[rel]
+
+    reports = []
+    for rel in _critical_css_pages(dict(_iter_site_files())):
+        with open(os.path.join(ROOT_DIR, rel), "r", encoding="utf-8") as f:
+            page_html = f.read()
+        reports.append(extract_critical_css(rel, page_html, read_css)[1])
+    _print_critical_report(reports)
+    return reports
+
+
+def run_critical_report():
+    """Menu/CLI wrapper around report_critical_css that reports failures."""
+    try:
+        report_critical_css()
+        return True
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Critical CSS analysis failed:[/bold red] {e}")
+        return False
+
+# --- Responsive image pipeline (AVIF/WebP variants + srcset) ---
+
+IMAGE_STORE_DIR = os.path.join(CACHE_DIR, "images")
+IMAGE_INDEX_FILE = os.path.join(CACHE_DIR, "images.json")
+IMAGE_CACHE_VERSION = 1
+RASTER_EXTS = (".png", ".jpg", ".jpeg", ".webp")
+IMAGE_WIDTHS = (320, 640, 960, 1280, 1920)
+IMAGE_QUALITY = {"avif": 55, "webp": 80}
+# Used when an <img> has neither `sizes` nor a `width` attribute
+IMAGE_DEFAULT_SIZES = "(max-width: 768px) 100vw, 50vw"
+IMAGES_IN_BUILD = True
+# UI icons are sized by CSS, so their <img> tags are left untouched (variants are still generated)
+IMAGE_REWRITE_EXCLUDES = ("assets/icons/",)
+
+_IMG_TAG_RE = _LazyPattern(r"<img\b[^>]*>", re.I)
+
+
+def _load_pillow():
+    """Returns the optional Pillow `Image` module, or None when Pillow is not installed."""
+    try:
+        return importlib.import_module("PIL.Image")
+    except ImportError:
+        return None
+
+
+def _image_formats() -> list:
+    """AVIF when this Pillow build can encode it (Pillow >= 11.3 or pillow-avif-plugin), WebP always."""
+    features = importlib.import_module("PIL.features")
+    if not features.check("avif"):
+        try:
+            importlib.import_module("pillow_avif")
+        except ImportError:
+            return ["webp"]
+    return ["avif", "webp"]
+
+
+def _convert_image_job(job: tuple) -> tuple:
+    """Process-pool worker: encodes one source at every target width and format; returns (width, height, variants)."""
+    source_path, store_dir, formats = job
+    from PIL import Image, ImageOps
+    if "avif" in formats:
+        try:
+            importlib.import_module("pillow_avif")
+        except ImportError:
+            pass
+    Image.MAX_IMAGE_PIXELS = None  # certificate scans are large but trusted
+    os.makedirs(store_dir, exist_ok=True)
+    with Image.open(source_path) as opened:
+        image = ImageOps.exif_transpose(opened)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode.endswith("A") else "RGB")
+        width, height = image.size
+        widths = [w for w in IMAGE_WIDTHS if w < width]
+        if width <= IMAGE_WIDTHS[-1]:
+            widths.append(width)
+        variants = []
+        for target in widths:
+            resized = image if target == width else image.resize(
+                (target, max(1, round(height * target / width))), Image.LANCZOS, reducing_gap=3.0
+            )
+            for fmt in formats:
+                out_path = os.path.join(store_dir, f"{target}.{fmt}")
+                resized.save(out_path, format=fmt.upper(), quality=IMAGE_QUALITY[fmt])
+                variants.append([target, fmt, os.path.getsize(out_path)])
+    return width, height, variants
+
+
+def optimize_images(verbose: bool = True) -> dict:
+    """Converts every raster under assets/ into width/format variants in manager/.cache/images/; returns {rel: entry}."""
+    import hashlib
+    import shutil
+    started = time.perf_counter()
+    if _load_pillow() is None:
+        raise ImportError("Pillow is required for image optimization (pip install pillow)")
+    formats = _image_formats()
+    settings = {"widths": list(IMAGE_WIDTHS), "formats": formats, "quality": IMAGE_QUALITY}
+    rasters = {
+        rel: abs_path for rel, abs_path in _iter_site_files()
+        if rel.startswith("assets/") and rel.lower().endswith(RASTER_EXTS)
+    }
+    graph = get_build_graph()
+    graph_key = dict(settings, version=IMAGE_CACHE_VERSION)
+    stamps = graph.stamp(rasters)
+    previous = graph.lookup("images", graph_key, stamps)
+    if previous is not None:
+        if verbose:
+            _print_image_report(previous, 0, (time.perf_counter() - started) * 1000)
+        return previous
+    index = _load_json_cache(IMAGE_INDEX_FILE, IMAGE_CACHE_VERSION, {"settings": None, "images": {}})
+    if index["settings"] != settings:
+        index["images"] = {}
+    index["settings"] = settings
+    old_images = index["images"]
+    by_sha = {entry["sha"]: entry for entry in old_images.values()}
+    images, jobs = {}, {}
+
+    for rel, abs_path in rasters.items():
+        st = os.stat(abs_path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        entry = old_images.get(rel)
+        if entry and entry["stat"] == stamp and os.path.isdir(os.path.join(IMAGE_STORE_DIR, entry["sha"])):
+            images[rel] = entry
+            continue
+        with open(abs_path, "rb") as f:
+            sha = hashlib.sha256(f.read()).hexdigest()[:16]
+        reusable = by_sha.get(sha)
+        if reusable and os.path.isdir(os.path.join(IMAGE_STORE_DIR, sha)):
+            images[rel] = dict(reusable, stat=stamp)
+        else:
+            images[rel] = {"stat": stamp, "sha": sha, "size": stamp[1]}
+            jobs[rel] = (abs_path, os.path.join(IMAGE_STORE_DIR, sha), formats)
+
+    if jobs:
+        workers = min(len(jobs), os.cpu_count() or 1)
+        if workers > 1:
+            import concurrent.futures
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+                results = dict(zip(jobs, pool.map(_convert_image_job, jobs.values())))
+        else:
+            results = {rel: _convert_image_job(job) for rel, job in jobs.items()}
+        for rel, (width, height, variants) in results.items():
+            images[rel].update(width=width, height=height, variants=variants)
+
+    live = {entry["sha"] for entry in images.values()}
+    if os.path.isdir(IMAGE_STORE_DIR):
+        for name in os.listdir(IMAGE_STORE_DIR):
+            if name not in live:
+                shutil.rmtree(os.path.join(IMAGE_STORE_DIR, name), ignore_errors=True)
+    index["images"] = images
+    _save_json_cache(IMAGE_INDEX_FILE, index)
+    variant_paths = [
+        os.path.join(IMAGE_STORE_DIR, entry["sha"], f"{width}.{fmt}")
+        for entry in images.values() for width, fmt, _ in entry.get("variants", [])
+    ]
+    graph.record("images", graph_key, stamps, [IMAGE_INDEX_FILE, *variant_paths], images)
+
+    if verbose:
+        _print_image_report(images, len(jobs), (time.perf_counter() - started) * 1000)
+    return images
+
+
+def _useful_variants(entry: dict) -> dict:
+    """Returns {format: [(width, bytes), ...]} keeping only formats whose largest variant beats the source."""
+    by_format = {}
+    for width, fmt, size in entry.get("variants", []):
+        by_format.setdefault(fmt, []).append((width, size))
+    return {fmt: sorted(items) for fmt, items in by_format.items() if sorted(items)[-1][1] < entry["size"]}
+
+
+def _image_variant_path(rel: str, entry: dict, width: int, fmt: str) -> str:
+    """Site-relative, content-addressed path of a variant (no spaces, so it is srcset-safe)."""
+    stem = re.sub(r"[^\w.-]+", "-", posixpath.splitext(posixpath.basename(rel))[0])
+    return posixpath.join(posixpath.dirname(rel), f"{stem}.{entry['sha'][:10]}-{width}.{fmt}")
+
+
+def rewrite_img_tags(page_rel: str, page_html: str, images: dict) -> str:
+    """Adds intrinsic width/height to local <img> tags and wraps them in <picture> with AVIF/WebP srcsets."""
+    def replace(match):
+        tag = match.group(0)
+        attrs = {k.lower(): v.strip("\"'") for k, v in _HTML_ATTR_RE.findall(tag)}
+        if "srcset" in attrs:
+            return tag
+        src = attrs.get("src", "")
+        rel = _resolve_asset_ref(page_rel, src, images)
+        entry = images.get(rel) if rel else None
+        if not entry or "width" not in entry or rel.startswith(IMAGE_REWRITE_EXCLUDES):
+            return tag
+        closing = "/>" if tag.endswith("/>") else ">"
+        extra = ""
+        if "width" not in attrs and "height" not in attrs:
+            extra = f' width="{entry["width"]}" height="{entry["height"]}"'
+        img = tag[:-len(closing)].rstrip() + extra + (" " + closing if closing == "/>" else closing)
+        variants = _useful_variants(entry)
+        if not variants:
+            return img
+        if "sizes" in attrs:
+            sizes = attrs["sizes"]
+        elif attrs.get("width", "").isdigit():
+            sizes = f"{attrs['width']}px"
+        else:
+            sizes = IMAGE_DEFAULT_SIZES
+        src_dir = posixpath.dirname(src.split("?", 1)[0])
+        sources = []
+        for fmt in ("avif", "webp"):
+            if fmt not in variants:
+                continue
+            candidates = ", ".join(
+                f"{posixpath.join(src_dir, posixpath.basename(_image_variant_path(rel, entry, w, fmt)))} {w}w"
+                for w, _ in variants[fmt]
+            )
+            sources.append(f'<source type="image/{fmt}" srcset="{candidates}" sizes="{sizes}">')
+        return f"<picture>{''.join(sources)}{img}</picture>"
+
+    return _IMG_TAG_RE.sub(replace, page_html)
+
+
+def _images_signature(images: dict) -> str:
+    """Changes whenever any image's content or set of useful variants changes."""
+    import hashlib
+    parts = sorted(f"{rel}:{entry['sha']}:{sorted(_useful_variants(entry))}" for rel, entry in images.items())
+    parts.append(repr(IMAGE_REWRITE_EXCLUDES))
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def _print_image_report(images: dict, converted: int, elapsed_ms: float):
+    table = Table(title="[bold cyan]Responsive Images[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Image", style="bold cyan")
+    table.add_column("Source", justify="right")
+    table.add_column("Best full-width", justify="right", style="green")
+    table.add_column("Widths")
+    table.add_column("Formats")
+    for rel, entry in sorted(images.items()):
+        variants = _useful_variants(entry)
+        if not variants:
+            continue
+        best_fmt = min(variants, key=lambda fmt: variants[fmt][-1][1])
+        table.add_row(
+            rel[len("assets/"):],
+            f"{entry['size'] / 1024:,.1f} KB",
+            f"{variants[best_fmt][-1][1] / 1024:,.1f} KB {best_fmt}",
+            str(len(variants[best_fmt])),
+            "/".join(variants),
+        )
+    console.print(table)
+    skipped = sum(1 for entry in images.values() if not _useful_variants(entry))
+    console.print(
+        f"[dim]{len(images)} images, {converted} converted, {len(images) - converted} from cache, "
+        f"{skipped} already optimal; finished in {elapsed_ms:,.0f} ms.[/dim]"
+    )
+
+
+def run_image_optimization():
+    """Menu/CLI wrapper around optimize_images that reports failures."""
+    try:
+        optimize_images()
+        return True
+    except (ImportError, OSError, ValueError) as e:
+        console.print(f"[bold red]Image optimization failed:[/bold red] {e}")
+        return False
+
+# --- JavaScript module bundler (entry bundle + lazy chunks, tree-shaking) ---
+
+JS_ENTRY = "assets/js/main.js"
+# Modules (and whatever only they import) split into chunks that load on demand after first paint
+JS_LAZY_CHUNKS = ["assets/js/modules/search.js", "assets/js/modules/settings.js"]
+JS_CHUNK_DIR = "assets/js/chunks"
+BUNDLE_JS_IN_BUILD = True
+BUNDLE_DIR = os.path.join(CACHE_DIR, "bundle")
+BUNDLE_CACHE_VERSION = 3
+
+_JS_BUNDLE_RESERVED = {"__factories", "__chunks", "__modules", "__pending", "__require", "__load"}
+_JS_TEMPLATE_WORD_RE = _LazyPattern(r"[A-Za-z_$][\w$]*")
+_ALL_EXPORTS = "*"
+
+
+def _js_tokens(source: str) -> list:
+    """Splits JS into (kind, text, start, end) tokens (word, string, template, regex, punct), dropping whitespace and comments."""
+    tokens = []
+    i, n = 0, len(source)
+    while i < n:
+        ch = source[i]
+        if ch in _JS_WHITESPACE:
+            i += 1
+            continue
+        if source.startswith("//", i):
+            j = source.find("\n", i)
+            i = n if j == -1 else j
+            continue
+        if source.startswith("/*", i):
+            j = source.find("*/", i + 2)
+            i = n if j == -1 else j + 2
+            continue
+        prev = tokens[-1] if tokens else None
+        if ch in "'\"`":
+            j = _skip_js_string(source, i)
+            tokens.append(("template" if ch == "`" else "string", source[i:j], i, j))
+        elif ch == "/" and (
+            prev is None
+            or (prev[0] == "punct" and prev[1] in _JS_REGEX_PRECEDERS)
+            or (prev[0] == "word" and prev[1] in _JS_REGEX_KEYWORDS)
+        ):
+            j = _skip_js_regex(source, i)
+            tokens.append(("regex", source[i:j], i, j))
+        elif _is_js_word_char(ch):
+            j = i
+            while j < n and (_is_js_word_char(source[j]) or (source[j] == "." and source[i].isdigit())):
+                j += 1
+            tokens.append(("word", source[i:j], i, j))
+        else:
+            j = i + 1
+            tokens.append(("punct", ch, i, j))
+        i = j
+    return tokens
+
+
+def _js_matching(tokens: list, i: int) -> int:
+    """Returns the index of the bracket closing the one at tokens[i]."""
+    depth = 0
+    for k in range(i, len(tokens)):
+        kind, text = tokens[k][:2]
+        if kind == "punct" and text in "([{":
+            depth += 1
+        elif kind == "punct" and text in ")]}":
+            depth -= 1
+            if depth == 0:
+                return k
+    raise ValueError("unbalanced brackets")
+
+
+def _is_js_punct(token, chars: str) -> bool:
+    return token is not None and token[0] == "punct" and token[1] in chars
+
+
+def _js_string_value(token) -> str:
+    if token is None or token[0] != "string":
+        raise ValueError("expected a string literal module specifier")
+    return token[1][1:-1]
+
+
+def _parse_js_module(rel: str, source: str) -> dict:
+    """Finds the imports, exports and top-level functions of one ES module; ValueError for syntax the bundler cannot rewrite."""
+    tokens = _js_tokens(source)
+    imports, dynamic, exports, functions = [], [], {}, []
+    export_edits = []
+    depth = 0
+    k = 0
+
+    def tok(index):
+        return tokens[index] if 0 <= index < len(tokens) else None
+
+    def fail(message, index):
+        line = source.count("\n", 0, tokens[index][2]) + 1
+        raise ValueError(f"{rel}:{line}: {message}")
+
+    def statement_end(index):
+        """Index just past an optional `;` following tokens[index - 1]."""
+        return index + 1 if _is_js_punct(tok(index), ";") else index
+
+    while k < len(tokens):
+        kind, text, start, end = tokens[k]
+        prev = tok(k - 1)
+        if kind == "punct":
+            if text in "([{":
+                depth += 1
+            elif text in ")]}":
+                depth -= 1
+            k += 1
+            continue
+        if kind != "word" or _is_js_punct(prev, "."):
+            k += 1
+            continue
+        nxt = tok(k + 1)
+        if text == "import" and _is_js_punct(nxt, "."):
+            fail("import.meta cannot be bundled", k)
+        if text == "import" and _is_js_punct(nxt, "("):
+            arg, close = tok(k + 2), tok(k + 3)
+            if arg and arg[0] == "string" and _is_js_punct(close, ")"):
+                dynamic.append({"spec": arg[1][1:-1], "start": start, "end": close[3], "index": k})
+            else:
+                dynamic.append({"spec": None, "start": start, "end": end, "index": k})
+            k += 1
+            continue
+        if depth:
+            k += 1
+            continue
+        if text == "await" and (prev is None or _is_js_punct(prev, ";}=")):
+            fail("top-level await cannot be bundled", k)
+        if text == "import":
+            names, namespace = [], None
+            j = k + 1
+            if tok(j) and tok(j)[0] == "word":
+                names.append(("default", tok(j)[1]))
+                j += 1
+                if _is_js_punct(tok(j), ","):
+                    j += 1
+            if _is_js_punct(tok(j), "*"):
+                namespace = tok(j + 2)[1]
+                j += 3
+            elif _is_js_punct(tok(j), "{"):
+                close = _js_matching(tokens, j)
+                j += 1
+                while j < close:
+                    imported = tok(j)[1]
+                    local = imported
+                    if tok(j + 1)[1] == "as":
+                        local = tok(j + 2)[1]
+                        j += 2
+                    names.append((imported, local))
+                    j += 2 if _is_js_punct(tok(j + 1), ",") else 1
+                j = close + 1
+            if tok(j) and tok(j)[1] == "from":
+                j += 1
+            spec = _js_string_value(tok(j))
+            stop = statement_end(j + 1)
+            imports.append({"spec": spec, "names": names, "namespace": namespace, "edit": (start, tokens[stop - 1][3], "")})
+            k = stop
+            continue
+        if text == "export":
+            target = nxt[1] if nxt else ""
+            if target == "default":
+                after = tok(k + 2)
+                if after and after[1] in ("function", "class") and tok(k + 3) and tok(k + 3)[0] == "word":
+                    exports["default"] = tok(k + 3)[1]
+                    export_edits.append((start, after[2], ""))
+                else:
+                    exports["default"] = "__default"
+                    export_edits.append((start, nxt[3], "const __default ="))
+                k += 2
+                continue
+            if target in ("function", "async", "class"):
+                j = k + 1
+                while tok(j) and tok(j)[1] in ("async", "function", "class", "*"):
+                    j += 1
+                exports[tok(j)[1]] = tok(j)[1]
+                export_edits.append((start, nxt[2], ""))
+                k += 1
+                continue
+            if target in ("const", "let", "var"):
+                if target != "const":
+                    fail(f"`export {target}` bindings can be reassigned and cannot be bundled", k)
+                name = tok(k + 2)
+                if name is None or name[0] != "word":
+                    fail("destructured exports cannot be bundled", k)
+                j, inner = k + 3, 0
+                while j < len(tokens) and not (inner == 0 and _is_js_punct(tok(j), ";")):
+                    if _is_js_punct(tok(j), "([{"):
+                        inner += 1
+                    elif _is_js_punct(tok(j), ")]}"):
+                        inner -= 1
+                    elif inner == 0 and _is_js_punct(tok(j), ",") and _is_js_punct(tok(j + 2), "="):
+                        fail("export lists with several declarators cannot be bundled", k)
+                    elif inner == 0 and tok(j)[0] == "word" and tok(j)[1] in ("export", "import", "function", "class"):
+                        break
+                    j += 1
+                exports[name[1]] = name[1]
+                export_edits.append((start, nxt[2], ""))
+                k += 1
+                continue
+            if _is_js_punct(nxt, "{"):
+                close = _js_matching(tokens, k + 1)
+                if tok(close + 1) and tok(close + 1)[1] == "from":
+                    fail("re-exports cannot be bundled", k)
+                j = k + 2
+                while j < close:
+                    local = tok(j)[1]
+                    exported = local
+                    if tok(j + 1)[1] == "as":
+                        exported = tok(j + 2)[1]
+                        j += 2
+                    exports[exported] = local
+                    j += 2 if _is_js_punct(tok(j + 1), ",") else 1
+                stop = statement_end(close + 1)
+                export_edits.append((start, tokens[stop - 1][3], ""))
+                k = stop
+                continue
+            fail("unsupported export form", k)
+        if text == "function" and (prev is None or _is_js_punct(prev, ";}") or prev[1] in ("export", "async")):
+            j = k + 1
+            if _is_js_punct(tok(j), "*"):
+                j += 1
+            name = tok(j)
+            body = j + 1
+            if name and name[0] == "word" and _is_js_punct(tok(body), "("):
+                body = _js_matching(tokens, body) + 1
+                if _is_js_punct(tok(body), "{"):
+                    close = _js_matching(tokens, body)
+                    first = k - 1 if prev is not None and prev[1] == "async" else k
+                    if first > 0 and tok(first - 1)[1] == "export":
+                        first -= 1
+                    functions.append({"name": name[1], "start": tokens[first][2], "end": tokens[close][3]})
+        k += 1
+    return {
+        "imports": imports, "dynamic": dynamic, "exports": exports, "functions": functions, "tokens": tokens,
+        "export_edits": export_edits,
+    }
+
+
+def _js_name_positions(tokens: list) -> dict:
+    """Maps every identifier to the offsets where it occurs, counting words inside template literals."""
+    positions = {}
+    for kind, text, start, _ in tokens:
+        if kind == "word":
+            positions.setdefault(text, []).append(start)
+        elif kind == "template":
+            for match in _JS_TEMPLATE_WORD_RE.finditer(text):
+                positions.setdefault(match.group(0), []).append(start + match.start())
+    return positions
+
+
+def _namespace_members(tokens: list, binding_index: int) -> object:
+    """Exports read through a namespace bound by `x = await import(...)`, or _ALL_EXPORTS when the namespace escapes."""
+    name = tokens[binding_index][1]
+    members = set()
+
+    def at(index):
+        return tokens[index] if index < len(tokens) else None
+
+    for k, (kind, text, _, _) in enumerate(tokens):
+        if kind != "word" or text != name or (k > 0 and _is_js_punct(tokens[k - 1], ".")):
+            continue
+        after = at(k + 1)
+        if _is_js_punct(after, "?") and _is_js_punct(at(k + 2), "."):
+            k += 1
+            after = at(k + 1)
+        if _is_js_punct(after, ".") and at(k + 2) and at(k + 2)[0] == "word":
+            members.add(at(k + 2)[1])
+        elif _is_js_punct(after, "&|"):
+            continue
+        elif _is_js_punct(after, "=") and not _is_js_punct(at(k + 2), "=") and k > 0 and tokens[k - 1][1] in ("const", "let", "var"):
+            continue
+        else:
+            return _ALL_EXPORTS
+    return members
+
+
+def _dynamic_import_binding(tokens: list, index: int) -> int:
+    """Index of `x` in `const x = await import(...)`, or -1 when the namespace is used some other way."""
+    k = index - 1
+    if k >= 0 and tokens[k][:2] == ("word", "await"):
+        k -= 1
+    if k >= 2 and _is_js_punct(tokens[k], "=") and tokens[k - 1][0] == "word" and tokens[k - 2][1] in ("const", "let", "var"):
+        return k - 1
+    return -1
+
+
+def _resolve_js_module(from_rel: str, spec: str, site_files) -> str:
+    """Resolves a relative module specifier (ignoring ?v= queries) to a site file, or None for URLs."""
+    path = spec.split("?", 1)[0].split("#", 1)[0]
+    if not path.startswith(("./", "../")):
+        return None
+    rel = posixpath.normpath(posixpath.join(posixpath.dirname(from_rel), path))
+    if rel not in site_files:
+        raise ValueError(f"{from_rel}: cannot resolve module '{spec}'")
+    return rel
+
+
+def _module_ids(rels) -> dict:
+    """Short, unique, readable factory ids derived from file names."""
+    ids = {}
+    for rel in rels:
+        base = re.sub(r"[^\w-]", "_", posixpath.splitext(posixpath.basename(rel))[0])
+        candidate, n = base, 2
+        while candidate in ids.values():
+            candidate, n = f"{base}{n}", n + 1
+        ids[rel] = candidate
+    return ids
+
+
+def _apply_js_edits(source: str, edits: list) -> str:
+    """Applies (start, end, replacement) edits, dropping any nested inside an earlier (outer) edit."""
+    out, last = [], 0
+    for start, end, replacement in sorted(edits, key=lambda e: (e[0], -e[1])):
+        if start < last:
+            continue
+        out.append(source[last:start])
+        out.append(replacement)
+        last = end
+    out.append(source[last:])
+    return "".join(out)
+
+
+def _shake_functions(parsed: dict, keep: set) -> list:
+    """Top-level function declarations that nothing references once unused exports are dropped."""
+    positions = _js_name_positions(parsed["tokens"])
+    removed = []
+    changed = True
+    while changed:
+        changed = False
+        for fn in parsed["functions"]:
+            if fn in removed or fn["name"] in keep:
+                continue
+            live = [
+                pos for pos in positions.get(fn["name"], [])
+                if not fn["start"] <= pos < fn["end"] and not any(r["start"] <= pos < r["end"] for r in removed)
+            ]
+            if not live:
+                removed.append(fn)
+                changed = True
+    return removed
+
+
+def _require_line(target_id: str, names: list, namespace: str) -> str:
+    lines = []
+    if names:
+        bindings = ", ".join(local if imported == local else f"{imported}: {local}" for imported, local in names)
+        lines.append(f"const {{ {bindings} }} = __require({json.dumps(target_id)});")
+    if namespace:
+        lines.append(f"const {namespace} = __require({json.dumps(target_id)});")
+    if not lines:
+        lines.append(f"__require({json.dumps(target_id)});")  # side-effect-only `import "./x.js"`
+    return "\n".join(lines)
+
+
+_JS_BUNDLE_RUNTIME = """const __modules = {};
+const __pending = {};
+function __require(id) {
+    if (!(id in __modules)) {
+        __modules[id] = __factories[id](__require, __load);
+    }
+    return __modules[id];
+}
+function __load(id) {
+    if (!__pending[id]) {
+        const ready = id in __factories
+            ? Promise.resolve()
+            : __chunks[id]().then((chunk) => { Object.assign(__factories, chunk.factories); });
+        __pending[id] = ready.then(() => __require(id));
+    }
+    return __pending[id];
+}
+"""
+
+
+def bundle_js_modules(site_files: dict = None) -> dict:
+    """Bundles the ES module graph of JS_ENTRY into one entry file plus JS_LAZY_CHUNKS, dropping unused exports."""
+    import gzip
+    started = time.perf_counter()
+    if site_files is None:
+        site_files = dict(_iter_site_files())
+    if JS_ENTRY not in site_files:
+        raise ValueError(f"Bundle entry {JS_ENTRY} does not exist")
+    pages = _critical_css_pages(site_files)
+    settings = {"version": BUNDLE_CACHE_VERSION, "entry": JS_ENTRY, "chunks": JS_LAZY_CHUNKS, "dir": JS_CHUNK_DIR}
+    build_graph = get_build_graph()
+    stamps = build_graph.stamp({rel: path for rel, path in site_files.items() if rel.endswith(".js") or rel in pages})
+    result = build_graph.lookup("bundle", settings, stamps)
+    if result is not None:
+        return dict(result, cached=True, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+    sources, parsed, graph = {}, {}, {}
+    pending = [JS_ENTRY]
+    while pending:
+        rel = pending.pop()
+        if rel in parsed:
+            continue
+        with open(site_files[rel], "r", encoding="utf-8") as f:
+            sources[rel] = f.read()
+        parsed[rel] = module = _parse_js_module(rel, sources[rel])
+        for item in module["imports"] + module["dynamic"]:
+            item["target"] = _resolve_js_module(rel, item["spec"], site_files) if item["spec"] else None
+        if rel != JS_ENTRY and any(item["target"] is None for item in module["imports"] + module["dynamic"]):
+            raise ValueError(f"{rel}: URL and computed imports are only supported in {JS_ENTRY}")
+        graph[rel] = {
+            "static": [imp["target"] for imp in module["imports"] if imp["target"]],
+            "lazy": [dyn["target"] for dyn in module["dynamic"] if dyn["target"]],
+        }
+        if JS_ENTRY in graph[rel]["static"] + graph[rel]["lazy"]:
+            raise ValueError(f"{rel}: modules cannot import the bundle entry {JS_ENTRY}")
+        pending.extend(graph[rel]["static"] + graph[rel]["lazy"])
+    if _JS_BUNDLE_RESERVED & set(_js_name_positions(parsed[JS_ENTRY]["tokens"])):
+        raise ValueError(f"{JS_ENTRY} uses identifiers reserved by the bundle runtime")
+
+    def check_cycles(rel, trail):
+        if rel in trail:
+            raise ValueError(f"Static import cycle: {' -> '.join(trail[trail.index(rel):] + [rel])}")
+        for dep in graph[rel]["static"]:
+            check_cycles(dep, trail + [rel])
+    check_cycles(JS_ENTRY, [])
+
+    # Chunk membership: what the entry reaches without passing through a chunk root stays in it
+    roots = [rel for rel in JS_LAZY_CHUNKS if rel in graph]
+
+    def reach(start, stop):
+        seen, stack = set(), [start]
+        while stack:
+            rel = stack.pop()
+            if rel in seen or (rel in stop and rel != start):
+                continue
+            seen.add(rel)
+            stack.extend(graph[rel]["static"] + graph[rel]["lazy"])
+        return seen
+
+    in_entry = reach(JS_ENTRY, set(roots))
+    owners = {}
+    for root in roots:
+        for rel in reach(root, set(roots)) - in_entry:
+            owners.setdefault(rel, set()).add(root)
+    for rel, chunk_roots in owners.items():
+        if len(chunk_roots) > 1:
+            in_entry.add(rel)  # shared by several chunks: load it once with the entry
+    chunk_of = {rel: next(iter(r)) for rel, r in owners.items() if rel not in in_entry}
+    ids = _module_ids(sorted(graph))
+
+    # Used exports: named imports, plus the members read off `await import()` namespaces
+    used = {rel: set() for rel in graph}
+    for rel, module in parsed.items():
+        for imp in module["imports"]:
+            target = imp["target"]
+            if not target or used[target] == _ALL_EXPORTS:
+                continue
+            if imp["namespace"]:
+                used[target] = _ALL_EXPORTS
+            else:
+                used[target].update(imported for imported, _ in imp["names"])
+        for dyn in module["dynamic"]:
+            target = dyn["target"]
+            if not target or used[target] == _ALL_EXPORTS:
+                continue
+            binding = _dynamic_import_binding(module["tokens"], dyn["index"])
+            members = _namespace_members(module["tokens"], binding) if binding >= 0 else _ALL_EXPORTS
+            used[target] = _ALL_EXPORTS if members == _ALL_EXPORTS else used[target] | members
+
+    def load_expression(rel, target):
+        if target in roots and chunk_of.get(rel) != target:
+            return f"__load({json.dumps(ids[target])})"
+        if target in chunk_of and chunk_of[target] != chunk_of.get(rel):
+            return f"__load({json.dumps(ids[chunk_of[target]])}).then(() => __require({json.dumps(ids[target])}))"
+        return f"Promise.resolve().then(() => __require({json.dumps(ids[target])}))"
+
+    removed_functions, dropped_exports = [], 0
+
+    def module_code(rel):
+        nonlocal dropped_exports
+        module = parsed[rel]
+        local_imports = [imp for imp in module["imports"] if imp["target"]]
+        edits = [imp["edit"] for imp in local_imports]
+        if rel != JS_ENTRY:
+            edits += module["export_edits"]  # the entry keeps its own ES exports
+        edits += [(dyn["start"], dyn["end"], load_expression(rel, dyn["target"])) for dyn in module["dynamic"] if dyn["target"]]
+        prologue = "\n".join(_require_line(ids[imp["target"]], imp["names"], imp["namespace"]) for imp in local_imports)
+        if rel == JS_ENTRY:
+            return prologue, _apply_js_edits(sources[rel], edits)
+        exported = module["exports"] if used[rel] == _ALL_EXPORTS else {
+            name: local for name, local in module["exports"].items() if name in used[rel]
+        }
+        dropped_exports += len(module["exports"]) - len(exported)
+        for fn in _shake_functions(module, set(exported.values())):
+            edits.append((fn["start"], fn["end"], ""))
+            removed_functions.append(f"{rel}:{fn['name']}")
+        body = _apply_js_edits(sources[rel], edits).strip("\n")
+        fields = ", ".join(name if name == local else f"{json.dumps(name)}: {local}" for name, local in sorted(exported.items()))
+        return prologue, body + f"\nreturn {{ {fields} }};"
+
+    def factory(rel):
+        prologue, body = module_code(rel)
+        header = f"// {rel}\n{json.dumps(ids[rel])}: function (__require, __load) {{\n"
+        return header + (prologue + "\n" if prologue else "") + body + "\n},\n"
+
+    factories_order = [rel for rel in sorted(graph, key=lambda r: ids[r]) if rel != JS_ENTRY]
+    entry_factories = [rel for rel in factories_order if rel in in_entry]
+    entry_dir = posixpath.dirname(JS_ENTRY)
+    chunk_rels = {root: f"{JS_CHUNK_DIR}/{posixpath.basename(root)}" for root in roots}
+    chunk_map = "".join(
+        f"    {json.dumps(ids[root])}: () => import({json.dumps('./' + posixpath.relpath(chunk_rels[root], entry_dir))}),\n"
+        for root in roots
+    )
+    entry_prologue, entry_body = module_code(JS_ENTRY)
+    entry_text = (
+        f"// Bundled by manager.py: {len(entry_factories) + 1} modules; lazy chunks: {', '.join(ids[r] for r in roots) or 'none'}\n"
+        "const __factories = {\n" + "".join(factory(rel) for rel in entry_factories) + "};\n"
+        "const __chunks = {\n" + chunk_map + "};\n"
+        + _JS_BUNDLE_RUNTIME + (entry_prologue + "\n" if entry_prologue else "") + entry_body
+    )
+    outputs = {JS_ENTRY: (entry_text, [JS_ENTRY] + entry_factories)}
+    for root in roots:
+        members = [rel for rel in factories_order if chunk_of.get(rel) == root]
+        text = (
+            f"// Lazy chunk bundled by manager.py from {root}\n"
+            "export const factories = {\n" + "".join(factory(rel) for rel in members) + "};\n"
+        )
+        outputs[chunk_rels[root]] = (text, members)
+
+    written = {}
+    for rel, (text, _) in outputs.items():
+        path = os.path.join(BUNDLE_DIR, rel)
+        data = text.encode("utf-8")
+        try:
+            with open(path, "rb") as f:
+                unchanged = f.read() == data
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        written[rel] = path
+
+    # Requests made while the page loads (static imports) vs. on demand (dynamic imports)
+    eager, stack = {JS_ENTRY}, [JS_ENTRY]
+    while stack:
+        for dep in graph[stack.pop()]["static"]:
+            if dep not in eager:
+                eager.add(dep)
+                stack.append(dep)
+    page_reports = []
+    for page in pages:
+        with open(site_files[page], "r", encoding="utf-8") as f:
+            if JS_ENTRY in _find_asset_refs(page, f.read(), {JS_ENTRY}):
+                page_reports.append({
+                    "page": page,
+                    "before": {"eager": len(eager), "lazy": len(graph) - len(eager)},
+                    "after": {"eager": 1, "lazy": len(outputs) - 1},
+                })
+    result = {
+        "entry_path": written[JS_ENTRY],
+        "chunks": {rel: path for rel, path in written.items() if rel != JS_ENTRY},
+        "bundled": sorted(graph),
+        "outputs": [
+            {
+                "rel": rel,
+                "modules": members,
+                "bytes": len(text.encode("utf-8")),
+                "minified": len(minify_js(text).encode("utf-8")),
+                "gzip": len(gzip.compress(minify_js(text).encode("utf-8"), 9)),
+            }
+            for rel, (text, members) in outputs.items()
+        ],
+        "pages": page_reports,
+        "dropped_exports": dropped_exports,
+        "removed_functions": removed_functions,
+        "source_bytes": sum(len(sources[rel].encode("utf-8")) for rel in graph),
+    }
+    build_graph.record("bundle", settings, stamps, [result["entry_path"], *result["chunks"].values()], result)
+    return dict(result, cached=False, elapsed_ms=(time.perf_counter() - started) * 1000)
+
+
+
+def _print_bundle_report(result: dict):
+    table = Table(title="[bold cyan]JavaScript Bundle (entry + lazy chunks)[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Output", style="bold cyan", no_wrap=True)
+    table.add_column("Modules", justify="right")
+    table.add_column("Minified", justify="right")
+    table.add_column("Gzip", justify="right", style="green")
+    for output in result["outputs"]:
+        table.add_row(
+            output["rel"] + ("" if output["rel"] == JS_ENTRY else " [dim](lazy)[/dim]"),
+            str(len(output["modules"])),
+            f"{output['minified'] / 1024:,.1f} KB",
+            f"{output['gzip'] / 1024:,.1f} KB",
+        )
+    console.print(table)
+    for page in result["pages"]:
+        before, after = page["before"], page["after"]
+        console.print(
+            f"  [cyan]{page['page']}[/cyan]: JS requests on load {before['eager']} → [bold green]{after['eager']}[/bold green], "
+            f"on demand {before['lazy']} → [bold green]{after['lazy']}[/bold green]"
+        )
+    console.print(
+        f"[dim]{len(result['bundled'])} modules ({result['source_bytes'] / 1024:,.1f} KB source); "
+        f"{result['dropped_exports']} unused exports and {len(result['removed_functions'])} dead functions dropped"
+        f"{' (from cache)' if result.get('cached') else ''}; finished in {result['elapsed_ms']:,.0f} ms.[/dim]"
+    )
+
+
+def run_bundle_report():
+    """Menu/CLI wrapper around bundle_js_modules that reports failures."""
+    try:
+        _print_bundle_report(bundle_js_modules())
+        return True
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]JavaScript bundling failed:[/bold red] {e}")
+        return False
+
+
+# --- Site search index (prefix + trigram inverted index) ---
+
+SEARCH_INDEX_REL = "assets/search-index.json"
+SEARCH_INDEX_PATH = os.path.join(CACHE_DIR, "search", "search-index.json")
+SEARCH_CACHE_FILE = os.path.join(CACHE_DIR, "search.json")
+SEARCH_CACHE_VERSION = 1
+SEARCH_PAGES = ["*.html", "pages/*.html"]
+SEARCH_DOCUMENTS = ["assets/docs/*.pdf"]
+# Pages with <meta name="robots" content="noindex"> are skipped as well
+SEARCH_EXCLUDES = ["pages/pdf-viewer.html"]
+SEARCH_INDEX_IN_BUILD = True
+# Keep in sync with PREFIX_MAX in assets/js/modules/search.js
+SEARCH_PREFIX_MAX = 8
+SEARCH_MIN_PREFIX = 2
+# Postings kept per key (best-scoring documents first)
+SEARCH_MAX_POSTINGS = 24
+SEARCH_WEIGHTS = {"title": 8, "heading": 4, "text": 1}
+SEARCH_DESCRIPTION_CHARS = 140
+
+_SEARCH_WORD_RE = _LazyPattern(r"[^\W_]+")
+_SEARCH_SPACE_RE = _LazyPattern(r"\s+")
+_SEARCH_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "nav", "footer", "head"}
+_SEARCH_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+def _search_words(text: str) -> list:
+    """Lower-cased, accent-folded words; mirrors searchTerms() in search.js."""
+    import unicodedata
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(ch for ch in folded if not unicodedata.combining(ch))
+    return [word for word in _SEARCH_WORD_RE.findall(folded) if len(word) >= SEARCH_MIN_PREFIX]
+
+
+def _search_snippet(text: str) -> str:
+    text = _SEARCH_SPACE_RE.sub(" ", text).strip()
+    if len(text) <= SEARCH_DESCRIPTION_CHARS:
+        return text
+    return text[:SEARCH_DESCRIPTION_CHARS].rsplit(" ", 1)[0] + "…"
+
+
+def _search_title_from_name(rel: str) -> str:
+    return posixpath.splitext(posixpath.basename(rel))[0].replace("-", " ").replace("_", " ").title()
+
+
+class _SearchTextCollector(_HTMLCollector):
+    """Splits a page into searchable documents: the page itself plus every section or heading with an id."""
+
+    def __init__(self):
+        self.title = ""
+        self.meta = {}
+        self.docs = [{"anchor": "", "headings": [], "text": []}]
+        self.stack = []
+        self.skip_depth = 0
+        self.capture = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta" and attrs.get("name"):
+            self.meta[attrs["name"].lower()] = attrs.get("content") or ""
+        if tag in _SEARCH_VOID_TAGS:
+            return
+        self.stack.append(tag)
+        if tag == "title" and not self.title:
+            self.capture = ("title", len(self.stack))
+        if self.skip_depth or tag in _SEARCH_SKIP_TAGS:
+            self.skip_depth += 1
+            return
+        anchor = attrs.get("id")
+        if anchor and (tag == "section" or tag in ("h1", "h2", "h3")):
+            self.docs.append({"anchor": anchor, "headings": [], "text": []})
+        if tag in ("h1", "h2", "h3", "h4") and self.capture is None:
+            self.capture = ("heading", len(self.stack))
+            self.docs[-1]["headings"].append("")
+
+    def handle_endtag(self, tag):
+        if tag in _SEARCH_VOID_TAGS or tag not in self.stack:
+            return
+        while self.stack:
+            depth = len(self.stack)
+            if self.capture and self.capture[1] == depth:
+                self.capture = None
+            if self.skip_depth:
+                self.skip_depth -= 1
+            if self.stack.pop() == tag:
+                break
+
+    def handle_data(self, data):
+        if self.capture and self.capture[0] == "title":
+            self.title += data
+            return
+        if self.skip_depth:
+            return
+        doc = self.docs[-1]
+        if self.capture:
+            doc["headings"][-1] += data
+        doc["text"].append(data)
+
+
+def _index_html_page(rel: str, abs_path: str) -> list:
+    """Returns the search documents of one page, or [] for pages marked noindex."""
+    with open(abs_path, "r", encoding="utf-8") as f:
+        collector = _SearchTextCollector()
+        collector.feed(f.read())
+    if "noindex" in collector.meta.get("robots", "").lower():
+        return []
+    page_title = _search_snippet(collector.title) or _search_title_from_name(rel)
+    docs = []
+    for doc in collector.docs:
+        headings = [_search_snippet(h) for h in doc["headings"] if h.strip()]
+        text = " ".join(doc["text"])
+        if not doc["anchor"]:
+            title = page_title
+            description = collector.meta.get("description") or _search_snippet(text)
+        else:
+            if not headings and not text.strip():
+                continue
+            title = headings[0] if headings else doc["anchor"].replace("-", " ").title()
+            description = _search_snippet(text[text.find(title) + len(title):] if title in text else text)
+        terms = {}
+        for field, value in (("title", title), ("heading", " ".join(headings)), ("text", text)):
+            for word in _search_words(value):
+                terms[word] = terms.get(word, 0) + SEARCH_WEIGHTS[field]
+        link = f"{rel}#{doc['anchor']}" if doc["anchor"] else rel
+        docs.append({"title": title, "description": description, "link": link, "terms": terms})
+    return docs
+
+
+def _load_pypdf():
+    """Returns the optional `pypdf` module, or None when it is not installed."""
+    try:
+        return importlib.import_module("pypdf")
+    except ImportError:
+        return None
+
+
+def _index_pdf(rel: str, abs_path: str, pypdf_module) -> list:
+    """One search document per PDF; without pypdf only the file name is indexed."""
+    title = _search_title_from_name(rel)
+    text = ""
+    if pypdf_module is not None:
+        try:
+            reader = pypdf_module.PdfReader(abs_path)
+            text = " ".join(page.extract_text() or "" for page in reader.pages)
+        except (ValueError, pypdf_module.errors.PyPdfError) as e:
+            console.print(f"[yellow]Could not extract text from {rel}:[/yellow] {e}")
+    terms = {}
+    for field, value in (("title", title), ("text", text)):
+        for word in _search_words(value):
+            terms[word] = terms.get(word, 0) + SEARCH_WEIGHTS[field]
+    description = _search_snippet(text) or f"PDF document ({os.path.getsize(abs_path) / 1024:,.0f} KB)"
+    return [{"title": title, "description": description, "link": rel, "terms": terms}]
+
+
+def _compile_search_index(docs: list) -> dict:
+    """Builds {"docs", "prefix", "tri"}: each word prefix and trigram maps to a flat [doc, score, ...] list, best first."""
+    prefix, tri = {}, {}
+    for doc_id, doc in enumerate(docs):
+        best_prefix, best_tri = {}, {}
+        for word, weight in doc["terms"].items():
+            for length in range(SEARCH_MIN_PREFIX, min(len(word), SEARCH_PREFIX_MAX) + 1):
+                key = word[:length]
+                best_prefix[key] = max(best_prefix.get(key, 0), weight)
+            for i in range(len(word) - 2):
+                key = word[i:i + 3]
+                best_tri[key] = max(best_tri.get(key, 0), weight)
+        for target, best in ((prefix, best_prefix), (tri, best_tri)):
+            for key, weight in best.items():
+                target.setdefault(key, []).append((weight, doc_id))
+
+    def flatten(postings):
+        ranked = sorted(postings, key=lambda p: (-p[0], p[1]))[:SEARCH_MAX_POSTINGS]
+        return [value for weight, doc_id in ranked for value in (doc_id, weight)]
+
+    return {
+        "version": SEARCH_CACHE_VERSION,
+        "prefixMax": SEARCH_PREFIX_MAX,
+        "docs": [[doc["title"], doc["description"], doc["link"]] for doc in docs],
+        "prefix": {key: flatten(postings) for key, postings in sorted(prefix.items())},
+        "tri": {key: flatten(postings) for key, postings in sorted(tri.items())},
+    }
+
+
+def build_search_index(site_files: dict = None, verbose: bool = True) -> dict:
+    """Crawls page headings/text and PDF text into SEARCH_INDEX_PATH, served as SEARCH_INDEX_REL; returns a summary."""
+    import importlib.util
+    started = time.perf_counter()
+    if site_files is None:
+        site_files = dict(_iter_site_files())
+    # pypdf is slow to import, so it is only loaded once a PDF actually needs re-indexing
+    has_pypdf = importlib.util.find_spec("pypdf") is not None
+    pypdf_module = None
+    settings = {"weights": SEARCH_WEIGHTS, "chars": SEARCH_DESCRIPTION_CHARS, "pdf": has_pypdf}
+    pages = {rel for rel in site_files if rel not in SEARCH_EXCLUDES and any(_matches_site_pattern(rel, p) for p in SEARCH_PAGES)}
+    sources = {
+        rel: site_files[rel] for rel in sorted(site_files)
+        if rel in pages or rel not in SEARCH_EXCLUDES and any(_matches_site_pattern(rel, p) for p in SEARCH_DOCUMENTS)
+    }
+    graph = get_build_graph()
+    graph_key = dict(settings, version=SEARCH_CACHE_VERSION)
+    stamps = graph.stamp(sources)
+    previous = graph.lookup("search-index", graph_key, stamps)
+    if previous is not None:
+        result = dict(previous, reindexed=0, elapsed_ms=(time.perf_counter() - started) * 1000)
+        if verbose:
+            _print_search_index_report(result, _load_json_cache(SEARCH_CACHE_FILE, SEARCH_CACHE_VERSION, {"files": {}})["files"])
+        return result
+    cache = _load_json_cache(SEARCH_CACHE_FILE, SEARCH_CACHE_VERSION, {"settings": None, "files": {}})
+    if cache["settings"] != settings:
+        cache["files"] = {}
+    cache["settings"] = settings
+    old_files, files = cache["files"], {}
+    reindexed = 0
+
+    for rel, abs_path in sources.items():
+        is_page = rel in pages
+        st = os.stat(abs_path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        old = old_files.get(rel)
+        if old and old["stat"] == stamp:
+            files[rel] = old
+            continue
+        if not is_page and has_pypdf and pypdf_module is None:
+            pypdf_module = _load_pypdf()
+        docs = _index_html_page(rel, abs_path) if is_page else _index_pdf(rel, abs_path, pypdf_module)
+        files[rel] = {"stat": stamp, "docs": docs}
+        reindexed += 1
+
+    docs = [doc for rel in sorted(files) for doc in files[rel]["docs"]]
+    changed = reindexed or old_files.keys() != files.keys() or not os.path.exists(SEARCH_INDEX_PATH)
+    if changed:
+        data = json.dumps(_compile_search_index(docs), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        try:
+            with open(SEARCH_INDEX_PATH, "rb") as f:
+                unchanged = f.read() == data
+        except OSError:
+            unchanged = False
+        if not unchanged:
+            os.makedirs(os.path.dirname(SEARCH_INDEX_PATH), exist_ok=True)
+            with open(SEARCH_INDEX_PATH + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(SEARCH_INDEX_PATH + ".tmp", SEARCH_INDEX_PATH)
+        cache["files"] = files
+        _save_json_cache(SEARCH_CACHE_FILE, cache)
+
+    result = {
+        "path": SEARCH_INDEX_PATH,
+        "files": len(files),
+        "docs": len(docs),
+        "reindexed": reindexed,
+        "bytes": os.path.getsize(SEARCH_INDEX_PATH),
+        "pdf_text": has_pypdf,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+    graph.record("search-index", graph_key, stamps, [SEARCH_INDEX_PATH], result)
+    if verbose:
+        _print_search_index_report(result, files)
+    return result
+
+
+def _print_search_index_report(result: dict, files: dict):
+    table = Table(title="[bold cyan]Search Index[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Source", style="bold cyan", no_wrap=True)
+    table.add_column("Documents", justify="right")
+    table.add_column("Terms", justify="right")
+    for rel, entry in sorted(files.items()):
+        table.add_row(rel, str(len(entry["docs"])), f"{sum(len(doc['terms']) for doc in entry['docs']):,}")
+    console.print(table)
+    console.print(
+        f"[dim]{result['docs']} documents from {result['files']} files ({result['reindexed']} re-indexed); "
+        f"{SEARCH_INDEX_REL} is {result['bytes'] / 1024:,.1f} KB; "
+        f"finished in {result['elapsed_ms']:,.0f} ms.[/dim]"
+    )
+    if not result["pdf_text"]:
+        console.print("[dim yellow]Notice: 'pypdf' is not installed, so PDFs are indexed by file name only (pip install pypdf).[/dim yellow]")
+
+
+def run_search_index():
+    """Menu/CLI wrapper around build_search_index that reports failures."""
+    try:
+        build_search_index()
+        return True
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Search index generation failed:[/bold red] {e}")
+        return False
+
+
+# --- Development server (asyncio HTTP, file watching, CSS hot swap) ---
+
+DEV_SERVER_HOST = "127.0.0.1"
+DEV_SERVER_PORT = 8431
+DEV_RELOAD_PATH = "/__dev/reload"
+# Changes arriving within this window are pushed to the browser as one batch
+DEV_DEBOUNCE_SECONDS = 0.08
+DEV_POLL_INTERVAL = 0.5
+DEV_KEEPALIVE_TIMEOUT = 15
+# Files up to this size are kept in memory; larger ones (PDFs, certificate scans) are sent zero-copy with sendfile
+DEV_MAX_CACHED_BYTES = 256 * 1024
+PREVIEW_SERVER_PORT = 8432
+DEV_WATCH_IGNORE = ("*~", "*.swp", "*.swx", "*.tmp", ".#*", "4913")
+CONTENT_TYPES = {
+    ".html": "text/html; charset=utf-8", ".css": "text/css; charset=utf-8",
+    ".js": "text/javascript; charset=utf-8", ".mjs": "text/javascript; charset=utf-8",
+    ".json": "application/json; charset=utf-8", ".webmanifest": "application/manifest+json; charset=utf-8",
+    ".xml": "application/xml; charset=utf-8", ".txt": "text/plain; charset=utf-8", ".md": "text/markdown; charset=utf-8",
+    ".svg": "image/svg+xml", ".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".gif": "image/gif",
+    ".webp": "image/webp", ".avif": "image/avif", ".ico": "image/x-icon", ".pdf": "application/pdf",
+    ".woff": "font/woff", ".woff2": "font/woff2", ".ttf": "font/ttf", ".otf": "font/otf",
+}
+
+# The real sw.js serves core files precache-first, which would hide every edit during development.
+# The dev server answers with a worker that unregisters itself and drops this origin's caches.
+_DEV_SERVICE_WORKER = b"""self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', (event) => event.waitUntil(
+    caches.keys()
+        .then((keys) => Promise.all(keys.map((key) => caches.delete(key))))
+        .then(() => self.registration.unregister())
+));
+"""
+
+_DEV_CLIENT_SCRIPT = """<script data-dev-reload>(() => {
+    const url = (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '__RELOAD_PATH__';
+    let attempts = 0;
+    const pathOf = (href) => decodeURIComponent(new URL(href, location.href).pathname).replace(/^\\//, '');
+    const swapCss = (path) => {
+        const links = [...document.querySelectorAll('link[rel="stylesheet"], link[rel="preload"][as="style"]')]
+            .filter((link) => new URL(link.href).origin === location.origin && pathOf(link.href) === path);
+        for (const link of links) {
+            const next = link.cloneNode();
+            const href = new URL(link.href);
+            href.searchParams.set('__hot', Date.now());
+            next.removeAttribute('onload');
+            next.rel = 'stylesheet';
+            next.href = href.href;
+            next.onload = () => link.remove();
+            link.after(next);
+        }
+        return links.length > 0;
+    };
+    const connect = () => {
+        const socket = new WebSocket(url);
+        socket.onopen = () => { if (attempts) location.reload(); };
+        socket.onmessage = (event) => {
+            const message = JSON.parse(event.data);
+            if (message.type === 'css' && message.paths.every((path) => swapCss(path))) return;
+            location.reload();
+        };
+        socket.onclose = () => { attempts += 1; setTimeout(connect, Math.min(500 * attempts, 5000)); };
+    };
+    connect();
+})();</script>
+""".replace("__RELOAD_PATH__", DEV_RELOAD_PATH)
+
+# Build outputs named `name.<sha10>.ext` (bundles) or `name.<sha10>-<width>.ext` (image variants)
+_IMMUTABLE_ASSET_RE = _LazyPattern(r"\.[0-9a-f]{10}(?:-\d+)?\.\w+$")
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_IN_ATTRIB, _IN_CLOSE_WRITE, _IN_MOVED_FROM, _IN_MOVED_TO = 0x4, 0x8, 0x40, 0x80
+_IN_CREATE, _IN_DELETE, _IN_Q_OVERFLOW, _IN_IGNORED, _IN_ISDIR = 0x100, 0x200, 0x4000, 0x8000, 0x40000000
+# IN_ATTRIB makes `touch` count as a change, matching what the mtime-polling fallback sees
+_INOTIFY_MASK = _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+def _content_type(path: str) -> str:
+    import mimetypes
+    ext = os.path.splitext(path)[1].lower()
+    return CONTENT_TYPES.get(ext) or mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def _websocket_frame(payload: bytes, opcode: int = 0x1) -> bytes:
+    """Encodes one unmasked, unfragmented server-to-client WebSocket frame."""
+    import struct
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def _inject_reload_client(body: bytes) -> bytes:
+    script = _DEV_CLIENT_SCRIPT.encode("utf-8")
+    idx = body.lower().rfind(b"</body>")
+    return body[:idx] + script + body[idx:] if idx != -1 else body + script
+
+
+class _InotifyWatcher:
+    """Recursive inotify watch over the site tree through ctypes (Linux only)."""
+
+    def __init__(self, on_change):
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.on_change = on_change
+        self.dirs = {}
+        try:
+            self._watch_tree("")
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _watch_tree(self, rel_root: str):
+        import ctypes
+        for dirpath, dirnames, _ in os.walk(os.path.join(ROOT_DIR, rel_root)):
+            rel_dir = os.path.relpath(dirpath, ROOT_DIR).replace(os.sep, "/")
+            rel_dir = "" if rel_dir == "." else rel_dir
+            wd = self._add_watch(self.fd, os.fsencode(dirpath), _INOTIFY_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {dirpath}")
+            self.dirs[wd] = rel_dir
+            dirnames[:] = _site_subdirs(rel_dir, dirnames)
+
+    def read_events(self):
+        """Event-loop reader callback: drains the inotify fd and reports changed site paths."""
+        import struct
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = struct.unpack_from("iIII", data, offset)
+            name = os.fsdecode(data[offset + 16:offset + 16 + length].rstrip(b"\0"))
+            offset += 16 + length
+            if mask & _IN_Q_OVERFLOW:
+                self.on_change(None)
+                continue
+            if mask & _IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            rel_dir = self.dirs.get(wd)
+            if rel_dir is None or not name:
+                continue
+            rel = f"{rel_dir}/{name}" if rel_dir else name
+            if mask & _IN_ISDIR:
+                if not _site_subdirs(rel_dir, [name]):
+                    continue
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self._watch_tree(rel)
+            elif not rel_dir and (name in BUILD_EXCLUDES or name.startswith(".")):
+                continue
+            self.on_change(rel)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _snapshot_site_files() -> dict:
+    snapshot = {}
+    for rel, abs_path in _iter_site_files():
+        try:
+            st = os.stat(abs_path)
+        except FileNotFoundError:
+            continue
+        snapshot[rel] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+async def _poll_site_changes(on_change):
+    """Fallback watcher for platforms without inotify: compares stat snapshots of the site tree."""
+    import asyncio
+    loop = asyncio.get_running_loop()
+    previous = await loop.run_in_executor(None, _snapshot_site_files)
+    while True:
+        await asyncio.sleep(DEV_POLL_INTERVAL)
+        current = await loop.run_in_executor(None, _snapshot_site_files)
+        for rel in previous.keys() | current.keys():
+            if previous.get(rel) != current.get(rel):
+                on_change(rel)
+        previous = current
+
+
+class DevServer:
+    """Asyncio static file server with live reload over a WebSocket; with `production`, serves dist/ like a CDN."""
+
+    def __init__(self, root: str = ROOT_DIR, production: bool = False):
+        import asyncio
+        self.root = os.path.realpath(root)
+        self.production = production
+        self.files = {}
+        self.clients = set()
+        self.pending = set()
+        self.flush_handle = None
+        self.watcher = None
+        self.poller = None
+        self.requests = 0
+        self.tracer = get_tracer()
+        self.connections = set()
+        # Preview only: `stale` is set by source edits, `idle` is cleared while dist/ is rebuilt
+        self.stale = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.idle.set()
+
+    def start_watching(self) -> str:
+        """Starts the inotify watcher, falling back to mtime polling; returns the mode in use."""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        try:
+            self.watcher = _InotifyWatcher(self.on_change)
+            loop.add_reader(self.watcher.fd, self.watcher.read_events)
+            return "inotify"
+        except (OSError, AttributeError, TypeError, NotImplementedError):
+            if self.watcher:
+                self.watcher.close()
+                self.watcher = None
+            self.poller = loop.create_task(_poll_site_changes(self.on_change))
+            return "mtime polling"
+
+    def stop_watching(self):
+        import asyncio
+        if self.watcher:
+            asyncio.get_running_loop().remove_reader(self.watcher.fd)
+            self.watcher.close()
+            self.watcher = None
+        if self.poller:
+            self.poller.cancel()
+
+    async def watch(self):
+        """Supervisor worker: keeps the watcher from start_watching() running until cancelled."""
+        import asyncio
+        try:
+            await (self.poller if self.poller else asyncio.Event().wait())
+        finally:
+            self.stop_watching()
+
+    def close_connections(self):
+        for writer in list(self.connections):
+            writer.close()
+
+    def on_change(self, rel):
+        """Records a changed site path (None means "unknown, reload everything") and schedules a push."""
+        import fnmatch
+        import asyncio
+        if rel is not None:
+            if any(fnmatch.fnmatch(posixpath.basename(rel), pattern) for pattern in DEV_WATCH_IGNORE):
+                return
+            self.files.pop(os.path.normpath(os.path.join(self.root, rel)), None)
+        else:
+            self.files.clear()
+        self.pending.add(rel or "*")
+        if self.flush_handle is None:
+            self.flush_handle = asyncio.get_running_loop().call_later(DEV_DEBOUNCE_SECONDS, self._flush_changes)
+
+    def _flush_changes(self):
+        changed, self.pending, self.flush_handle = sorted(self.pending), set(), None
+        if self.production:
+            self.stale.set()  # the preview build worker picks it up
+            return
+        css_only = all(rel.endswith(".css") for rel in changed)
+        self.broadcast({"type": "css" if css_only else "reload", "paths": changed})
+        shown = ", ".join(changed[:3]) + (f" (+{len(changed) - 3} more)" if len(changed) > 3 else "")
+        action = "[cyan]CSS hot-swap[/cyan]" if css_only else "[yellow]Reload[/yellow]"
+        console.print(f"[dim]{time.strftime('%H:%M:%S')}[/dim] {action} {shown} [dim]→ {len(self.clients)} page(s)[/dim]")
+
+    def broadcast(self, message: dict):
+        frame = _websocket_frame(json.dumps(message).encode("utf-8"))
+        for writer in list(self.clients):
+            if writer.is_closing():
+                self.clients.discard(writer)
+            else:
+                writer.write(frame)
+
+    async def handle_connection(self, reader, writer):
+        import urllib.parse
+        import asyncio
+        self.connections.add(writer)
+        try:
+            while True:
+                request = await asyncio.wait_for(self._read_request(reader), DEV_KEEPALIVE_TIMEOUT)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                self.requests += 1
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                if urllib.parse.urlsplit(target).path == DEV_RELOAD_PATH and headers.get("upgrade", "").lower() == "websocket":
+                    await self._serve_websocket(reader, writer, headers)
+                    break
+                if not self.idle.is_set():
+                    await self.idle.wait()
+                started_ns = time.perf_counter_ns()
+                await self._respond(writer, method, target, headers, keep_alive)
+                self.tracer.observe_request(f"{method} {target.partition('?')[0]}", started_ns, time.perf_counter_ns())
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError(f"Malformed request line: {line!r}")
+        headers = {}
+        while True:
+            header_line = await reader.readline()
+            if header_line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = header_line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if int(headers.get("content-length") or 0):
+            await reader.readexactly(int(headers["content-length"]))
+        return parts[0].upper(), parts[1], parts[2].upper(), headers
+
+    async def _send(self, writer, status: int, headers: dict, body: bytes = b"", keep_alive: bool = True, head_only: bool = False):
+        import http
+        head = [f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}"]
+        if status != 304:
+            headers.setdefault("Content-Length", str(len(body)))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        head.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + (b"" if head_only else body))
+        await writer.drain()
+
+    def _load_file(self, abs_path: str, st) -> tuple:
+        """Returns (stamp, body, etag, last_modified) for a small file, reading it only when its stat changed."""
+        import email.utils
+        import hashlib
+        stamp = (st.st_mtime_ns, st.st_size)
+        entry = self.files.get(abs_path)
+        if entry and entry[0] == stamp:
+            return entry
+        with open(abs_path, "rb") as f:
+            body = f.read()
+        if not self.production and abs_path.endswith(".html"):
+            body = _inject_reload_client(body)
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        entry = (stamp, body, etag, email.utils.formatdate(st.st_mtime, usegmt=True))
+        self.files[abs_path] = entry
+        return entry
+
+    def _resolve_path(self, url_path: str):
+        """Maps a URL path to (abs_path, stat) the way GitHub Pages does: dir/index.html, then name.html."""
+        rel = posixpath.normpath("/" + url_path).lstrip("/")
+        abs_path = os.path.normpath(os.path.join(self.root, rel))
+        candidates = [os.path.join(abs_path, "index.html")] if url_path.endswith("/") else [abs_path, abs_path + ".html"]
+        for candidate in candidates:
+            try:
+                st = os.stat(candidate)
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            if not os.path.isdir(candidate):
+                return candidate, st
+        return None, None
+
+    def _search_index_file(self):
+        """The search index is generated rather than stored in the tree; refresh it (incrementally) on request."""
+        try:
+            path = build_search_index(verbose=False)["path"]
+            return path, os.stat(path)
+        except (OSError, ValueError) as e:
+            console.print(f"[yellow]Search index unavailable:[/yellow] {e}")
+            return None, None
+
+    def _negotiate_encoding(self, abs_path: str, headers: dict) -> tuple:
+        """Picks the precompressed .br/.gz sibling the client accepts; returns (path, encoding, has_variants)."""
+        if not self.production:
+            return abs_path, None, False
+        accepted = _accepted_encodings(headers.get("accept-encoding", ""))
+        has_variants = False
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if os.path.isfile(abs_path + suffix):
+                has_variants = True
+                if encoding in accepted:
+                    return abs_path + suffix, encoding, True
+        return abs_path, None, has_variants
+
+    async def _respond(self, writer, method: str, target: str, headers: dict, keep_alive: bool):
+        import email.utils
+        import urllib.parse
+        import asyncio
+        if method not in ("GET", "HEAD"):
+            await self._send(writer, 405, {"Allow": "GET, HEAD"}, keep_alive=keep_alive)
+            return
+        head_only = method == "HEAD"
+        parts = urllib.parse.urlsplit(target)
+        url_path = urllib.parse.unquote(parts.path)
+        if not self.production and url_path.lstrip("/") == SW_FILE:
+            response = {"Content-Type": _content_type(SW_FILE), "Cache-Control": "no-store"}
+            await self._send(writer, 200, response, _DEV_SERVICE_WORKER, keep_alive, head_only)
+            return
+        rel = posixpath.normpath("/" + url_path).lstrip("/")
+        if not url_path.endswith("/") and os.path.isdir(os.path.join(self.root, rel)):
+            location = parts.path + "/" + (f"?{parts.query}" if parts.query else "")
+            await self._send(writer, 301, {"Location": location}, keep_alive=keep_alive)
+            return
+        status = 200
+        loop = asyncio.get_running_loop()
+        if rel == SEARCH_INDEX_REL and not self.production:
+            abs_path, st = await loop.run_in_executor(None, self._search_index_file)
+        else:
+            abs_path, st = self._resolve_path(url_path)
+        if abs_path is None:
+            status = 404
+            abs_path, st = self._resolve_path("/404.html")
+            if abs_path is None:
+                body = f"404 Not Found: {url_path}".encode("utf-8")
+                await self._send(writer, 404, {"Content-Type": "text/plain; charset=utf-8"}, body, keep_alive, head_only)
+                return
+
+        content_type = _content_type(abs_path)
+        body_path, encoding, has_variants = self._negotiate_encoding(abs_path, headers)
+        if body_path != abs_path:
+            st = os.stat(body_path)
+        large = st.st_size > DEV_MAX_CACHED_BYTES
+        if large:
+            etag = f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+            last_modified = email.utils.formatdate(st.st_mtime, usegmt=True)
+        else:
+            entry = self.files.get(body_path)
+            if not entry or entry[0] != (st.st_mtime_ns, st.st_size):
+                entry = await loop.run_in_executor(None, self._load_file, body_path, st)
+            _, body, etag, last_modified = entry
+
+        response = {"Content-Type": content_type, "ETag": etag, "Last-Modified": last_modified}
+        if self.production and _IMMUTABLE_ASSET_RE.search(abs_path):
+            response["Cache-Control"] = "public, max-age=31536000, immutable"
+        else:
+            response["Cache-Control"] = "no-cache"
+        if encoding:
+            response["Content-Encoding"] = encoding
+        if has_variants:
+            response["Vary"] = "Accept-Encoding"
+        if status == 200 and _is_not_modified(headers, etag, st.st_mtime):
+            await self._send(writer, 304, response, keep_alive=keep_alive)
+            return
+        if not large:
+            await self._send(writer, status, response, body, keep_alive, head_only)
+            return
+        # Byte ranges let PDF.js fetch a linearized PDF's first page before the rest of the file
+        response["Content-Length"] = str(st.st_size)
+        response["Accept-Ranges"] = "bytes"
+        offset, count = 0, st.st_size
+        if status == 200 and not encoding and "range" in headers and headers.get("if-range", etag) in (etag, last_modified):
+            byte_range = _parse_byte_range(headers["range"], st.st_size)
+            if byte_range == ():
+                await self._send(writer, 416, {"Content-Range": f"bytes */{st.st_size}"}, keep_alive=keep_alive)
+                return
+            if byte_range:
+                status, offset, count = 206, byte_range[0], byte_range[1] - byte_range[0] + 1
+                response["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{st.st_size}"
+                response["Content-Length"] = str(count)
+        await self._send(writer, status, response, keep_alive=keep_alive)
+        if not head_only:
+            with open(body_path, "rb") as f:
+                await loop.sendfile(writer.transport, f, offset, count)
+
+    async def _serve_websocket(self, reader, writer, headers: dict):
+        import base64
+        import hashlib
+        import struct
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._send(writer, 400, {}, keep_alive=False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + _WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+        self.clients.add(writer)
+        try:
+            while True:
+                first, second = await reader.readexactly(2)
+                opcode, length = first & 0x0F, second & 0x7F
+                if length == 126:
+                    length = struct.unpack("!H", await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack("!Q", await reader.readexactly(8))[0]
+                mask = await reader.readexactly(4) if second & 0x80 else b""
+                payload = await reader.readexactly(length)
+                if opcode == 0x8:
+                    writer.write(_websocket_frame(b"", 0x8))
+                    break
+                if opcode == 0x9:
+                    if mask:
+                        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+                    writer.write(_websocket_frame(payload, 0xA))
+        finally:
+            self.clients.discard(writer)
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Parses Accept-Encoding, dropping codings explicitly refused with q=0."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if params and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        if name:
+            accepted.add(name.strip())
+    return accepted
+
+
+def _parse_byte_range(value: str, size: int):
+    """Returns (first, last) for a single `bytes=` range, None to send the whole file, or () when unsatisfiable."""
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", value)
+    if not match or not any(match.groups()):
+        return None  # multiple or malformed ranges get the full body
+    first, last = match.groups()
+    if first:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(0, size - int(last)), size - 1
+    return (start, end) if start <= end else ()
+
+
+def _is_not_modified(headers: dict, etag: str, mtime: float) -> bool:
+    """Evaluates If-None-Match (preferred) or If-Modified-Since against the current validators."""
+    import email.utils
+    if_none_match = headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+# --- Server supervisor (port reservation, stale server reclaim, managed workers) ---
+
+SERVER_STATE_FILE = os.path.join(CACHE_DIR, "servers.json")
+SERVER_STATE_VERSION = 1
+SERVER_DEFAULT_PORTS = {"dev": DEV_SERVER_PORT, "preview": PREVIEW_SERVER_PORT}
+# How long a reclaimed server gets to exit and release its port
+SERVER_RECLAIM_TIMEOUT = 2.0
+# Source edits arriving within this window trigger one preview rebuild
+PREVIEW_REBUILD_DEBOUNCE = 0.3
+_TCP_LISTEN = "0A"  # socket state column of /proc/net/tcp
+
+
+def server_port(mode: str) -> int:
+    """The port the `mode` ("dev" or "preview") server used last, else its default."""
+    entry = _load_json_cache(SERVER_STATE_FILE, SERVER_STATE_VERSION, {"servers": {}})["servers"].get(mode, {})
+    return entry.get("port") or SERVER_DEFAULT_PORTS[mode]
+
+
+def _record_server(mode: str, port: int, pid):
+    state = _load_json_cache(SERVER_STATE_FILE, SERVER_STATE_VERSION, {"servers": {}})
+    state["servers"][mode] = {"port": port, "pid": pid}
+    _save_json_cache(SERVER_STATE_FILE, state)
+
+
+def _listening_pids(port: int) -> set:
+    """PIDs with a TCP socket listening on `port`: /proc on Linux, netstat on Windows, lsof elsewhere."""
+    import shutil
+    import subprocess
+    if os.path.isdir("/proc/net"):
+        inodes = set()
+        for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+            try:
+                with open(table, "r", encoding="ascii") as f:
+                    rows = f.read().splitlines()[1:]
+            except OSError:
+                continue
+            for fields in map(str.split, rows):
+                if len(fields) > 9 and fields[3] == _TCP_LISTEN and int(fields[1].rpartition(":")[2], 16) == port:
+                    inodes.add(f"socket:[{fields[9]}]")
+        pids = set()
+        if not inodes:
+            return pids
+        for entry in os.scandir("/proc"):
+            if not entry.name.isdigit():
+                continue
+            try:
+                fds = os.listdir(f"/proc/{entry.name}/fd")
+            except OSError:
+                continue  # another user's process, or it just exited
+            for fd in fds:
+                try:
+                    if os.readlink(f"/proc/{entry.name}/fd/{fd}") in inodes:
+                        pids.add(int(entry.name))
+                        break
+                except OSError:
+                    continue
+        return pids
+    if os.name == "nt":
+        command = ["netstat", "-ano", "-p", "TCP"]
+    elif shutil.which("lsof"):
+        command = ["lsof", "-nP", "-t", f"-iTCP:{port}", "-sTCP:LISTEN"]
+    else:
+        return set()
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, timeout=5).stdout
+    except (OSError, subprocess.SubprocessError):
+        return set()
+    if os.name != "nt":
+        return {int(line) for line in output.split() if line.isdigit()}
+    return {
+        int(fields[-1]) for fields in map(str.split, output.splitlines())
+        if len(fields) >= 5 and fields[3] == "LISTENING" and fields[1].endswith(f":{port}") and fields[-1].isdigit()
+    }
+
+
+def _is_own_server(pid: int, recorded_pid) -> bool:
+    """Whether `pid` runs this project's manager (checked through /proc), or is the PID it recorded."""
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            args = [os.fsdecode(arg) for arg in f.read().split(b"\0")[1:] if arg]
+        cwd = os.readlink(f"/proc/{pid}/cwd")
+    except OSError:
+        return pid == recorded_pid
+    manager_paths = {os.path.realpath(_MANAGER_SOURCE), os.path.realpath(os.path.dirname(_MANAGER_SOURCE))}
+    return any(os.path.realpath(os.path.join(cwd, arg)) in manager_paths for arg in args)
+
+
+def _bind_port(port: int):
+    # create_server sets SO_REUSEADDR on POSIX (restarts are not blocked by TIME_WAIT) but not on
+    # Windows, where it would let two servers share the port
+    import socket
+    return socket.create_server((DEV_SERVER_HOST, port))
+
+
+def reserve_server_socket(mode: str, port: int = None):
+    """Binds the listening socket of the `mode` server on `port`, its last or default port, or a free one."""
+    import signal
+    entry = _load_json_cache(SERVER_STATE_FILE, SERVER_STATE_VERSION, {"servers": {}})["servers"].get(mode, {})
+    candidates = [port] if port else list(dict.fromkeys(filter(None, (entry.get("port"), SERVER_DEFAULT_PORTS[mode]))))
+    for candidate in candidates:
+        try:
+            return _bind_port(candidate)
+        except OSError:
+            pass
+        recorded_pid = entry.get("pid") if entry.get("port") == candidate else None
+        stale = {pid for pid in _listening_pids(candidate) if pid != os.getpid() and _is_own_server(pid, recorded_pid)}
+        for pid in stale:
+            try:
+                os.kill(pid, signal.SIGTERM)  # TerminateProcess on Windows
+                console.print(f"[dim]Stopped a leftover server (PID {pid}) on port {candidate}.[/dim]")
+            except OSError:
+                pass
+        deadline = time.monotonic() + (SERVER_RECLAIM_TIMEOUT if stale else 0)
+        while time.monotonic() < deadline:
+            time.sleep(0.02)  # waiting for the process to exit, not for a port probe
+            try:
+                return _bind_port(candidate)
+            except OSError:
+                pass
+    if port:
+        raise OSError(f"port {port} is in use by another program")
+    return _bind_port(0)
+
+
+class ServerSupervisor:
+    """Runs a server's background workers (serving, watching, rebuilding) and stops them together."""
+
+    def __init__(self, mode: str, sock):
+        self.mode = mode
+        self.sock = sock
+        self.port = sock.getsockname()[1]
+        self.workers = []
+        self.jobs = set()
+        self.cleanups = []
+
+    def spawn(self, name: str, coro):
+        import asyncio
+        self.workers.append(asyncio.get_running_loop().create_task(coro, name=f"{self.mode}-{name}"))
+
+    async def run_blocking(self, func, *args):
+        """Runs `func` in the executor; shutdown waits for it even when the awaiting worker is cancelled."""
+        import asyncio
+        future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        self.jobs.add(future)
+        future.add_done_callback(self.jobs.discard)
+        return await asyncio.shield(future)
+
+    async def run(self):
+        """Serves until a worker exits (or fails, re-raising its error) or the task is cancelled."""
+        import asyncio
+        _record_server(self.mode, self.port, os.getpid())
+        try:
+            done, _ = await asyncio.wait(self.workers, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        import asyncio
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        for cleanup in self.cleanups:
+            cleanup()
+        if self.jobs:
+            console.print("[dim]Waiting for the running build to finish...[/dim]")
+            await asyncio.gather(*self.jobs, return_exceptions=True)
+        _record_server(self.mode, self.port, None)
+
+
+async def _rebuild_dist(server: "DevServer", supervisor: ServerSupervisor, initial: bool = False) -> bool:
+    """Rebuilds dist/ for the preview server; requests wait until it is done. Returns False on failure."""
+    server.idle.clear()
+    try:
+        stats = await supervisor.run_blocking(_traced_stage, "build", build_production_bundle, False)
+    except Exception as e:
+        console.print(f"[bold red]Build failed:[/bold red] {e}")
+        return False
+    finally:
+        server.files.clear()
+        server.idle.set()
+    if initial:
+        console.print(f"[dim]dist/ up to date ({stats['rebuilt']} rebuilt, {stats['skipped']} unchanged).[/dim]")
+    else:
+        console.print(f"[dim]{time.strftime('%H:%M:%S')}[/dim] [yellow]Rebuilt dist/[/yellow] [dim]({stats['rebuilt']} file(s) changed)[/dim]")
+    return True
+
+
+async def _preview_build_worker(server: "DevServer", supervisor: ServerSupervisor):
+    """Builds dist/ once, then again after every batch of source edits."""
+    import asyncio
+    if not await _rebuild_dist(server, supervisor, initial=True):
+        return  # nothing trustworthy to serve; ends the preview
+    while True:
+        await server.stale.wait()
+        await asyncio.sleep(PREVIEW_REBUILD_DEBOUNCE)
+        server.stale.clear()
+        await _rebuild_dist(server, supervisor)
+
+
+async def _serve_site(port: int = None, open_browser: bool = True, production: bool = False, dashboard: bool = False):
+    """Serves the site (or dist/) under a ServerSupervisor until Ctrl+C; `port` None picks one via reserve_server_socket."""
+    import asyncio
+    started = time.perf_counter()
+    mode = "preview" if production else "dev"
+    server = DevServer(DIST_DIR if production else ROOT_DIR, production=production)
+    supervisor = ServerSupervisor(mode, reserve_server_socket(mode, port))
+    listener = await asyncio.start_server(server.handle_connection, sock=supervisor.sock)
+    url = f"http://localhost:{supervisor.port}/"
+    watch_mode = server.start_watching()
+    supervisor.spawn("serve", listener.serve_forever())
+    supervisor.spawn("watch", server.watch())
+    supervisor.cleanups.append(server.close_connections)
+    ready_ms = (time.perf_counter() - started) * 1000
+    if production:
+        supervisor.spawn("build", _preview_build_worker(server, supervisor))
+        console.print(Panel(
+            f"[bold green]📦 Production preview listening after {ready_ms:,.0f} ms[/bold green]\n\n"
+            f"URL: [bold underline]{url}[/bold underline]\n"
+            f"Serving: [dim]dist/ with br/gzip negotiation, immutable hashed assets, real service worker[/dim]\n"
+            f"Rebuilding: [dim]dist/ on source changes via {watch_mode} (requests wait for the build)[/dim]\n\n"
+            f"[bold red][Ctrl+C][/bold red] to stop the server & return to menu.",
+            title="[bold cyan]Production Preview Server[/bold cyan]",
+            border_style="cyan"
+        ))
+    else:
+        console.print(Panel(
+            f"[bold green]🚀 Live development server ready in {ready_ms:,.0f} ms[/bold green]\n\n"
+            f"URL: [bold underline]{url}[/bold underline]\n"
+            f"Watching: [dim]site files via {watch_mode} (CSS hot-swaps, everything else reloads)[/dim]\n\n"
+            f"[bold red][Ctrl+C][/bold red] to stop the server & return to menu.",
+            title="[bold cyan]Hot-Reload Server[/bold cyan]",
+            border_style="cyan"
+        ))
+    if dashboard:
+        supervisor.spawn("dashboard", _dashboard_worker())
+    if open_browser:
+        # The socket is already listening, so the first request is queued rather than refused
+        asyncio.get_running_loop().run_in_executor(None, open_url_in_browser, url)
+    try:
+        await supervisor.run()
+    finally:
+        console.print(f"[dim]Served {server.requests:,} requests.[/dim]")
+
+
+# --- Performance budget audit (offline, Lighthouse-style budgets) ---
+
+BUDGETS_PATH = os.path.join(ROOT_DIR, "manager", "budgets.json")
+AUDIT_CACHE_FILE = os.path.join(CACHE_DIR, "audit.json")
+AUDIT_CACHE_VERSION = 1
+AUDIT_PAGES = CRITICAL_CSS_PAGES
+RESOURCE_TYPES = ("document", "stylesheet", "script", "image", "font", "other")
+# Source files are not compressed on disk, so their transfer size is estimated with gzip at the CDN's usual level
+AUDIT_GZIP_LEVEL = 6
+
+_FONT_EXTS = (".woff2", ".woff", ".ttf", ".otf", ".eot")
+_IMAGE_EXTS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico")
+_FONT_FACE_RE = _LazyPattern(r"@font-face\s*\{[^}]*\}", re.I)
+_CSS_URL_RE = _LazyPattern(r"""@import\s+(?:url\(\s*)?["']?([^"')\s;]+)|url\(\s*["']?([^"')]+?)["']?\s*\)""", re.I)
+_JS_STATIC_IMPORT_RE = _LazyPattern(
+    r"""(?:^|[;}\n])\s*(?:import|export)\b[^'"`;()]*?\bfrom\s*["']([^"']+)["']|(?:^|[;}\n])\s*import\s*["']([^"']+)["']"""
+)
+_JS_DYNAMIC_IMPORT_RE = _LazyPattern(r"""\bimport\s*\(\s*["']([^"']+)["']\s*\)""")
+_PRELOAD_AS_TYPES = {"style": "stylesheet", "script": "script", "font": "font", "image": "image"}
+
+
+class _PageResourceCollector(_HTMLCollector):
+    """Collects a page's subresources as [type, url, blocking] links, ignoring <noscript> and <template> content."""
+
+    def __init__(self):
+        self.links = []
+        self.inline_css = []
+        self.inline_modules = []
+        self.hidden_depth = 0
+        self.capture = None
+        self.in_picture = False
+        self.picture_source_taken = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("noscript", "template"):
+            self.hidden_depth += 1
+        if self.hidden_depth:
+            return
+        attrs = {name: value or "" for name, value in attrs}
+        if tag == "link":
+            rel = set(attrs.get("rel", "").lower().split())
+            href = attrs.get("href")
+            if not href:
+                return
+            if "stylesheet" in rel:
+                blocking = attrs.get("media", "all").lower() not in ("print", "not all") and "disabled" not in attrs
+                self.links.append(["stylesheet", href, blocking])
+            elif "preload" in rel:
+                self.links.append([_PRELOAD_AS_TYPES.get(attrs.get("as", ""), "other"), href, False])
+            elif "modulepreload" in rel:
+                self.links.append(["module", href, False])
+            elif rel & {"icon", "apple-touch-icon"}:
+                self.links.append(["image", href, False])
+            elif "manifest" in rel:
+                self.links.append(["other", href, False])
+        elif tag == "script":
+            script_type = attrs.get("type", "").lower()
+            src = attrs.get("src")
+            if script_type == "module":
+                if src:
+                    self.links.append(["module", src, False])
+                else:
+                    self.capture = self.inline_modules
+            elif src and script_type in ("", "text/javascript", "application/javascript"):
+                self.links.append(["script", src, "async" not in attrs and "defer" not in attrs])
+        elif tag == "style":
+            self.capture = self.inline_css
+        elif tag == "picture":
+            self.in_picture, self.picture_source_taken = True, False
+        elif tag == "source" and self.in_picture and attrs.get("srcset") and not self.picture_source_taken:
+            # The browser downloads one candidate; the widest is the upper bound a budget should cover
+            candidates = [c.strip().split()[0] for c in attrs["srcset"].split(",") if c.strip()]
+            self.links.append(["image", candidates[-1], False])
+            self.picture_source_taken = True
+        elif tag == "img" and attrs.get("src") and not self.picture_source_taken:
+            self.links.append(["image", attrs["src"], False])
+
+    def handle_endtag(self, tag):
+        if tag in ("noscript", "template"):
+            self.hidden_depth = max(0, self.hidden_depth - 1)
+        elif tag in ("script", "style"):
+            self.capture = None
+        elif tag == "picture":
+            self.in_picture = self.picture_source_taken = False
+
+    def handle_data(self, data):
+        if self.capture is not None:
+            self.capture.append(data)
+
+
+def _css_references(css: str) -> list:
+    """Returns [type, url] for @import, font and image references; only the first source of each @font-face counts."""
+    css = _CSS_COMMENT_RE.sub(lambda m: m.group(1) or "", css)
+    refs = []
+    for block in _FONT_FACE_RE.findall(css):
+        match = _CSS_URL_RE.search(block)
+        if match and match.group(2):
+            refs.append(["font", match.group(2)])
+    for imported, url in _CSS_URL_RE.findall(_FONT_FACE_RE.sub("", css)):
+        if imported:
+            refs.append(["stylesheet", imported])
+            continue
+        ext = posixpath.splitext(url.split("?", 1)[0].split("#", 1)[0])[1].lower()
+        refs.append(["font" if ext in _FONT_EXTS else "image" if ext in _IMAGE_EXTS else "other", url])
+    return refs
+
+
+def _js_imports(source: str) -> list:
+    """Returns [specifier, lazy] for the static and dynamic imports of an ES module."""
+    source = minify_js(source)  # drops comments so commented-out imports are not followed
+    imports = [[a or b, False] for a, b in _JS_STATIC_IMPORT_RE.findall(source)]
+    imports.extend([spec, True] for spec in _JS_DYNAMIC_IMPORT_RE.findall(source))
+    return imports
+
+
+def _analyse_audit_file(root: str, rel: str, dist: bool) -> dict:
+    """Returns {"transfer", "links", "css", "imports"} for one file (the expensive part, cached by stat)."""
+    import gzip
+    abs_path = os.path.join(root, rel)
+    with open(abs_path, "rb") as f:
+        data = f.read()
+    transfer = len(data)
+    if dist:
+        for suffix in (".br", ".gz"):
+            if os.path.exists(abs_path + suffix):
+                transfer = os.path.getsize(abs_path + suffix)
+                break
+    elif rel.endswith(COMPRESSIBLE_EXTS) and len(data) >= MIN_COMPRESS_BYTES:
+        transfer = min(transfer, len(gzip.compress(data, AUDIT_GZIP_LEVEL, mtime=0)))
+    info = {"transfer": transfer, "links": [], "css": [], "imports": []}
+    if rel.endswith(".html"):
+        collector = _PageResourceCollector()
+        collector.feed(data.decode("utf-8", errors="replace"))
+        info["links"] = collector.links
+        info["css"] = _css_references("".join(collector.inline_css))
+        info["imports"] = _js_imports("".join(collector.inline_modules)) if collector.inline_modules else []
+    elif rel.endswith(".css"):
+        info["css"] = _css_references(data.decode("utf-8", errors="replace"))
+    elif rel.endswith((".js", ".mjs")):
+        info["imports"] = _js_imports(data.decode("utf-8", errors="replace"))
+    return info
+
+
+def audit_page(page_rel: str, info_for, root: str = ROOT_DIR) -> dict:
+    """Walks a page's transitive requests (stylesheets and @imports, fonts, images, ES-module graph); returns them with totals."""
+    requests, missing = {}, []
+    site_file = _site_file_exists(root)
+
+    def add(kind, ref, from_rel, critical, page_level=False, lazy=False):
+        if ref.startswith(_UNFETCHED_REF_PREFIXES):
+            return
+        if _is_external_ref(ref):
+            status, target = "external", ref
+        else:
+            status, target = "local", _resolve_asset_ref(from_rel, ref, site_file, root_fallback=page_level)
+            if target is None:
+                missing.append((from_rel, ref))
+                return
+        entry = requests.get(target)
+        if entry:
+            entry["lazy"] = entry["lazy"] and lazy
+            if entry["critical"] or not critical or kind != "stylesheet":
+                entry["critical"] = entry["critical"] or critical
+                return
+            entry["critical"] = True  # walk it again so its @imports join the critical path too
+        if status == "external":
+            requests[target] = {"type": "script" if kind == "module" else kind, "bytes": 0, "critical": critical,
+                                "third_party": True, "lazy": lazy}
+            return
+        info = info_for(target)
+        if not entry:
+            requests[target] = {"type": "script" if kind == "module" else kind, "bytes": info["transfer"],
+                                "critical": critical, "third_party": False, "lazy": lazy}
+        if kind == "stylesheet":
+            for css_kind, url in info["css"]:
+                add(css_kind, url, target, critical and css_kind == "stylesheet", lazy=lazy)
+        elif kind == "module" and not entry:
+            for spec, is_lazy in info["imports"]:
+                add("module", spec, target, False, lazy=lazy or is_lazy)
+
+    page_info = info_for(page_rel)
+    requests[page_rel] = {"type": "document", "bytes": page_info["transfer"], "critical": True,
+                          "third_party": False, "lazy": False}
+    for kind, url, blocking in page_info["links"]:
+        add(kind, url, page_rel, blocking, page_level=True)
+    for css_kind, url in page_info["css"]:
+        add(css_kind, url, page_rel, False, page_level=True)
+    for spec, is_lazy in page_info["imports"]:
+        add("module", spec, page_rel, False, page_level=True, lazy=is_lazy)
+
+    sizes = {kind: 0 for kind in RESOURCE_TYPES}
+    counts = {kind: 0 for kind in RESOURCE_TYPES}
+    for entry in requests.values():
+        sizes[entry["type"]] += entry["bytes"]
+        counts[entry["type"]] += 1
+    sizes["total"] = sum(entry["bytes"] for entry in requests.values())
+    counts["total"] = len(requests)
+    counts["third-party"] = sum(1 for entry in requests.values() if entry["third_party"])
+    critical = [entry for entry in requests.values() if entry["critical"]]
+    return {
+        "page": page_rel,
+        "requests": requests,
+        "sizes": sizes,
+        "counts": counts,
+        "critical_bytes": sum(entry["bytes"] for entry in critical),
+        "critical_requests": len(critical),
+        "missing": missing,
+    }
+
+
+def load_budgets(path: str = BUDGETS_PATH) -> list:
+    """Reads the budget file: a Lighthouse-style list of {path, resourceSizes, resourceCounts, criticalPath}."""
+    with open(path, "r", encoding="utf-8") as f:
+        budgets = json.load(f).get("budgets", [])
+    if not isinstance(budgets, list):
+        raise ValueError(f"{path}: `budgets` must be a list")
+    return budgets
+
+
+def _budget_for(page_rel: str, budgets: list):
+    """As in Lighthouse, the last budget whose `path` glob matches the page applies (`*` spans directories)."""
+    import fnmatch
+    matching = [b for b in budgets if fnmatch.fnmatch(page_rel, b.get("path", "*"))]
+    return matching[-1] if matching else None
+
+
+def check_budget(result: dict, budget: dict) -> list:
+    """Returns [(metric, actual, limit, unit)] for every exceeded budget; sizes are in KiB like Lighthouse."""
+    violations = []
+    for item in budget.get("resourceSizes", []):
+        actual = result["sizes"].get(item["resourceType"], 0)
+        if actual > item["budget"] * 1024:
+            violations.append((f"{item['resourceType']} size", actual, item["budget"] * 1024, "bytes"))
+    for item in budget.get("resourceCounts", []):
+        actual = result["counts"].get(item["resourceType"], 0)
+        if actual > item["budget"]:
+            violations.append((f"{item['resourceType']} requests", actual, item["budget"], "requests"))
+    critical = budget.get("criticalPath", {})
+    if "bytes" in critical and result["critical_bytes"] > critical["bytes"] * 1024:
+        violations.append(("critical-path size", result["critical_bytes"], critical["bytes"] * 1024, "bytes"))
+    if "requests" in critical and result["critical_requests"] > critical["requests"]:
+        violations.append(("critical-path requests", result["critical_requests"], critical["requests"], "requests"))
+    return violations
+
+
+def run_performance_audit(dist: bool = False, verbose: bool = True) -> tuple:
+    """Audits every page (of dist/ with `dist`) against manager/budgets.json; returns (results, violations)."""
+    started = time.perf_counter()
+    root = DIST_DIR if dist else ROOT_DIR
+    if dist and not os.path.isdir(DIST_DIR):
+        raise FileNotFoundError("dist/ does not exist; run the production build first")
+    budgets = load_budgets()
+    cache = _load_json_cache(AUDIT_CACHE_FILE, AUDIT_CACHE_VERSION, {"files": {}})
+    section = cache["files"].setdefault("dist" if dist else "source", {})
+    seen, dirty = set(), False
+
+    def info_for(rel):
+        nonlocal dirty
+        seen.add(rel)
+        st = os.stat(os.path.join(root, rel))
+        stamp = [st.st_mtime_ns, st.st_size]
+        entry = section.get(rel)
+        if not entry or entry["stat"] != stamp:
+            entry = dict(_analyse_audit_file(root, rel, dist), stat=stamp)
+            section[rel] = entry
+            dirty = True
+        return entry
+
+    if dist:
+        page_rels = sorted(
+            posixpath.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+            for dirpath, _, names in os.walk(root) for name in names if name.endswith(".html")
+        )
+    else:
+        page_rels = [rel for rel, _ in _iter_site_files()]
+    pages = sorted(rel for rel in page_rels if any(_matches_site_pattern(rel, p) for p in AUDIT_PAGES))
+
+    results, violations = [], []
+    for page_rel in pages:
+        result = audit_page(page_rel, info_for, root)
+        budget = _budget_for(page_rel, budgets)
+        result["violations"] = check_budget(result, budget) if budget else []
+        result["budgeted"] = budget is not None
+        violations.extend((page_rel, *v) for v in result["violations"])
+        results.append(result)
+
+    for rel in set(section) - seen:
+        del section[rel]
+        dirty = True
+    if dirty:
+        _save_json_cache(AUDIT_CACHE_FILE, cache)
+    if verbose:
+        _print_audit_report(results, violations, dist, (time.perf_counter() - started) * 1000)
+    return results, violations
+
+
+def _print_audit_report(results: list, violations: list, dist: bool, elapsed_ms: float):
+    kb = lambda n: f"{n / 1024:,.1f}"
+    title = "dist/ (precompressed)" if dist else "sources (gzip estimate)"
+    table = Table(title=f"[bold cyan]Performance Budget Audit — {title}[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Page", style="bold cyan", no_wrap=True)
+    table.add_column("Reqs", justify="right")
+    table.add_column("Critical", justify="right", no_wrap=True)
+    table.add_column("Total", justify="right")
+    table.add_column("JS / CSS / Img", justify="right", no_wrap=True)
+    table.add_column("Budget", justify="center", no_wrap=True)
+    for r in results:
+        status = "[dim]—[/dim]" if not r["budgeted"] else "[bold red]✘[/bold red]" if r["violations"] else "[bold green]✔[/bold green]"
+        third_party = f"+{r['counts']['third-party']}" if r["counts"]["third-party"] else ""
+        sizes = r["sizes"]
+        table.add_row(
+            r["page"],
+            f"{r['counts']['total'] - r['counts']['third-party']}{third_party}",
+            f"{kb(r['critical_bytes'])} [dim]({r['critical_requests']})[/dim]",
+            kb(sizes["total"]),
+            f"{sizes['script'] / 1024:.0f} / {sizes['stylesheet'] / 1024:.0f} / {sizes['image'] / 1024:.0f}",
+            status,
+        )
+    console.print(table)
+    for r in results:
+        for from_rel, url in r["missing"]:
+            console.print(f"[yellow]⚠ {r['page']}: {from_rel} references missing file {url}[/yellow]")
+    if violations:
+        over = Table(title="[bold red]Budgets exceeded[/bold red]", show_header=True, header_style="bold red")
+        over.add_column("Page", style="bold cyan")
+        over.add_column("Metric")
+        over.add_column("Actual", justify="right")
+        over.add_column("Budget", justify="right")
+        for page, metric, actual, limit, unit in violations:
+            fmt = (lambda n: f"{kb(n)} KB") if unit == "bytes" else str
+            over.add_row(page, metric, f"[red]{fmt(actual)}[/red]", fmt(limit))
+        console.print(over)
+    console.print(f"[dim]Audited {len(results)} pages in {elapsed_ms:,.0f} ms. Sizes in KB; requests are local+third-party; "
+                  f"the critical path is the document, render-blocking CSS and parser-blocking scripts.[/dim]")
+
+
+def run_audit(dist: bool = False) -> bool:
+    """Menu/CLI wrapper around run_performance_audit; False when a budget is exceeded or the audit fails."""
+    try:
+        _, violations = run_performance_audit(dist=dist)
+    except (OSError, ValueError, KeyError) as e:
+        console.print(f"[bold red]Performance audit failed:[/bold red] {e}")
+        return False
+    if violations:
+        console.print(f"[bold red]✘ {len(violations)} performance budget(s) exceeded.[/bold red]")
+        return False
+    console.print("[bold green]✔ All pages within their performance budgets.[/bold green]")
+    return True
+
+
+# --- Site metadata (sitemap.xml, robots.txt, manifest icons, resource hints) from one cached scan ---
+
+SITE_URL = "https://ksreyan0725.github.io/My_personal_portfolio/"
+INVENTORY_CACHE_FILE = os.path.join(CACHE_DIR, "inventory.json")
+INVENTORY_CACHE_VERSION = 2
+SITEMAP_FILE = "sitemap.xml"
+ROBOTS_FILE = "robots.txt"
+MANIFEST_FILE = "manifest.json"
+SITEMAP_PAGES = ["*.html", "pages/*.html"]
+# Pages with <meta name="robots" content="noindex"> are left out as well
+SITEMAP_EXCLUDES = ["pages/pdf-viewer.html"]
+# (changefreq, priority) for pages the sitemap does not list yet; listed pages keep their values
+SITEMAP_DEFAULTS = {"index.html": ("weekly", "1.0")}
+SITEMAP_DEFAULT = ("monthly", "0.5")
+# Icons under assets/icons that belong in the web app manifest's `icons` list
+MANIFEST_ICON_PATTERNS = ["assets/icons/favicon.*", "assets/icons/pwa-icon-*"]
+# Browsers only offer to install the app with "any"-purpose icons of exactly these sizes;
+# missing ones are resized from the largest square icon (with Pillow) as pwa-icon-<n>x<n>.webp
+MANIFEST_REQUIRED_ICON_SIZES = [192, 512]
+RESOURCE_HINT_PAGES = ["*.html", "pages/*.html"]
+# Fonts are large, so only the first few a page's blocking CSS declares are preloaded
+HINT_MAX_FONTS = 2
+# Likely next navigations (linked local pages, in document order) to prefetch while idle
+HINT_MAX_PREFETCH = 2
+
+_HINTS_BLOCK_RE = _LazyPattern(r"[ \t]*<!-- <resource-hints>.*?<!-- </resource-hints> -->[ \t]*(?:\r?\n)?", re.S)
+# Maintenance tags together with the line break and indentation they were inserted with
+_MAINTENANCE_LINE_RE = _LazyPattern(r"(?:\r?\n[ \t]*)?(?:" + _MAINTENANCE_TAG_RE.pattern + ")", re.I | re.S)
+_SITEMAP_URL_RE = _LazyPattern(r"<url>(.*?)</url>", re.S)
+_SITEMAP_FIELD_RE = _LazyPattern(r"<(loc|lastmod|changefreq|priority)>\s*([^<]*?)\s*</\1>")
+_SITEMAP_CONTENT_RE = _LazyPattern(r"<!--\s*content:\s*([0-9a-f]+)\s*-->")
+_FONT_TYPES = {".woff2": "font/woff2", ".woff": "font/woff", ".ttf": "font/ttf", ".otf": "font/otf"}
+
+
+class _InventoryPageCollector(_PageResourceCollector):
+    """Adds the local links a page navigates to and its robots directive to the subresource scan."""
+
+    def __init__(self):
+        super().__init__()
+        self.anchors = []
+        self.noindex = False
+
+    def handle_starttag(self, tag, attrs):
+        super().handle_starttag(tag, attrs)
+        if self.hidden_depth:
+            return
+        attrs = {name: value or "" for name, value in attrs}
+        if tag == "a" and attrs.get("href"):
+            self.anchors.append(attrs["href"])
+        elif tag == "meta" and attrs.get("name", "").lower() == "robots":
+            self.noindex = "noindex" in attrs.get("content", "").lower()
+
+
+def _page_content(text: str) -> str:
+    """A page without its generated hints and maintenance tags, so neither moves its lastmod."""
+    return _MAINTENANCE_LINE_RE.sub("", _HINTS_BLOCK_RE.sub("", text))
+
+
+def _image_dimensions(data: bytes):
+    """(width, height) from a PNG, GIF or WebP header; None for other formats."""
+    import struct
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", data[6:10])
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        chunk = data[12:16]
+        if chunk == b"VP8X":
+            return 1 + int.from_bytes(data[24:27], "little"), 1 + int.from_bytes(data[27:30], "little")
+        if chunk == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return 1 + (bits & 0x3FFF), 1 + ((bits >> 14) & 0x3FFF)
+        if chunk == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return width & 0x3FFF, height & 0x3FFF
+    return None
+
+
+def _analyse_inventory_file(rel: str, data: bytes, stamp: list) -> dict:
+    """Returns {"stat", "sha"} plus whatever the metadata generators need from this kind of file."""
+    import hashlib
+    entry = {"stat": stamp}
+    ext = posixpath.splitext(rel)[1].lower()
+    if ext == ".html":
+        text = _page_content(data.decode("utf-8", errors="replace"))
+        collector = _InventoryPageCollector()
+        collector.feed(text)
+        entry.update(
+            sha=hashlib.sha256(text.encode("utf-8")).hexdigest()[:16],
+            links=collector.links,
+            anchors=collector.anchors,
+            noindex=collector.noindex,
+            base=bool(_BASE_INJECTION_RE.search(text)),
+            css=_css_references("".join(collector.inline_css)),
+            imports=_js_imports("".join(collector.inline_modules)) if collector.inline_modules else [],
+        )
+        return entry
+    entry["sha"] = hashlib.sha256(data).hexdigest()[:16]
+    if ext == ".css":
+        entry["css"] = _css_references(data.decode("utf-8", errors="replace"))
+    elif ext in (".js", ".mjs"):
+        entry["imports"] = _js_imports(data.decode("utf-8", errors="replace"))
+    elif ext in _IMAGE_EXTS:
+        dims = _image_dimensions(data)
+        if dims:
+            entry["dims"] = list(dims)
+    return entry
+
+
+def scan_site() -> dict:
+    """Hashes and analyses every site file once, reusing cached entries whose (mtime, size) is unchanged; returns {rel: entry}."""
+    cache = _load_json_cache(INVENTORY_CACHE_FILE, INVENTORY_CACHE_VERSION, {"files": {}})
+    old_files, files, dirty = cache["files"], {}, False
+    for rel, abs_path in _iter_site_files():
+        st = os.stat(abs_path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        entry = old_files.get(rel)
+        if entry and entry["stat"] == stamp:
+            files[rel] = entry
+            continue
+        with open(abs_path, "rb") as f:
+            files[rel] = _analyse_inventory_file(rel, f.read(), stamp)
+        dirty = True
+    if dirty or old_files.keys() != files.keys():
+        cache["files"] = files
+        _save_json_cache(INVENTORY_CACHE_FILE, cache)
+    return files
+
+
+def _page_url(rel: str) -> str:
+    return SITE_URL + (rel[:-len("index.html")] if posixpath.basename(rel) == "index.html" else rel)
+
+
+def _read_sitemap(path: str) -> dict:
+    """Returns {loc: {"lastmod", "changefreq", "priority", "content"}} from an existing sitemap."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    except FileNotFoundError:
+        return {}
+    urls = {}
+    for block in _SITEMAP_URL_RE.findall(text):
+        fields = dict(_SITEMAP_FIELD_RE.findall(block))
+        content = _SITEMAP_CONTENT_RE.search(block)
+        if "loc" in fields:
+            fields["content"] = content.group(1) if content else None
+            urls[fields["loc"]] = fields
+    return urls
+
+
+def render_sitemap(files: dict, previous: dict, today: str) -> tuple:
+    """Renders sitemap.xml, moving <lastmod> to `today` only when a page's content hash changes; returns (xml, changes)."""
+    pages = sorted(
+        (rel for rel in files
+         if any(_matches_site_pattern(rel, p) for p in SITEMAP_PAGES)
+         and rel not in SITEMAP_EXCLUDES and not files[rel]["noindex"]),
+        key=lambda rel: (rel != "index.html", rel),
+    )
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    changes = {}
+    for rel in pages:
+        loc, sha = _page_url(rel), files[rel]["sha"]
+        old = previous.get(loc)
+        if old is None:
+            changes[rel] = "new"
+            lastmod = today
+        elif old["content"] not in (None, sha):
+            changes[rel] = "changed"
+            lastmod = today
+        else:
+            lastmod = old.get("lastmod") or today
+        changefreq, priority = SITEMAP_DEFAULTS.get(rel, SITEMAP_DEFAULT)
+        if old:
+            changefreq, priority = old.get("changefreq", changefreq), old.get("priority", priority)
+        lines += [
+            "  <url>",
+            f"    <!-- content: {sha} -->",
+            f"    <loc>{loc}</loc>",
+            f"    <lastmod>{lastmod}</lastmod>",
+            f"    <changefreq>{changefreq}</changefreq>",
+            f"    <priority>{priority}</priority>",
+            "  </url>",
+        ]
+    lines.append("</urlset>")
+    listed = {_page_url(rel) for rel in pages}
+    changes.update({loc.removeprefix(SITE_URL) or "/": "removed" for loc in previous if loc not in listed})
+    return "\n".join(lines) + "\n", changes
+
+
+def render_robots() -> str:
+    # Crawlers only read /robots.txt at the host root, and SITE_URL is a project path on a shared
+    # github.io host, so Disallow rules here would never apply; the file just advertises the sitemap
+    lines = ["# Generated by manager.py", "User-agent: *", "Allow: /", "", f"Sitemap: {SITE_URL}{SITEMAP_FILE}"]
+    return "\n".join(lines) + "\n"
+
+
+def sync_manifest_icons(manifest: dict, files: dict) -> list:
+    """Points the manifest's icons (and shortcut icons) at what assets/icons really contains; returns a list of changes."""
+    import fnmatch
+    changes = []
+
+    def sync(icons: list, where: str) -> list:
+        kept = []
+        for icon in icons:
+            rel = _resolve_asset_ref(MANIFEST_FILE, icon.get("src", ""), files, root_fallback=False)
+            if rel is None:
+                changes.append(f"{where}: dropped missing {icon.get('src')}")
+                continue
+            dims = files[rel].get("dims")
+            updated = dict(icon, sizes=f"{dims[0]}x{dims[1]}") if dims else dict(icon)
+            if "type" in icon or where == "icons":
+                updated["type"] = _content_type(rel)
+            if updated != icon:
+                changes.append(f"{where}: {icon['src']} → {updated.get('sizes')}")
+            kept.append(updated)
+        return kept
+
+    listed = manifest.get("icons", [])
+    manifest["icons"] = sync(listed, "icons")
+    srcs = {icon["src"] for icon in manifest["icons"]}
+    for rel in sorted(files):
+        if rel not in srcs and any(fnmatch.fnmatch(rel, p) for p in MANIFEST_ICON_PATTERNS) and files[rel].get("dims"):
+            width, height = files[rel]["dims"]
+            manifest["icons"].append({"src": rel, "sizes": f"{width}x{height}", "type": _content_type(rel), "purpose": "any"})
+            changes.append(f"icons: added {rel}")
+    for shortcut in manifest.get("shortcuts", []):
+        if "icons" in shortcut:
+            shortcut["icons"] = sync(shortcut["icons"], f"shortcut '{shortcut.get('name', '')}'")
+    return changes
+
+
+def render_required_manifest_icons(manifest: dict, files: dict) -> tuple:
+    """Adds a resized icon to the manifest for each missing MANIFEST_REQUIRED_ICON_SIZES size; returns ({rel: webp bytes}, unmet sizes)."""
+    import io
+    present, sources = set(), []
+    for icon in manifest.get("icons", []):
+        if "any" not in icon.get("purpose", "any").split():
+            continue
+        present.update(icon.get("sizes", "").split())
+        rel = _resolve_asset_ref(MANIFEST_FILE, icon.get("src", ""), files, root_fallback=False)
+        dims = files[rel].get("dims") if rel else None
+        if dims and dims[0] == dims[1]:
+            sources.append((dims[0], rel))
+    missing = [size for size in MANIFEST_REQUIRED_ICON_SIZES if f"{size}x{size}" not in present]
+    Image = _load_pillow() if missing and sources else None
+    if Image is None:
+        return {}, missing
+    source_size, source_rel = max(sources)
+    generated, unmet = {}, []
+    for size in missing:
+        if size > source_size:
+            unmet.append(size)  # upscaling would only blur the icon
+            continue
+        with Image.open(os.path.join(ROOT_DIR, source_rel)) as image:
+            resized = image.convert("RGBA").resize((size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, "WEBP", quality=90, method=6)
+        rel = f"assets/icons/pwa-icon-{size}x{size}.webp"
+        generated[rel] = buffer.getvalue()
+        manifest["icons"].append({"src": rel, "sizes": f"{size}x{size}", "type": "image/webp", "purpose": "any"})
+    return generated, unmet
+
+
+def page_resource_hints(page_rel: str, files: dict) -> list:
+    """Returns the <link> hints for resources the HTML preload scanner cannot see on its own."""
+    page = files[page_rel]
+
+    def resolve(from_rel, url):
+        # The runtime <base href> applies to the page's own references, not to those inside CSS or modules
+        return _resolve_asset_ref(from_rel, url, files, root_fallback=from_rel == page_rel and page.get("base", False))
+
+    present = {page_rel}
+    for _, url, _ in page["links"]:
+        present.add(resolve(page_rel, url))
+    hints = []
+
+    def add(rel_attr, target, **attrs):
+        if target and target not in present:
+            present.add(target)
+            hints.append((rel_attr, target, attrs))
+
+    blocking_css = [resolve(page_rel, url) for kind, url, blocking in page["links"] if kind == "stylesheet" and blocking]
+    css_refs = [(page_rel, kind, url) for kind, url in page["css"]]
+    seen_css = set()
+    for css_rel in filter(None, blocking_css):
+        if css_rel not in seen_css:
+            seen_css.add(css_rel)
+            css_refs.extend((css_rel, kind, url) for kind, url in files[css_rel].get("css", []))
+    fonts = 0
+    for from_rel, kind, url in css_refs:
+        target = resolve(from_rel, url)
+        if kind == "stylesheet" and target and target not in seen_css:
+            add("preload", target, **{"as": "style"})
+            seen_css.add(target)
+            css_refs.extend((target, k, u) for k, u in files[target].get("css", []))
+        elif kind == "font" and target and fonts < HINT_MAX_FONTS:
+            fonts += 1
+            add("preload", target, **{"as": "font", "type": _FONT_TYPES.get(posixpath.splitext(target)[1], ""), "crossorigin": None})
+
+    modules = [(page_rel, url) for kind, url, _ in page["links"] if kind == "module"]
+    modules += [(page_rel, spec) for spec, lazy in page["imports"] if not lazy]
+    visited = set()
+    while modules:
+        from_rel, spec = modules.pop(0)
+        target = resolve(from_rel, spec)
+        if target is None or target in visited:
+            continue
+        visited.add(target)
+        add("modulepreload", target)  # entry scripts the page loads itself are already `present`
+        modules.extend((target, spec) for spec, lazy in files[target].get("imports", []) if not lazy)
+
+    prefetched = 0
+    for href in page["anchors"]:
+        target = resolve(page_rel, href)
+        if prefetched < HINT_MAX_PREFETCH and target and target.endswith(".html") and target not in present:
+            add("prefetch", target)
+            prefetched += 1
+    return hints
+
+
+def _render_hints_block(page_rel: str, text: str, hints: list, indent: str, newline: str) -> str:
+    lines = [f"{indent}<!-- <resource-hints> generated by manager.py from the site inventory -->"]
+    for rel_attr, target, attrs in hints:
+        href = _page_href(page_rel, text, target)
+        extra = "".join(f' {name}="{value}"' if value is not None else f" {name}" for name, value in attrs.items() if value != "")
+        lines.append(f'{indent}<link rel="{rel_attr}" href="{href}"{extra}>')
+    lines.append(f"{indent}<!-- </resource-hints> -->")
+    return newline.join(lines) + newline
+
+
+def inject_resource_hints(page_rel: str, text: str, hints: list) -> str:
+    """Replaces the page's generated hints block (or adds one just before </head>); no hints, no block."""
+    text = _HINTS_BLOCK_RE.sub("", text, count=1)
+    if not hints:
+        return text
+    head_end = text.find("</head>")
+    if head_end < 0:
+        return text
+    line_start = text.rfind("\n", 0, head_end) + 1
+    if text[line_start:head_end].strip():  # </head> shares its line with other markup (e.g. minified pages)
+        return text[:head_end] + _render_hints_block(page_rel, text, hints, "", "") + text[head_end:]
+    # Indent like the last element inside <head>
+    previous = re.search(r"\n([ \t]*)\S[^\n]*\r?\n\s*$", text[:line_start])
+    indent = previous.group(1) if previous else text[line_start:head_end] + "    "
+    newline = "\r\n" if "\r\n" in text else "\n"
+    return text[:line_start] + _render_hints_block(page_rel, text, hints, indent, newline) + text[line_start:]
+
+
+def _drop_bundled_module_hints(page_rel: str, text: str, bundled: set) -> str:
+    """In dist/, modules inside the entry bundle no longer exist on their own, so their modulepreloads go."""
+    root_fallback = bool(_BASE_INJECTION_RE.search(text))
+
+    def strip_block(match):
+        return re.sub(
+            r'[ \t]*<link rel="modulepreload" href="([^"]+)">(?:\r?\n)?',
+            lambda m: "" if _resolve_asset_ref(page_rel, m.group(1), bundled, root_fallback) else m.group(0),
+            match.group(0),
+        )
+    return _HINTS_BLOCK_RE.sub(strip_block, text, count=1)
+
+
+def generate_site_metadata(write: bool = True, verbose: bool = True) -> dict:
+    """Regenerates sitemap.xml, robots.txt, manifest.json icons and every page's resource hints from one scan_site()."""
+    started = time.perf_counter()
+    files = scan_site()
+    site_files = {rel: os.path.join(ROOT_DIR, rel) for rel in files}
+    texts = {}
+
+    sitemap_path = os.path.join(ROOT_DIR, SITEMAP_FILE)
+    today = time.strftime("%Y-%m-%d", time.gmtime())
+    texts[SITEMAP_FILE], sitemap_changes = render_sitemap(files, _read_sitemap(sitemap_path), today)
+    texts[ROBOTS_FILE] = render_robots()
+    manifest_changes = []
+    icon_files = {}
+    if MANIFEST_FILE in files:
+        with open(site_files[MANIFEST_FILE], "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest_changes = sync_manifest_icons(manifest, files)
+        icon_files, unmet_sizes = render_required_manifest_icons(manifest, files)
+        manifest_changes += [f"icons: generated {rel}" for rel in icon_files]
+        manifest_changes += [f"icons: no {size}x{size} icon, so browsers will not offer to install the app (pip install pillow to generate it)" for size in unmet_sizes]
+        texts[MANIFEST_FILE] = json.dumps(manifest, indent=4, ensure_ascii=False) + "\n"
+
+    hints = {}
+    for rel in sorted(files):
+        if any(_matches_site_pattern(rel, p) for p in RESOURCE_HINT_PAGES):
+            hints[rel] = page_resource_hints(rel, files)
+            texts[rel] = inject_resource_hints(rel, _read_preserving_newlines(site_files[rel]), hints[rel])
+
+    originals = {}
+    for rel in texts:
+        try:
+            originals[rel] = _read_preserving_newlines(os.path.join(ROOT_DIR, rel))
+        except FileNotFoundError:
+            originals[rel] = None
+    changed = sorted([rel for rel, text in texts.items() if text != originals[rel]] + list(icon_files))
+    if write and changed:
+        overrides = {rel: texts[rel].encode("utf-8") if rel in texts else icon_files[rel] for rel in changed}
+        if SW_FILE in files:
+            site_files.update({rel: os.path.join(ROOT_DIR, rel) for rel in icon_files})
+            revisions, _ = _precache_revisions(site_files, overrides)
+            sw_text = _read_preserving_newlines(SW_PATH)
+            sw_updated = _inject_precache_block(sw_text, _render_precache_block(revisions))
+            if sw_updated != sw_text:
+                overrides[SW_FILE] = sw_updated.encode("utf-8")
+        _atomic_write_all({os.path.join(ROOT_DIR, rel): data for rel, data in overrides.items()})
+    result = {
+        "changed": changed,
+        "written": bool(write and changed),
+        "sitemap": sitemap_changes,
+        "manifest": manifest_changes,
+        "hints": {rel: [[rel_attr, target] for rel_attr, target, _ in page_hints] for rel, page_hints in hints.items()},
+        "files": len(files),
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+    if verbose:
+        _print_site_metadata_report(result)
+    return result
+
+
+def _print_site_metadata_report(result: dict):
+    table = Table(title="[bold cyan]Resource Hints[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Page", style="bold cyan", no_wrap=True)
+    table.add_column("preload", justify="right")
+    table.add_column("modulepreload", justify="right")
+    table.add_column("prefetch")
+    for rel, page_hints in sorted(result["hints"].items()):
+        count = lambda kind: sum(1 for rel_attr, _ in page_hints if rel_attr == kind)
+        prefetch = ", ".join(target for rel_attr, target in page_hints if rel_attr == "prefetch")
+        table.add_row(rel, str(count("preload")), str(count("modulepreload")), prefetch or "[dim]—[/dim]")
+    console.print(table)
+    for rel, change in sorted(result["sitemap"].items()):
+        console.print(f"  [green]sitemap[/green] {rel}: {change}" + (" (lastmod → today)" if change != "removed" else ""))
+    for change in result["manifest"]:
+        console.print(f"  [green]manifest[/green] {change}")
+    verb = "Updated" if result["written"] else "Would update"
+    summary = f"{verb} {', '.join(result['changed'])}" if result["changed"] else "Everything already up to date"
+    console.print(f"[dim]{summary}; {result['files']} files scanned in {result['elapsed_ms']:,.0f} ms.[/dim]")
+
+
+def run_site_metadata():
+    """Menu/CLI wrapper around generate_site_metadata that reports failures."""
+    try:
+        generate_site_metadata()
+        return True
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Site metadata generation failed:[/bold red] {e}")
+        return False
+
+
+# --- Third-party resource localization (self-hosted CDN stylesheets, scripts and subset fonts) ---
+
+VENDOR_DIR = "assets/vendor"
+VENDOR_MANIFEST = f"{VENDOR_DIR}/vendor.json"
+VENDOR_MANIFEST_VERSION = 1
+VENDOR_CACHE_DIR = os.path.join(CACHE_DIR, "vendor")
+# Used when offline: a copy of manager/.cache/vendor/, or downloads laid out as <host>/<path>
+VENDOR_SEED_DIR = os.environ.get("MANAGER_VENDOR_SEED", os.path.join(ROOT_DIR, "manager", "vendor-seed"))
+VENDOR_PAGES = ["*.html", "pages/*.html"]
+# Only these CDNs are self-hosted; form endpoints and ordinary links stay external
+VENDOR_HOSTS = ("fonts.googleapis.com", "fonts.gstatic.com", "cdnjs.cloudflare.com", "unpkg.com", "cdn.jsdelivr.net")
+VENDOR_TIMEOUT = 20
+# Google Fonts only serves WOFF2 with unicode-range splits to browsers it recognises
+VENDOR_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+# Fonts preloaded per page, the faces covering most of the used glyphs first
+VENDOR_PRELOAD_FONTS = 2
+# Always kept in font subsets, so text added by scripts or typed into forms still renders
+VENDOR_BASE_TEXT = "".join(chr(c) for c in range(0x20, 0x7F)) + "\u00a0\u2013\u2014\u2018\u2019\u201c\u201d\u2022\u2026\u20ac"
+
+_VENDOR_URL_RE = _LazyPattern(r"""https://(?:%s)/[^\s"'<>)\\`]+""" % "|".join(re.escape(host) for host in VENDOR_HOSTS))
+_VENDOR_TAG_RE = _LazyPattern(r"<(?:link|script)\b[^>]*>", re.I)
+_VENDOR_SRI_ATTR_RE = _LazyPattern(r"""\s+(?:integrity|crossorigin|referrerpolicy)(?:\s*=\s*(?:"[^"]*"|'[^']*'|[^\s"'>]+))?(?=[\s/>])""", re.I)
+_VENDOR_PRELOAD_LINE_RE = _LazyPattern(r"[ \t]*<link\b[^>]*\bdata-vendor-preload\b[^>]*>[ \t]*(?:\r?\n)?", re.I)
+_LINK_LINE_RE = _LazyPattern(r"[ \t]*<link\b[^>]*>[ \t]*(?:\r?\n)?", re.I)
+_BASE_INJECTION_RE = _LazyPattern(r"""createElement\(\s*["']base["']\s*\)""")
+_CSS_CONTENT_RE = _LazyPattern(r"""\bcontent\s*:\s*(?:"((?:\\.|[^"\\])*)"|'((?:\\.|[^'\\])*)')""")
+_CSS_ESCAPE_RE = _LazyPattern(r"\\([0-9a-fA-F]{1,6})\s?|\\(.)", re.S)
+_UNICODE_RANGE_RE = _LazyPattern(r"unicode-range\s*:\s*([^;}]+)", re.I)
+_FONT_FORMATS = {".woff2": "woff2", ".woff": "woff", ".ttf": "truetype", ".otf": "opentype"}
+
+
+def _load_fonttools():
+    """Returns `fontTools.subset` when fontTools and brotli (needed for WOFF2) are installed, else None."""
+    try:
+        importlib.import_module("brotli")
+        return importlib.import_module("fontTools.subset")
+    except ImportError:
+        return None
+
+
+def _vendor_key(url: str) -> str:
+    import hashlib
+    import urllib.parse
+    ext = posixpath.splitext(urllib.parse.urlsplit(url).path)[1]
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()[:16] + (ext if 1 < len(ext) <= 6 else "")
+
+
+def fetch_vendor_resource(url: str, offline: bool = False, seed_dir: str = VENDOR_SEED_DIR) -> bytes:
+    """Returns the bytes of a CDN URL from the vendor cache, `seed_dir` or, unless offline, the network."""
+    import urllib.parse
+    key = _vendor_key(url)
+    cached = os.path.join(VENDOR_CACHE_DIR, key)
+    if os.path.exists(cached):
+        with open(cached, "rb") as f:
+            return f.read()
+    parts = urllib.parse.urlsplit(url)
+    candidates = [os.path.join(seed_dir, key)]
+    if not parts.query:
+        candidates.append(os.path.join(seed_dir, parts.netloc, *parts.path.strip("/").split("/")))
+    data = None
+    for seeded in candidates:
+        if os.path.isfile(seeded):
+            with open(seeded, "rb") as f:
+                data = f.read()
+            break
+    if data is None:
+        if offline:
+            raise OSError(f"{url} is neither cached nor seeded in {seed_dir}")
+        from urllib.request import Request, urlopen
+        request = Request(url, headers={"User-Agent": VENDOR_USER_AGENT})
+        try:
+            with urlopen(request, timeout=VENDOR_TIMEOUT) as response:
+                data = response.read()
+        except (OSError, ValueError) as e:
+            raise OSError(f"could not download {url} ({e}); seed it in {seed_dir} to work offline") from e
+    os.makedirs(VENDOR_CACHE_DIR, exist_ok=True)
+    with open(cached + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(cached + ".tmp", cached)
+    return data
+
+
+def _check_integrity(url: str, data: bytes, integrity: str):
+    """Verifies a Subresource Integrity attribute; passes when any listed hash matches."""
+    import base64
+    import hashlib
+    hashes = [token.partition("-") for token in integrity.split()]
+    hashes = [(algo, expected) for algo, _, expected in hashes if algo in ("sha256", "sha384", "sha512")]
+    if hashes and not any(base64.b64encode(hashlib.new(algo, data).digest()).decode("ascii") == expected for algo, expected in hashes):
+        raise ValueError(f"{url} does not match its integrity attribute, refusing to self-host it")
+
+
+def _vendor_target(url: str) -> tuple:
+    """Returns (kind, site-relative path under VENDOR_DIR) for a CDN URL."""
+    import html
+    import urllib.parse
+    parts = urllib.parse.urlsplit(html.unescape(url))
+    segments = [s for s in parts.path.split("/") if s] or ["index"]
+    if parts.netloc == "fonts.googleapis.com":
+        families = urllib.parse.parse_qs(parts.query).get("family", ["fonts"])
+        name = "-".join(re.sub(r"[^a-z0-9]+", "-", family.split(":")[0].lower()).strip("-") for family in families)
+        return "stylesheet", f"{VENDOR_DIR}/google-fonts/{name}.css"
+    if parts.netloc == "cdnjs.cloudflare.com" and segments[:2] == ["ajax", "libs"] and len(segments) > 3:
+        package = segments[2]
+    elif parts.netloc in ("unpkg.com", "cdn.jsdelivr.net"):
+        names = segments[1:] if parts.netloc == "cdn.jsdelivr.net" and segments[0] in ("npm", "gh") else segments
+        package = (names[1] if names[0].startswith("@") and len(names) > 1 else names[0]).split("@")[0]
+    else:
+        package = parts.netloc.split(".")[0]
+    name = segments[-1]
+    stem, ext = posixpath.splitext(name)
+    if ext == ".css":
+        # Purged and re-serialized, so no longer minified (the build minifies it again)
+        return "stylesheet", f"{VENDOR_DIR}/{package}/{stem.removesuffix('.min')}.css"
+    if ext in (".js", ".mjs"):
+        return "script", f"{VENDOR_DIR}/{package}/{name}"
+    return ("font" if ext in _FONT_FORMATS else "file"), f"{VENDOR_DIR}/{package}/{name}"
+
+
+def _css_string_chars(css: str) -> set:
+    """Characters that `content:` declarations put on screen (icon fonts map their glyphs this way)."""
+    def unescape(match):
+        if match.group(2) is not None:
+            return match.group(2)
+        code = int(match.group(1), 16)
+        return chr(code) if 0 < code <= 0x10FFFF else ""
+
+    chars = set()
+    for match in _CSS_CONTENT_RE.finditer(css):
+        chars.update(_CSS_ESCAPE_RE.sub(unescape, match.group(1) if match.group(1) is not None else match.group(2)))
+    return chars
+
+
+def _unicode_ranges(face: str) -> list:
+    """[(first, last), ...] from an @font-face unicode-range, or None when the face has none."""
+    match = _UNICODE_RANGE_RE.search(face)
+    if not match:
+        return None
+    ranges = []
+    for part in match.group(1).split(","):
+        spec = part.strip().upper()
+        if not spec.startswith("U+"):
+            continue
+        spec = spec[2:]
+        first, _, last = spec.partition("-") if "-" in spec else (spec.replace("?", "0"), "", spec.replace("?", "F"))
+        try:
+            ranges.append((int(first, 16), int(last, 16)))
+        except ValueError:
+            continue
+    return ranges
+
+
+def _font_face_value(face: str, name: str, default: str) -> str:
+    match = re.search(rf"{name}\s*:\s*([^;}}]+)", face, re.I)
+    return match.group(1).strip().strip("\"'") if match else default
+
+
+def _subset_font(data: bytes, codepoints: set, fonttools_subset) -> tuple:
+    """Returns (WOFF2 bytes, covered codepoints) keeping only `codepoints`, or None when the font maps none of them."""
+    import hashlib
+    options = fonttools_subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]  # kerning and ligatures between the kept glyphs still work
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+    font = fonttools_subset.load_font(io.BytesIO(data), options, dontLoadGlyphNames=True)
+    keep = codepoints & set(font.getBestCmap() or {})
+    if not keep:
+        return None
+    key = hashlib.sha256(data + ",".join(map(str, sorted(keep))).encode("ascii")).hexdigest()[:24]
+    cached = os.path.join(VENDOR_CACHE_DIR, "subsets", f"{key}.woff2")
+    if os.path.exists(cached):
+        with open(cached, "rb") as f:
+            return f.read(), len(keep)
+    subsetter = fonttools_subset.Subsetter(options)
+    subsetter.populate(unicodes=keep)
+    subsetter.subset(font)
+    out = io.BytesIO()
+    fonttools_subset.save_font(font, out, options)
+    os.makedirs(os.path.dirname(cached), exist_ok=True)
+    with open(cached + ".tmp", "wb") as f:
+        f.write(out.getvalue())
+    os.replace(cached + ".tmp", cached)
+    return out.getvalue(), len(keep)
+
+
+def localize_stylesheet(url: str, css: str, target: str, used_tokens: set, glyphs: set, fetch, fonttools_subset) -> dict:
+    """Purges a CDN stylesheet to the selectors the site uses and self-hosts its subset fonts next to it."""
+    import hashlib
+    import html
+    import urllib.parse
+    keep = _make_selector_filter(used_tokens, {"standard": [], "deep": [], "greedy": []})
+    purged = _emit_purged_css(_parse_css_rules(css), keep)
+    # Icon fonts draw only what `content:` rules put on screen; text fonts need the page glyphs
+    glyphs = _css_string_chars(purged) or glyphs
+    fonts_dir = posixpath.join(posixpath.dirname(target), "fonts")
+    files, ranked = {}, []
+    source_bytes = len(css.encode("utf-8"))
+
+    def self_host(match):
+        nonlocal source_bytes
+        face = match.group(0)
+        refs = [urllib.parse.urljoin(url, html.unescape(ref)) for _, ref in _CSS_URL_RE.findall(face) if ref]
+        refs = [ref for ref in refs if posixpath.splitext(urllib.parse.urlsplit(ref).path)[1].lower() in _FONT_FORMATS]
+        if not refs:
+            return face
+        # WOFF2 first; the other formats only matter when it cannot be fetched (or seeded)
+        refs.sort(key=lambda ref: not urllib.parse.urlsplit(ref).path.lower().endswith(".woff2"))
+        for source in refs:
+            try:
+                data = fetch(source)
+                break
+            except OSError:
+                if source == refs[-1]:
+                    raise
+        source_bytes += len(data)
+        ranges = _unicode_ranges(face)
+        wanted = {ord(ch) for ch in glyphs if ranges is None or any(first <= ord(ch) <= last for first, last in ranges)}
+        covered = len(wanted)
+        ext = posixpath.splitext(urllib.parse.urlsplit(source).path)[1].lower()
+        if not wanted:
+            return ""  # nothing the site shows falls in this face's unicode-range
+        if fonttools_subset is not None:
+            subset = _subset_font(data, wanted, fonttools_subset)
+            if subset is None:
+                return ""  # the font maps none of the glyphs in use
+            (data, covered), ext = subset, ".woff2"
+        family = re.sub(r"[^a-z0-9]+", "-", _font_face_value(face, "font-family", "font").lower()).strip("-")
+        name = f"{family}.{hashlib.sha256(data).hexdigest()[:10]}{ext}"
+        font_rel = posixpath.join(fonts_dir, name)
+        files[font_rel] = data
+        weight = _font_face_value(face, "font-weight", "400").split()[0]
+        ranked.append((-covered, abs(int(weight) - 400) if weight.isdigit() else 0,
+                       _font_face_value(face, "font-style", "normal") != "normal", font_rel))
+        face = re.sub(r"src\s*:[^;}]*", f'src: url("fonts/{name}") format("{_FONT_FORMATS[ext]}")', face, count=1)
+        if re.search(r"font-display\s*:", face, re.I):
+            return re.sub(r"font-display\s*:\s*[\w-]+", "font-display: swap", face, flags=re.I)
+        return face[:-1].rstrip().rstrip(";") + "; font-display: swap; }"
+
+    purged = _FONT_FACE_RE.sub(self_host, purged)
+
+    # Anything else the stylesheet references (images, @imports) keeps loading from its CDN
+    def absolute(match):
+        ref = match.group(2)
+        if ref is None or ref.startswith(("data:", "fonts/")) or "://" in ref:
+            return match.group(0)
+        return f'url("{urllib.parse.urljoin(url, ref)}")'
+
+    purged = _CSS_URL_RE.sub(absolute, purged)
+    fonts = []
+    for *_, font_rel in sorted(ranked):
+        if font_rel not in fonts:
+            fonts.append(font_rel)
+    return {"css": purged.strip() + "\n", "files": files, "fonts": fonts, "source_bytes": source_bytes}
+
+
+def _page_href(page_rel: str, page_text: str, target: str) -> str:
+    """How `page_rel` should reference `target`: pages that inject <base href> use root-relative paths."""
+    if _BASE_INJECTION_RE.search(page_text):
+        return target
+    return posixpath.relpath(target, posixpath.dirname(page_rel) or ".")
+
+
+def _localize_page(page_rel: str, text: str, local: dict, font_preloads: dict) -> str:
+    """Points a page's CDN references at their local copies, preloads their fonts and drops stale origin hints."""
+    import urllib.parse
+    text = _VENDOR_PRELOAD_LINE_RE.sub("", text)
+
+    def rewrite_tag(match):
+        tag = match.group(0)
+        urls = [url for url in _VENDOR_URL_RE.findall(tag) if url in local]
+        if not urls:
+            return tag
+        for url in urls:
+            tag = tag.replace(url, _page_href(page_rel, text, local[url]))
+        # Integrity hashes and CORS attributes belonged to the CDN copy
+        return _VENDOR_SRI_ATTR_RE.sub("", tag)
+
+    text = _VENDOR_TAG_RE.sub(rewrite_tag, text)
+    for url in sorted(set(_VENDOR_URL_RE.findall(text)) & local.keys()):
+        text = text.replace(url, _page_href(page_rel, text, local[url]))  # e.g. pdf.js workerSrc strings
+
+    def drop_unused_origin(match):
+        attrs = {name.lower(): value.strip("\"'") for name, value in _HTML_ATTR_RE.findall(match.group(0))}
+        host = urllib.parse.urlsplit(attrs.get("href", "")).netloc
+        if attrs.get("rel", "").lower() in ("preconnect", "dns-prefetch") and host in VENDOR_HOSTS and f"://{host}/" not in text:
+            return ""
+        return match.group(0)
+
+    text = _LINK_LINE_RE.sub(drop_unused_origin, text)
+
+    stylesheets = [rel for rel in font_preloads if _page_href(page_rel, text, rel) in text]
+    preloads = []
+    for rel in stylesheets:
+        preloads.extend(font for font in font_preloads[rel] if font not in preloads)
+    preloads = preloads[:VENDOR_PRELOAD_FONTS]
+    if preloads:
+        first = min(text.find(_page_href(page_rel, text, rel)) for rel in stylesheets)
+        line_start = text.rfind("\n", 0, text.rfind("<", 0, first)) + 1
+        indent = re.match(r"[ \t]*", text[line_start:]).group(0)
+        newline = "\r\n" if "\r\n" in text else "\n"
+        lines = "".join(
+            f'{indent}<link rel="preload" href="{_page_href(page_rel, text, font)}" as="font" '
+            f'type="{_FONT_TYPES.get(posixpath.splitext(font)[1], "font/woff2")}" crossorigin data-vendor-preload>{newline}'
+            for font in preloads
+        )
+        text = text[:line_start] + lines + text[line_start:]
+    return text
+
+
+def _vendor_glyphs_and_tokens(site_files: dict) -> tuple:
+    """(characters the site can show, class/id/tag tokens it uses), from pages, scripts and stylesheets outside VENDOR_DIR."""
+    import html
+    glyphs, tokens = set(VENDOR_BASE_TEXT), set()
+    for rel, abs_path in site_files.items():
+        if rel.startswith(VENDOR_DIR + "/") or not rel.endswith((".html", ".js", ".css")):
+            continue
+        with open(abs_path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+        if rel.endswith(".css"):
+            glyphs.update(_css_string_chars(text))
+        else:
+            glyphs.update(html.unescape(text))
+            tokens.update(_CONTENT_TOKEN_RE.findall(text))
+    return {ch for ch in glyphs if ch.isprintable() or ch == "\u00a0"}, tokens
+
+
+def localize_vendor_resources(offline: bool = False, seed_dir: str = VENDOR_SEED_DIR, write: bool = True, verbose: bool = True) -> dict:
+    """Self-hosts the CDN stylesheets, scripts and web fonts the pages load; returns {"resources", "failed", ...}."""
+    import html
+    started = time.perf_counter()
+    site_files = dict(_iter_site_files())
+    pages = [rel for rel in sorted(site_files) if any(_matches_site_pattern(rel, p) for p in VENDOR_PAGES)]
+    texts = {rel: _read_preserving_newlines(site_files[rel]) for rel in pages}
+    manifest_path = os.path.join(ROOT_DIR, VENDOR_MANIFEST)
+    manifest = _load_json_cache(manifest_path, VENDOR_MANIFEST_VERSION, {"resources": {}})
+    previous = manifest["resources"]
+
+    integrity = {url: entry.get("integrity") for url, entry in previous.items()}
+    for text in texts.values():
+        for tag in _VENDOR_TAG_RE.findall(text):
+            attrs = {name.lower(): value.strip("\"'") for name, value in _HTML_ATTR_RE.findall(tag)}
+            for url in _VENDOR_URL_RE.findall(tag):
+                integrity[url] = attrs.get("integrity") or integrity.get(url)
+        for url in _VENDOR_URL_RE.findall(text):
+            integrity.setdefault(url, None)
+
+    glyphs, tokens = _vendor_glyphs_and_tokens(site_files)
+    fonttools_subset = _load_fonttools()
+
+    def fetch(url):
+        return fetch_vendor_resource(html.unescape(url), offline, seed_dir)
+
+    resources, files, failed, font_preloads, local = {}, {}, [], {}, {}
+    for url in sorted(integrity):
+        kind, target = _vendor_target(url)
+        try:
+            data = fetch(url)
+            if integrity[url]:
+                _check_integrity(url, data, integrity[url])
+            entry = {"path": target, "kind": kind, "integrity": integrity[url], "source_bytes": len(data)}
+            if kind == "stylesheet":
+                styled = localize_stylesheet(html.unescape(url), data.decode("utf-8"), target, tokens, glyphs, fetch, fonttools_subset)
+                files.update(styled["files"])
+                data = styled["css"].encode("utf-8")
+                entry.update(fonts=styled["fonts"], source_bytes=styled["source_bytes"])
+                font_preloads[target] = styled["fonts"]
+            elif kind == "script":
+                data = re.sub(rb"\n?//[#@] sourceMappingURL=[^\n]*", b"", data)  # the map is not self-hosted
+            entry["bytes"] = len(data) + sum(len(files[rel]) for rel in entry.get("fonts", []))
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            failed.append((url, str(e)))
+            if url in previous:  # keep serving what an earlier run self-hosted
+                resources[url] = previous[url]
+                local[url] = previous[url]["path"]
+                font_preloads.setdefault(previous[url]["path"], previous[url].get("fonts", []))
+            continue
+        files[target] = data
+        resources[url] = entry
+        local[url] = target
+
+    updated = {rel: _localize_page(rel, text, local, font_preloads) for rel, text in texts.items()}
+    manifest["resources"] = resources
+    files[VENDOR_MANIFEST] = (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode("utf-8")
+    keep = set(files)
+    for url, entry in resources.items():
+        if entry is previous.get(url):  # a failed fetch keeps the files of the earlier run
+            keep.update([entry["path"], *entry.get("fonts", [])])
+    writes = {rel: text.encode("utf-8") for rel, text in updated.items() if text != texts[rel]}
+    for rel, data in files.items():
+        if rel in site_files:
+            with open(site_files[rel], "rb") as f:
+                if f.read() == data:
+                    continue
+        writes[rel] = data
+    removed = sorted(rel for rel in site_files if rel.startswith(VENDOR_DIR + "/") and rel not in keep)
+
+    changed = sorted(writes)
+    if write and (writes or removed):
+        if SW_FILE in site_files and any(rel in texts for rel in writes):
+            revisions, _ = _precache_revisions(site_files, writes)
+            sw_text = _read_preserving_newlines(SW_PATH)
+            sw_updated = _inject_precache_block(sw_text, _render_precache_block(revisions))
+            if sw_updated != sw_text:
+                writes[SW_FILE] = sw_updated.encode("utf-8")
+                changed.append(SW_FILE)
+        for rel in writes:
+            os.makedirs(os.path.dirname(os.path.join(ROOT_DIR, rel)), exist_ok=True)
+        _atomic_write_all({os.path.join(ROOT_DIR, rel): data for rel, data in writes.items()}, [site_files[rel] for rel in removed])
+    result = {
+        "resources": resources,
+        "failed": failed,
+        "changed": changed,
+        "removed": removed,
+        "written": bool(write and (writes or removed)),
+        "subset": fonttools_subset is not None,
+        "glyphs": len(glyphs),
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+    if verbose:
+        _print_vendor_report(result)
+    return result
+
+
+def _print_vendor_report(result: dict):
+    import html
+    import urllib.parse
+    table = Table(title="[bold cyan]Self-hosted Third-party Resources[/bold cyan]", show_header=True, header_style="bold magenta")
+    table.add_column("Resource", style="bold cyan", no_wrap=True)
+    table.add_column(f"Local copy ({VENDOR_DIR}/)")
+    table.add_column("Fonts", justify="right")
+    table.add_column("CDN", justify="right")
+    table.add_column("Self-hosted", justify="right", style="green")
+    for url, entry in sorted(result["resources"].items()):
+        table.add_row(
+            urllib.parse.urlsplit(html.unescape(url)).netloc + "/…" + posixpath.basename(urllib.parse.urlsplit(url).path),
+            posixpath.relpath(entry["path"], VENDOR_DIR), str(len(entry.get("fonts", []))),
+            f"{entry['source_bytes'] / 1024:,.1f} KB", f"{entry['bytes'] / 1024:,.1f} KB",
+        )
+    console.print(table)
+    for url, error in result["failed"]:
+        console.print(f"[bold red]✘[/bold red] {url}: {error}")
+    if not result["subset"]:
+        console.print("[dim yellow]Notice: 'fonttools' and 'brotli' are not both installed, so fonts were copied without subsetting (pip install fonttools brotli).[/dim yellow]")
+    verb = "Updated" if result["written"] else "Would update"
+    summary = f"{verb} {len(result['changed'])} file(s)" if result["changed"] else "Everything already up to date"
+    if result["removed"]:
+        summary += f", removed {len(result['removed'])} stale file(s)"
+    console.print(f"[dim]{summary}; {result['glyphs']} glyphs in use; finished in {result['elapsed_ms']:,.0f} ms.[/dim]")
+
+
+def run_vendor_localization(offline: bool = False, seed_dir: str = VENDOR_SEED_DIR):
+    """Menu/CLI wrapper around localize_vendor_resources that reports failures."""
+    try:
+        return not localize_vendor_resources(offline, seed_dir)["failed"]
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Localizing third-party resources failed:[/bold red] {e}")
+        return False
+
+
+def build_tools_menu():
+    """Individual build/optimization stages, runnable without a full production build."""
+    while True:
+        table = Table(title="[bold purple]Build & Optimization Tools[/bold purple]", show_header=True, header_style="bold magenta")
+        table.add_column("Option", style="dim", width=6)
+        table.add_column("Action", style="bold cyan")
+
+        table.add_row("1", "Regenerate Service Worker Precache Manifest")
+        table.add_row("2", "Purge Unused CSS (purgecss.config.js)")
+        table.add_row("3", "Critical CSS Report (per-page critical-path savings)")
+        table.add_row("4", "Optimize Images (AVIF/WebP responsive variants)")
+        table.add_row("5", "Bundle JavaScript Modules (entry + lazy chunks)")
+        table.add_row("6", "Rebuild Search Index (pages + PDFs)")
+        table.add_row("7", f"Preview Production Build (dist/, port {server_port('preview')})")
+        table.add_row("8", "Performance Budget Audit (manager/budgets.json)")
+        table.add_row("9", "Site Metadata (sitemap, robots.txt, manifest icons, resource hints)")
+        table.add_row("10", "Self-host Third-party Resources (CDN fonts, icons, scripts)")
+        table.add_row("11", "Timing Dashboard (git, AI, file writes, server requests this session)")
+        table.add_row("12", "Return to Main Menu")
+
+        console.print(table)
+        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12"])
+
+        if choice == "1":
+            run_precache()
+        elif choice == "2":
+            run_purge()
+        elif choice == "3":
+            run_critical_report()
+        elif choice == "4":
+            run_image_optimization()
+        elif choice == "5":
+            run_bundle_report()
+        elif choice == "6":
+            run_search_index()
+        elif choice == "7":
+            start_server(production=True)
+        elif choice == "8":
+            run_audit()
+        elif choice == "9":
+            run_site_metadata()
+        elif choice == "10":
+            run_vendor_localization()
+        elif choice == "11":
+            show_trace_dashboard()
+        elif choice == "12":
+            break
+
+def _handle_main_choice(choice: str, status_text: str) -> bool:
+    """Dispatches main menu selections. Returns False if exiting."""
+    import subprocess
+    if choice == "1":
+        console.print(Panel(f"Current Status: {status_text}"))
+    elif choice == "2":
+        toggle_maintenance(enable=True)
+    elif choice == "3":
+        toggle_maintenance(enable=False)
+    elif choice == "4":
+        git_menu()
+    elif choice == "5":
+        manage_resume()
+    elif choice == "6":
+        start_server()
+    elif choice == "7":
+        configure_browser_menu()
+    elif choice == "8":
+        open_terminal_menu()
+    elif choice == "9":
+        orbit_script = r"C:\BhasaGrid-Application-Project\tools\orbit_ai\orbit_ai.py"
+        if os.path.exists(orbit_script):
+            subprocess.run([sys.executable, orbit_script, "chat"], cwd=ROOT_DIR)
+        else:
+            console.print(f"[bold red]Orbit AI not found at {orbit_script}[/bold red]")
+    elif choice == "10":
+        run_build()
+    elif choice == "11":
+        build_tools_menu()
+    elif choice == "12":
+        console.print("\n[bold yellow]Exiting Manager. Goodbye![/bold yellow]\n")
+        return False
+    return True
+
+def main():
+    while True:
+        status = get_maintenance_status()
+        status_text = "[bold yellow]ACTIVE 🛠️[/bold yellow]" if status else "[bold green]INACTIVE 🟢[/bold green]"
+        
+        is_venv = sys.prefix != sys.base_prefix
+        env_text = "[bold green]Virtual Environment (.venv)[/bold green]" if is_venv else "[bold red]Global System Python[/bold red]"
+        
+        console.print("\n")
+        console.print(Panel(
+            Align.center(f"[bold white]Portfolio Maintenance & Dev Tool[/bold white]\n\n"
                          f"Python Env: {env_text}\n"
                          f"Maintenance Status: {status_text}"),
             title="[bold green]Manager[/bold green]",
@@ -538,22 +6494,237 @@ def main():
         table.add_row("3", "Disable Maintenance Mode")
         table.add_row("4", "Git Repository Management")
         table.add_row("5", "Upload/Update Resume (PDF)")
-        table.add_row("6", "Launch Live Development Server (Port 8431)")
+        table.add_row("6", f"Launch Live Development Server (Port {server_port('dev')})")
         table.add_row("7", "🌐 Browser Settings & Options (BhasaGrid Engine)")
         table.add_row("8", "💻 Terminal & Shell Utilities (BhasaGrid Engine)")
         table.add_row("9", "🤖 Launch Orbit AI (Connected to BhasaGrid Engine)")
-        table.add_row("10", "Exit")
+        table.add_row("10", "📦 Build Production Bundle (dist/)")
+        table.add_row("11", "⚡ Build & Optimization Tools")
+        table.add_row("12", "Exit")
         
         console.print(table)
         
-        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10"])
+        choice = Prompt.ask("Select an option", choices=["1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "11", "12"])
         
         if not _handle_main_choice(choice, status_text):
             sys.exit(0)
 
-if __name__ == "__main__":
+# --- Command-line interface (headless subcommands, optional JSON output) ---
+
+# Stages whose result is just success/failure: command -> (menu/CLI wrapper, help)
+CLI_STAGES = {
+    "precache": (run_precache, "regenerate the service worker precache manifest"),
+    "purge": (run_purge, "purge unused CSS (purgecss.config.js)"),
+    "critical": (run_critical_report, "report per-page critical CSS savings"),
+    "images": (run_image_optimization, "build AVIF/WebP responsive image variants"),
+    "bundle": (run_bundle_report, "bundle JavaScript modules into entry + lazy chunks"),
+    "search-index": (run_search_index, "rebuild the site search index"),
+    "metadata": (run_site_metadata, "regenerate sitemap.xml, robots.txt, manifest icons and resource hints"),
+}
+_NO_BROWSER_ARG = (("--no-browser",), {"action": "store_true", "help": "do not open a browser tab"})
+_DASHBOARD_ARG = (("--dashboard",), {"action": "store_true", "help": "keep a live timing dashboard (slowest operations, request latency) on screen"})
+# command -> (help, [(argument names, add_argument options), ...])
+CLI_SUBCOMMANDS = {
+    "maintenance": ("show or toggle maintenance mode", [
+        (("action",), {"nargs": "?", "choices": ["status", "on", "off"], "default": "status"}),
+        (("--no-dist",), {"action": "store_true", "help": "leave an existing dist/ build untouched"}),
+    ]),
+    "build": ("build the production bundle into dist/", []),
+    "serve": ("start the live development server", [
+        _NO_BROWSER_ARG,
+        _DASHBOARD_ARG,
+        (("--production",), {"action": "store_true", "help": "serve dist/ like the CDN (same as `preview`)"}),
+    ]),
+    "preview": ("serve the production build from dist/", [_NO_BROWSER_ARG, _DASHBOARD_ARG]),
+    "audit": ("check pages against manager/budgets.json", [
+        (("--dist",), {"action": "store_true", "help": "audit dist/ instead of the source tree"}),
+    ]),
+    "resume": ("publish a resume PDF (optimized, content-hashed) and relink the site", [
+        (("pdf",), {"nargs": "?", "help": "PDF to publish (default: the only PDF in the project root)"}),
+    ]),
+    "publish": ("publish any PDF into assets/docs/ under a content-hashed name", [
+        (("pdf",), {"help": "PDF to publish"}),
+        (("--name",), {"help": "document name (default: derived from the file name)"}),
+    ]),
+    "vendor": ("self-host CDN stylesheets, scripts and subset web fonts under assets/vendor/", [
+        (("--offline",), {"action": "store_true", "help": "never download; use the vendor cache and seed directory only"}),
+        (("--seed",), {"default": VENDOR_SEED_DIR, "help": "directory of pre-downloaded resources (default: %(default)s)"}),
+    ]),
+    "commit": ("commit with a given or AI-generated message", [
+        (("-m", "--message"), {"help": "commit message (default: ask the AI backend)"}),
+        (("-a", "--all"), {"action": "store_true", "help": "stage all changes first (git add .)"}),
+        (("--push",), {"action": "store_true", "help": "push after committing"}),
+        (("--dry-run",), {"action": "store_true", "help": "only print the message that would be used"}),
+    ]),
+    **{name: (help_text, []) for name, (_, help_text) in CLI_STAGES.items()},
+}
+
+
+def _cli_parser(only: str = None):
+    """Builds the argparse CLI; with `only`, just that subcommand is registered (help lists them all)."""
+    import argparse  # only the CLI path pays for argparse
+
+    global_flags = {
+        "--json": "print the result as JSON on stdout; progress goes to stderr",
+        "--trace": "write a Chrome trace of this run (chrome://tracing, Perfetto) to manager/.cache/traces/",
+        "--profile": "also capture cProfile and tracemalloc data there (MANAGER_PROFILE=cpu or memory picks one)",
+    }
+    parser = argparse.ArgumentParser(
+        prog="manager", description="Portfolio maintenance & dev tool. Run without a command for the interactive menu.",
+    )
+    # Also accepted after the command; SUPPRESS keeps a flag given before it
+    flags_after = argparse.ArgumentParser(add_help=False)
+    for flag, help_text in global_flags.items():
+        parser.add_argument(flag, action="store_true", help=help_text)
+        flags_after.add_argument(flag, action="store_true", default=argparse.SUPPRESS, help=help_text)
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+    for name, (help_text, arguments) in CLI_SUBCOMMANDS.items():
+        if only is not None and name != only:
+            continue
+        subparser = commands.add_parser(name, parents=[flags_after], help=help_text)
+        for names, options in arguments:
+            subparser.add_argument(*names, **options)
+    return parser
+
+
+def _cli_maintenance(args) -> tuple:
+    if args.action != "status" and not toggle_maintenance(enable=args.action == "on", include_dist=not args.no_dist):
+        return 1, {"error": "maintenance toggle failed"}
+    if get_maintenance_status() is None:
+        return 1, {"error": f"{INDEX_PATH} not found"}
+    state = maintenance_state()
+    if args.action == "status" and not args.json:
+        mixed = sorted(key for key, enabled in state["files"].items() if enabled != state["enabled"])
+        print(f"Maintenance mode: {'active' if state['enabled'] else 'inactive'}"
+              + (f" (out of step: {', '.join(mixed)})" if mixed else ""))
+    return 0, {"maintenance": state["enabled"], "files": state["files"]}
+
+
+def _cli_build(args) -> tuple:
+    try:
+        stats = build_production_bundle(verbose=not args.json)
+    except Exception as e:
+        console.print(f"[bold red]Build failed:[/bold red] {e}")
+        return 1, {"ok": False, "error": str(e)}
+    return 0, {"ok": True, **stats}
+
+
+def _cli_serve(args) -> tuple:
+    production = args.command == "preview" or getattr(args, "production", False)
+    start_server(open_browser=not args.no_browser, production=production, dashboard=args.dashboard)
+    return 0, {"ok": True}
+
+
+def _cli_audit(args) -> tuple:
+    try:
+        results, violations = run_performance_audit(dist=args.dist, verbose=not args.json)
+    except (OSError, ValueError, KeyError) as e:
+        console.print(f"[bold red]Performance audit failed:[/bold red] {e}")
+        return 1, {"ok": False, "error": str(e)}
+    if not args.json:
+        if violations:
+            console.print(f"[bold red]✘ {len(violations)} performance budget(s) exceeded.[/bold red]")
+        else:
+            console.print("[bold green]✔ All pages within their performance budgets.[/bold green]")
+    return (1 if violations else 0), {"ok": not violations, "pages": results}
+
+
+def _cli_publish(args) -> tuple:
+    source = args.pdf
+    if source is None:
+        pdf_files = _root_pdf_files()
+        if len(pdf_files) != 1:
+            console.print(f"[bold red]Pass the resume PDF to publish:[/bold red] found {len(pdf_files)} PDFs in the project root.")
+            return 1, {"ok": False, "error": f"expected one PDF in the project root, found {len(pdf_files)}"}
+        source = os.path.join(ROOT_DIR, pdf_files[0])
+    name = RESUME_DOC_NAME if args.command == "resume" else args.name
+    try:
+        result = publish_document(source, name)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Failed to publish {source}:[/bold red] {e}")
+        return 1, {"ok": False, "error": str(e)}
+    if not args.json:
+        _print_publish_report(result, source)
+    return 0, {"ok": True, "source": source, **result}
+
+
+def _cli_vendor(args) -> tuple:
+    try:
+        result = localize_vendor_resources(offline=args.offline, seed_dir=args.seed, verbose=not args.json)
+    except (OSError, ValueError) as e:
+        console.print(f"[bold red]Localizing third-party resources failed:[/bold red] {e}")
+        return 1, {"ok": False, "error": str(e)}
+    ok = not result["failed"]
+    return (0 if ok else 1), {"ok": ok, **result}
+
+
+def _cli_commit(args) -> tuple:
+    git_output = sys.stderr if args.json else None  # keep stdout clean for the JSON result
+    if args.all and not run_command(["git", "add", "."], stdout=git_output):
+        return 1, {"committed": False, "error": "git add failed"}
+    message = args.message or generate_ai_commit_message()
+    if not message:
+        return 1, {"committed": False, "error": "no commit message"}
+    if args.dry_run:
+        if not args.json:
+            print(message)
+        return 0, {"message": message, "committed": False, "pushed": False}
+    committed = run_command(["git", "commit", "-m", message], stdout=git_output)
+    pushed = committed and args.push and run_command(["git", "push"], stdout=git_output)
+    ok = committed and (pushed or not args.push)
+    return (0 if ok else 1), {"message": message, "committed": committed, "pushed": bool(pushed)}
+
+
+def _cli_stage(args) -> tuple:
+    ok = CLI_STAGES[args.command][0]()
+    return (0 if ok else 1), {"ok": ok}
+
+
+CLI_COMMANDS = {
+    "maintenance": _cli_maintenance,
+    "build": _cli_build,
+    "serve": _cli_serve,
+    "preview": _cli_serve,
+    "audit": _cli_audit,
+    "resume": _cli_publish,
+    "publish": _cli_publish,
+    "vendor": _cli_vendor,
+    "commit": _cli_commit,
+    **{name: _cli_stage for name in CLI_STAGES},
+}
+
+
+def run_cli(argv: list) -> int:
+    """Runs one non-interactive command, e.g. `python manager maintenance status --json`."""
+    global CONSOLE_TO_STDERR
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
+    args = _cli_parser(only=command if command in CLI_SUBCOMMANDS else None).parse_args(argv)
+    CONSOLE_TO_STDERR = args.json
+    start_trace_session((TRACE_PROFILE or "cpu,memory") if args.profile else TRACE_PROFILE)
+    try:
+        with trace_span("cli", args.command):
+            code, result = CLI_COMMANDS[args.command](args)
+    finally:
+        traces = finish_trace_session(export=args.trace or TRACE_EXPORT)
+    if traces:
+        result["traces"] = traces
+    if args.json:
+        print(json.dumps(result, indent=2, default=str))
+    return code
+
+
+def entry_point(argv: list) -> int:
+    """The interactive menu without arguments, otherwise one headless command."""
+    if argv:
+        return run_cli(argv)
+    start_trace_session()
     try:
         main()
     except KeyboardInterrupt:
         console.print("\n\n[bold red]Operation cancelled. Exiting...[/bold red]")
-        sys.exit(0)
+    finally:
+        finish_trace_session()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(entry_point(sys.argv[1:]))
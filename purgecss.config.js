@@ -3,7 +3,6 @@ module.exports = {
     './index.html',
     './contact.html',
     './pages/**/*.html',
-    './script.js',
     './assets/js/**/*.js'
   ],
   css: [
@@ -39,6 +38,8 @@ module.exports = {
       /^search/,
       /^night-light/,
       /^skeleton/,
+      /^install-/,
+      /^ios-/,
       /^no-scroll$/
     ],
     deep: [
@@ -1,78 +1,133 @@
 // Service Worker for Portfolio PWA
-// Version 3.5 - Fixed cache paths
-const CACHE_NAME = 'portfolio-v3.6';
-const RUNTIME_CACHE = 'portfolio-runtime-v3.6';
-
-// Critical resources for initial load (minimal set for fast install)
-const CORE_ASSETS = [
-    './',
-    './index.html',
-    './assets/css/preloader.css',
-    './assets/css/core.css',
-    './script.js',
-    './assets/js/main.js',
-    './assets/js/modules/preloader.js',
-    './assets/js/modules/utils.js',
-    './assets/js/modules/theme.js'
-];
+// Precache entries are generated by `python manager/manager.py precache` (the production
+// build regenerates them with content-hashed URLs). Every file is cached under its own
+// revision, so an update only re-downloads the files whose content actually changed.
+const PRECACHE = 'portfolio-precache';
+const RUNTIME_CACHE = 'portfolio-runtime';
+
+// Flipped by `python manager maintenance on|off`; the changed bytes make installed PWAs update right away
+const MAINTENANCE_MODE = false;
+const MAINTENANCE_PAGE = './pages/maintenance.html';
 
-// Secondary resources to cache after install (lazy cache)
-const SECONDARY_ASSETS = [
-    './contact.html',
-    './assets/css/navigation.css',
-    './assets/css/search.css',
-    './assets/css/sidebar.css',
-    './assets/css/settings.css',
-    './assets/css/settings-fix.css',
-    './assets/css/responsive.css',
-    './assets/css/skeleton.css',
-    './assets/css/print.css',
-    './assets/js/theme-schedule.js',
-    './assets/js/constants.js',
-    './assets/js/modules/sidebar.js',
-    './assets/js/modules/settings.js',
-    './assets/js/modules/search.js',
-    './assets/js/modules/navigation.js',
-    './assets/js/modules/features.js',
-    './assets/js/modules/security.js',
-    // All PNG icons for perfect offline mode
-    './assets/icons/certification.webp',
-    './assets/icons/contact.webp',
-    './assets/icons/custom-theme.webp',
-    './assets/icons/download.webp',
-    './assets/icons/education.webp',
-    './assets/icons/facebook.webp',
-    './assets/icons/favicon.webp',
-    './assets/icons/github.webp',
-    './assets/icons/gmail.webp',
-    './assets/icons/home.webp',
-    './assets/icons/instagram.webp',
-    './assets/icons/linkedin.webp',
-    './assets/icons/maintenance.webp',
-    './assets/icons/pdf.webp',
-    './assets/icons/printer.webp',
-    './assets/icons/project.webp',
-    './assets/icons/pwa-icon-192.webp',
-    './assets/icons/search.webp',
-    './assets/icons/setting-button.png',
-    './assets/icons/side-menu.webp',
-    './assets/icons/skills.webp',
-    './assets/icons/teams.webp',
-    './assets/icons/telegram.webp',
-    './assets/icons/x.webp',
-    './assets/icons/zoho-dark.webp',
-    './assets/icons/zohomail.webp',
-    './assets/images/my-photo.jpg'
+// <precache-manifest> generated by manager/manager.py, do not edit by hand
+const PRECACHE_MANIFEST = [
+    { url: './', revision: 'dc474adab8', core: true },
+    { url: './assets/css/core.css', revision: 'e4d5687368', core: true },
+    { url: './assets/css/preloader.css', revision: 'aa329c44e2', core: true },
+    { url: './assets/js/main.js', revision: '7448efbff8', core: true },
+    { url: './assets/js/modules/preloader.js', revision: '387b3ead01', core: true },
+    { url: './assets/js/modules/theme.js', revision: '6c51e58f17', core: true },
+    { url: './assets/js/modules/utils.js', revision: '624afc7113', core: true },
+    { url: './index.html', revision: 'dc474adab8', core: true },
+    { url: './assets/css/contact.css', revision: 'e5e388145d', core: false },
+    { url: './assets/css/install-button.css', revision: '790e2c08ce', core: false },
+    { url: './assets/css/navigation.css', revision: '69d2428b56', core: false },
+    { url: './assets/css/preloader-glitch.css', revision: '8cba380561', core: false },
+    { url: './assets/css/print.css', revision: '09c4035af8', core: false },
+    { url: './assets/css/responsive.css', revision: 'e0bf6fda34', core: false },
+    { url: './assets/css/search.css', revision: 'a953263bc9', core: false },
+    { url: './assets/css/settings-fix.css', revision: '4006ef85b6', core: false },
+    { url: './assets/css/settings.css', revision: 'df9468554c', core: false },
+    { url: './assets/css/sidebar.css', revision: 'f29e37472d', core: false },
+    { url: './assets/css/skeleton.css', revision: 'dc666ae141', core: false },
+    { url: './assets/css/theme-schedule.css', revision: 'a8d527ee00', core: false },
+    { url: './assets/icons/certification.webp', revision: '651f879a98', core: false },
+    { url: './assets/icons/contact.webp', revision: 'ce57590f2f', core: false },
+    { url: './assets/icons/custom-theme.webp', revision: '968ecd25e4', core: false },
+    { url: './assets/icons/download.webp', revision: '9faf938d50', core: false },
+    { url: './assets/icons/education.webp', revision: '9e1eb32a87', core: false },
+    { url: './assets/icons/facebook.webp', revision: '1addfb67f8', core: false },
+    { url: './assets/icons/favicon.webp', revision: 'e7492e55b6', core: false },
+    { url: './assets/icons/github.webp', revision: '112713445f', core: false },
+    { url: './assets/icons/gmail.webp', revision: '8eeb5298ee', core: false },
+    { url: './assets/icons/home.webp', revision: '9fb8447c37', core: false },
+    { url: './assets/icons/instagram.webp', revision: 'a03264ed16', core: false },
+    { url: './assets/icons/linkedin.webp', revision: '3f654970f9', core: false },
+    { url: './assets/icons/maintenance.webp', revision: 'ba7691baec', core: false },
+    { url: './assets/icons/pdf.webp', revision: '584d907fa2', core: false },
+    { url: './assets/icons/printer.webp', revision: '50025ecf0d', core: false },
+    { url: './assets/icons/project.webp', revision: '527460dde5', core: false },
+    { url: './assets/icons/pwa-icon-192.webp', revision: 'aa97479ea4', core: false },
+    { url: './assets/icons/pwa-icon-192x192.webp', revision: '52b4ba0fa7', core: false },
+    { url: './assets/icons/search.webp', revision: '00b0b50c19', core: false },
+    { url: './assets/icons/setting-button.png', revision: '909ceedd83', core: false },
+    { url: './assets/icons/side-menu.webp', revision: '5983ebab57', core: false },
+    { url: './assets/icons/skills.webp', revision: 'f14a3347a4', core: false },
+    { url: './assets/icons/teams.webp', revision: '056d21aafa', core: false },
+    { url: './assets/icons/telegram.webp', revision: 'b732122575', core: false },
+    { url: './assets/icons/x.webp', revision: '338c064cc8', core: false },
+    { url: './assets/icons/zoho-dark.webp', revision: '91c87b9fa2', core: false },
+    { url: './assets/icons/zohomail.webp', revision: 'beb5c14390', core: false },
+    { url: './assets/images/my-photo.jpg', revision: 'ef0ad28c93', core: false },
+    { url: './assets/images/my-photo.webp', revision: '9d96298011', core: false },
+    { url: './assets/js/constants.js', revision: '7911ce243c', core: false },
+    { url: './assets/js/contact.js', revision: '19a84b8b9b', core: false },
+    { url: './assets/js/modules/features.js', revision: '88adb8139f', core: false },
+    { url: './assets/js/modules/navigation.js', revision: 'a469c8c34d', core: false },
+    { url: './assets/js/modules/search.js', revision: '7e69acab14', core: false },
+    { url: './assets/js/modules/security.js', revision: 'ecbaa93d2f', core: false },
+    { url: './assets/js/modules/settings.js', revision: 'bdc7888be1', core: false },
+    { url: './assets/js/modules/sidebar.js', revision: 'e9083269f2', core: false },
+    { url: './assets/js/theme-schedule.js', revision: '7169b0ea0e', core: false },
+    { url: './contact.html', revision: 'fcc2dd1a05', core: false },
+    { url: './pages/404.html', revision: 'ada54cdc49', core: false },
+    { url: './pages/maintenance.html', revision: '1f0e28bdcf', core: false },
+    { url: './pages/pdf-viewer.html', revision: 'f18a4be687', core: false },
+    { url: './pages/thank-you.html', revision: 'cef7edec25', core: false },
 ];
+// </precache-manifest>
+
+// Cache key for a manifest entry: the URL itself, plus its revision for unhashed files
+function precacheKey(entry) {
+    const url = new URL(entry.url, self.location);
+    if (entry.revision) {
+        url.searchParams.set('__rev', entry.revision);
+    }
+    return url.href;
+}
+
+// Maps each precached URL (without query string) to its current cache key
+const PRECACHE_KEYS = new Map(
+    PRECACHE_MANIFEST.map((entry) => [new URL(entry.url, self.location).href, precacheKey(entry)])
+);
+
+function matchPrecache(url) {
+    const target = new URL(url, self.location);
+    target.search = '';
+    target.hash = '';
+    const key = PRECACHE_KEYS.get(target.href);
+    if (!key) return Promise.resolve(undefined);
+    return caches.open(PRECACHE).then((cache) => cache.match(key));
+}
+
+// Download only the entries whose revision is not cached yet
+async function precacheEntries(entries) {
+    const cache = await caches.open(PRECACHE);
+    return Promise.all(entries.map(async (entry) => {
+        const key = precacheKey(entry);
+        if (await cache.match(key)) return;
+        const response = await fetch(entry.url, { cache: 'reload' });
+        if (!response.ok) {
+            throw new Error(`Precache request for ${entry.url} failed with status ${response.status}`);
+        }
+        await cache.put(key, response);
+    }));
+}
+
+// Remove revisions that are no longer part of the manifest
+async function deleteStalePrecacheEntries() {
+    const cache = await caches.open(PRECACHE);
+    const current = new Set(PRECACHE_KEYS.values());
+    const requests = await cache.keys();
+    return Promise.all(
+        requests.filter((request) => !current.has(request.url)).map((request) => cache.delete(request))
+    );
+}
 
 // Install event - cache only critical resources for fast install
 self.addEventListener('install', (event) => {
     event.waitUntil(
-        caches.open(CACHE_NAME)
-            .then((cache) => {
-                console.log('Caching core assets');
-                return cache.addAll(CORE_ASSETS);
-            })
+        precacheEntries(PRECACHE_MANIFEST.filter((entry) => entry.core))
             .then(() => {
                 console.log('Core assets cached successfully');
                 // Skip waiting immediately for faster activation
@@ -88,27 +143,24 @@ self.addEventListener('install', (event) => {
 self.addEventListener('activate', (event) => {
     event.waitUntil(
         Promise.all([
-            // Clean up old caches
+            // Clean up caches from older service worker versions
             caches.keys().then((cacheNames) => {
                 return Promise.all(
                     cacheNames.map((cacheName) => {
-                        if (cacheName !== CACHE_NAME && cacheName !== RUNTIME_CACHE) {
+                        if (cacheName !== PRECACHE && cacheName !== RUNTIME_CACHE) {
                             console.log('Deleting old cache:', cacheName);
                             return caches.delete(cacheName);
                         }
                     })
                 );
             }),
+            deleteStalePrecacheEntries(),
             // Cache secondary assets in background (non-blocking)
-            caches.open(CACHE_NAME).then((cache) => {
-                console.log('Caching secondary assets');
-                // Use Promise.allSettled to continue even if some fail
-                return Promise.allSettled(
-                    SECONDARY_ASSETS.map(url =>
-                        cache.add(url).catch(err => console.warn('Failed to cache:', url, err))
-                    )
-                );
-            }),
+            Promise.allSettled(
+                PRECACHE_MANIFEST.filter((entry) => !entry.core).map((entry) =>
+                    precacheEntries([entry]).catch(err => console.warn('Failed to cache:', entry.url, err))
+                )
+            ),
             // Take control immediately
             self.clients.claim()
         ])
@@ -131,53 +183,74 @@ self.addEventListener('fetch', (event) => {
     // Skip chrome-extension and other non-http(s) requests
     if (!event.request.url.startsWith('http')) return;
 
+    // Maintenance mode: every page navigation lands on the maintenance page, even when cached
+    if (MAINTENANCE_MODE && event.request.mode === 'navigate') {
+        const maintenanceUrl = new URL(MAINTENANCE_PAGE, self.location).href;
+        if (event.request.url.split(/[?#]/)[0] !== maintenanceUrl) {
+            event.respondWith(Response.redirect(maintenanceUrl, 302));
+            return;
+        }
+    }
+
     event.respondWith(
-        caches.match(event.request, { ignoreSearch: true })
-            .then((cachedResponse) => {
-                if (cachedResponse) {
-                    // Return cached response immediately
-                    // Update cache in background for next time
-                    updateCacheInBackground(event.request);
-                    return cachedResponse;
+        matchPrecache(event.request.url)
+            .then((precachedResponse) => {
+                // Precached files are kept current by their revision, no revalidation needed
+                if (precachedResponse) {
+                    return precachedResponse;
                 }
-
-                // Not in cache, fetch from network
-                return fetch(event.request)
-                    .then((response) => {
-                        // Check if valid response
-                        if (response?.status !== 200 || response?.type === 'error') {
-                            return response;
-                        }
-
-                        // Cache same-origin requests and specific external resources
-                        if (event.request.url.startsWith(self.location.origin) ||
-                            event.request.url.startsWith('https://fonts.googleapis.com') ||
-                            event.request.url.startsWith('https://fonts.gstatic.com') ||
-                            event.request.url.startsWith('https://unpkg.com')) {
-                            const responseToCache = response.clone();
-                            caches.open(RUNTIME_CACHE)
-                                .then((cache) => {
-                                    cache.put(event.request, responseToCache);
-                                });
-                        }
-
-                        return response;
-                    })
-                    .catch((error) => {
-                        console.error('Fetch failed:', error);
-                        // Return offline page if available
-                        return caches.match('./index.html');
-                    });
+                return respondFromRuntimeCache(event.request);
             })
     );
 });
 
+// Cache First with Network Fallback for everything outside the precache manifest
+function respondFromRuntimeCache(request) {
+    return caches.match(request, { ignoreSearch: true, cacheName: RUNTIME_CACHE })
+        .then((cachedResponse) => {
+            if (cachedResponse) {
+                // Return cached response immediately
+                // Update cache in background for next time
+                updateCacheInBackground(request);
+                return cachedResponse;
+            }
+
+            // Not in cache, fetch from network
+            return fetch(request)
+                .then((response) => {
+                    // Check if valid response
+                    if (response?.status !== 200 || response?.type === 'error') {
+                        return response;
+                    }
+
+                    // Cache same-origin requests and specific external resources
+                    if (request.url.startsWith(self.location.origin) ||
+                        request.url.startsWith('https://fonts.googleapis.com') ||
+                        request.url.startsWith('https://fonts.gstatic.com') ||
+                        request.url.startsWith('https://unpkg.com')) {
+                        const responseToCache = response.clone();
+                        caches.open(RUNTIME_CACHE)
+                            .then((cache) => {
+                                cache.put(request, responseToCache);
+                            });
+                    }
+
+                    return response;
+                })
+                .catch((error) => {
+                    console.error('Fetch failed:', error);
+                    // Return offline page if available
+                    return matchPrecache('./index.html');
+                });
+        });
+}
+
 // Background cache update (stale-while-revalidate pattern)
 function updateCacheInBackground(request) {
     fetch(request)
         .then((response) => {
             if (response?.status === 200) {
-                caches.open(CACHE_NAME).then((cache) => {
+                caches.open(RUNTIME_CACHE).then((cache) => {
                     cache.put(request, response);
                 });
             }
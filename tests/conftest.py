@@ -0,0 +1,5 @@
+import os
+import sys
+
+# manager/ is a script directory rather than a package; import manager.py the way bench/ does
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "manager"))
@@ -0,0 +1,174 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import manager
+
+NODE = shutil.which("node")
+
+
+def kinds(source):
+    return [(kind, text) for kind, text, _, _ in manager._js_tokens(source)]
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("a = b / c / d", [("word", "a"), ("punct", "="), ("word", "b"), ("punct", "/"), ("word", "c"), ("punct", "/"), ("word", "d")]),
+    ("x = (a) / 2", [("word", "x"), ("punct", "="), ("punct", "("), ("word", "a"), ("punct", ")"), ("punct", "/"), ("word", "2")]),
+    ("r = /a\\/b[/]c/g.test(s)", [("word", "r"), ("punct", "="), ("regex", "/a\\/b[/]c/g"), ("punct", "."), ("word", "test"),
+                                  ("punct", "("), ("word", "s"), ("punct", ")")]),
+    ("return /x/.source", [("word", "return"), ("regex", "/x/"), ("punct", "."), ("word", "source")]),
+    ("f(/=/)", [("word", "f"), ("punct", "("), ("regex", "/=/"), ("punct", ")")]),
+])
+def test_tokens_tell_regex_from_division(source, expected):
+    assert kinds(source) == expected
+
+
+def test_template_literal_is_one_token_including_nested_templates():
+    source = "const t = `a ${b / 2} /not a regex/ ${`inner ${c}`} }`; d / e"
+    tokens = kinds(source)
+    assert tokens[3] == ("template", "`a ${b / 2} /not a regex/ ${`inner ${c}`} }`")
+    assert tokens[4:] == [("punct", ";"), ("word", "d"), ("punct", "/"), ("word", "e")]
+
+
+@pytest.mark.parametrize("source", [
+    "export { a } from './a.js';",
+    "export * from './a.js';",
+    "export let counter = 0;",
+    "export const { a, b } = obj;",
+    "console.log(import.meta.url);",
+    "await ready;",
+])
+def test_unsupported_module_syntax_is_rejected(source):
+    with pytest.raises(ValueError):
+        manager._parse_js_module("m.js", source)
+
+
+def test_parse_collects_imports_exports_and_functions():
+    parsed = manager._parse_js_module("m.js", (
+        "import def, { a, b as c } from './x.js';\n"
+        "import * as ns from './y.js';\n"
+        "import './side.js';\n"
+        "export function used() {}\n"
+        "async function helper() {}\n"
+        "export default class Widget {}\n"
+        "const z = 1;\n"
+        "export { z as zed };\n"
+        "const lazy = () => import('./lazy.js');\n"
+    ))
+    assert [(imp["spec"], imp["names"], imp["namespace"]) for imp in parsed["imports"]] == [
+        ("./x.js", [("default", "def"), ("a", "a"), ("b", "c")], None),
+        ("./y.js", [], "ns"),
+        ("./side.js", [], None),
+    ]
+    assert parsed["exports"] == {"used": "used", "default": "Widget", "zed": "z"}
+    assert [fn["name"] for fn in parsed["functions"]] == ["used", "helper"]
+    assert [dyn["spec"] for dyn in parsed["dynamic"]] == ["./lazy.js"]
+
+
+@pytest.fixture
+def bundle(tmp_path, monkeypatch):
+    """Writes a module tree under tmp_path/site, bundles it and returns the outputs by site path."""
+    monkeypatch.setattr(manager, "BUNDLE_DIR", str(tmp_path / "bundle"))
+    monkeypatch.setattr(manager, "_build_graph", manager.BuildGraph(str(tmp_path / "graph.sqlite")))
+
+    def run(files, chunks=()):
+        monkeypatch.setattr(manager, "JS_LAZY_CHUNKS", list(chunks))
+        site_files = {}
+        for rel, text in files.items():
+            path = tmp_path / "site" / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+            site_files[rel] = str(path)
+        result = manager.bundle_js_modules(site_files)
+        outputs = {manager.JS_ENTRY: result["entry_path"], **result["chunks"]}
+        texts = {rel: open(path, encoding="utf-8").read() for rel, path in outputs.items()}
+        return result, texts
+
+    return run
+
+
+def run_node(bundle_dir, script="assets/js/main.js"):
+    """Runs the bundled entry with node and returns its stdout lines."""
+    with open(os.path.join(bundle_dir, "package.json"), "w", encoding="utf-8") as f:
+        json.dump({"type": "module"}, f)
+    done = subprocess.run([NODE, os.path.join(bundle_dir, script)], capture_output=True, text=True, timeout=30)
+    assert done.returncode == 0, done.stderr
+    return done.stdout.splitlines()
+
+
+ENTRY = "assets/js/main.js"
+
+
+def test_unused_exports_and_their_helpers_are_shaken(bundle):
+    result, texts = bundle({
+        ENTRY: "import { used } from './modules/util.js';\nconsole.log(used());\n",
+        "assets/js/modules/util.js": (
+            "function helper() { return 1; }\n"
+            "function onlyInTemplate() { return 2; }\n"
+            "export function used() { return `${onlyInTemplate()}` + helper(); }\n"
+            "export function unused() { return helper(); }\n"
+            "function dead() { return 3; }\n"
+        ),
+    })
+    entry = texts[ENTRY]
+    assert "function unused" not in entry and "function dead" not in entry
+    assert "function helper" in entry and "function onlyInTemplate" in entry
+    assert result["dropped_exports"] == 1
+    assert sorted(result["removed_functions"]) == ["assets/js/modules/util.js:dead", "assets/js/modules/util.js:unused"]
+
+
+def test_namespace_import_keeps_every_export(bundle):
+    _, texts = bundle({
+        ENTRY: "import * as util from './modules/util.js';\nconsole.log(util.a());\n",
+        "assets/js/modules/util.js": "export function a() { return 'a'; }\nexport function b() { return 'b'; }\n",
+    })
+    assert "function a" in texts[ENTRY] and "function b" in texts[ENTRY]
+
+
+def test_dynamic_import_namespace_keeps_only_members_read(bundle):
+    _, texts = bundle({
+        ENTRY: "async function go() { const m = await import('./modules/m.js'); m.a(); }\ngo();\n",
+        "assets/js/modules/m.js": "export function a() {}\nexport function b() {}\n",
+    })
+    assert "function a" in texts[ENTRY] and "function b" not in texts[ENTRY]
+
+
+def test_escaping_dynamic_namespace_keeps_every_export(bundle):
+    _, texts = bundle({
+        ENTRY: "async function go() { const m = await import('./modules/m.js'); register(m); }\n",
+        "assets/js/modules/m.js": "export function a() {}\nexport function b() {}\n",
+    })
+    assert "function a" in texts[ENTRY] and "function b" in texts[ENTRY]
+
+
+def test_dynamic_import_of_a_chunk_root_becomes_a_lazy_chunk(bundle):
+    result, texts = bundle({
+        ENTRY: "import('./modules/search.js').then((m) => console.log(m.find()));\n",
+        "assets/js/modules/search.js": "import { norm } from './text.js';\nexport function find() { return norm('X'); }\n",
+        "assets/js/modules/text.js": "export function norm(s) { return s.toLowerCase(); }\n",
+    }, chunks=["assets/js/modules/search.js"])
+    chunk = "assets/js/chunks/search.js"
+    assert set(texts) == {ENTRY, chunk}
+    assert '__load("search")' in texts[ENTRY]
+    assert "toLowerCase" not in texts[ENTRY]  # modules only the chunk uses travel with it
+    assert "toLowerCase" in texts[chunk] and "export const factories" in texts[chunk]
+    assert result["outputs"][1]["modules"] == ["assets/js/modules/search.js", "assets/js/modules/text.js"]
+
+
+@pytest.mark.skipif(NODE is None, reason="node is not installed")
+def test_bundle_runs_side_effect_imports_and_lazy_chunks(bundle, tmp_path):
+    bundle({
+        ENTRY: (
+            "import './modules/polyfill.js';\n"
+            "import { twice } from './modules/math.js';\n"
+            "console.log(globalThis.patched, twice(2) / 2, `${twice(1)}/2`);\n"
+            "import('./modules/search.js').then((m) => console.log(m.find('ABC')));\n"
+        ),
+        "assets/js/modules/polyfill.js": "globalThis.patched = 'yes';\n",
+        "assets/js/modules/math.js": "export const twice = (n) => n * 2;\nexport function half(n) { return n / 2; }\n",
+        "assets/js/modules/search.js": "export function find(q) { return q.replace(/[A-Z]/g, (c) => c.toLowerCase()); }\n",
+    }, chunks=["assets/js/modules/search.js"])
+    assert run_node(str(tmp_path / "bundle")) == ["yes 2 2/2", "abc"]
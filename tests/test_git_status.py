@@ -0,0 +1,71 @@
+import pytest
+
+import manager
+
+# Captured from `git status --porcelain=v2 -z --branch` (git 2.x); "\0" separates records
+RENAMED = (
+    "# branch.oid 7c5b673b3f532480eb522dc7b31be5407b474c1b\0# branch.head main\0"
+    "# branch.upstream origin/main\0# branch.ab +1 -2\0"
+    "2 RM N... 100644 100644 100644 587be6b4c3f93f93c489c0111bba5596147a26cb "
+    "587be6b4c3f93f93c489c0111bba5596147a26cb R100 new name.txt\0old name.txt\0"
+    "? untracked file.txt\0"
+)
+MERGE_CONFLICT = (
+    "# branch.oid 85acdd0a7552fc817af9e3f28c94b66daa54ab45\0# branch.head main\0"
+    "# branch.upstream origin/main\0# branch.ab +4 -1\0"
+    "1 .M N... 100644 100644 100644 4bcfe98e640c8284511312660fb8709b0afa888e "
+    "4bcfe98e640c8284511312660fb8709b0afa888e h.txt\0"
+    "u UU N... 100644 100644 100644 100644 78981922613b2afb6025042ff6bd878ac1994e85 "
+    "b64812e67a6ec68ae70ede3b9a5b5c1a521daf14 2f5c69d85637bb49b35b992915f7b98bdf56e593 f.txt\0"
+    "u AA N... 000000 100644 100644 100644 0000000000000000000000000000000000000000 "
+    "b64812e67a6ec68ae70ede3b9a5b5c1a521daf14 2f5c69d85637bb49b35b992915f7b98bdf56e593 both added.txt\0"
+)
+DETACHED = (
+    "# branch.oid c082b6e9f196dc04eef8687cdac12edf77ae4516\0# branch.head (detached)\0"
+    "1 .M N... 100644 100644 100644 422c2b7ab3b3c668038da977e4e93a5fc623169c "
+    "422c2b7ab3b3c668038da977e4e93a5fc623169c f.txt\0"
+)
+INITIAL = (
+    "# branch.oid (initial)\0# branch.head main\0"
+    "1 A. N... 000000 100644 100644 0000000000000000000000000000000000000000 "
+    "e69de29bb2d1d6434b8b29ae775ad8c2e48c5391 a\0"
+)
+
+
+@pytest.mark.parametrize("out, expected", [
+    (RENAMED, {
+        "branch": "main", "oid": "7c5b673b3f532480eb522dc7b31be5407b474c1b", "upstream": "origin/main",
+        "ahead": 1, "behind": 2,
+        "staged": [["R", "old name.txt → new name.txt"]], "unstaged": [["M", "old name.txt → new name.txt"]],
+        "untracked": ["untracked file.txt"], "conflicts": [],
+    }),
+    (MERGE_CONFLICT, {
+        "branch": "main", "oid": "85acdd0a7552fc817af9e3f28c94b66daa54ab45", "upstream": "origin/main",
+        "ahead": 4, "behind": 1,
+        "staged": [], "unstaged": [["M", "h.txt"]], "untracked": [], "conflicts": ["f.txt", "both added.txt"],
+    }),
+    (DETACHED, {
+        "branch": None, "oid": "c082b6e9f196dc04eef8687cdac12edf77ae4516", "upstream": None,
+        "ahead": 0, "behind": 0,
+        "staged": [], "unstaged": [["M", "f.txt"]], "untracked": [], "conflicts": [],
+    }),
+    (INITIAL, {
+        "branch": "main", "oid": None, "upstream": None, "ahead": 0, "behind": 0,
+        "staged": [["A", "a"]], "unstaged": [], "untracked": [], "conflicts": [],
+    }),
+    ("", {
+        "branch": None, "oid": None, "upstream": None, "ahead": 0, "behind": 0,
+        "staged": [], "unstaged": [], "untracked": [], "conflicts": [],
+    }),
+], ids=["rename", "merge-conflict", "detached", "initial", "empty"])
+def test_parse_porcelain_v2(out, expected):
+    snapshot = manager._parse_porcelain_v2(out, [])
+    assert snapshot == dict(expected, staged_entries=[])
+
+
+def test_rename_source_is_consumed_with_its_record():
+    # The original path is its own NUL-separated field, so a name that looks like a record stays a path
+    out = RENAMED.replace("\0old name.txt\0", "\0? old name.txt\0")
+    snapshot = manager._parse_porcelain_v2(out, [])
+    assert snapshot["untracked"] == ["untracked file.txt"]
+    assert snapshot["staged"] == [["R", "? old name.txt → new name.txt"]]
@@ -0,0 +1,105 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import manager
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("a  {  color: red ;  }", "a{color:red}"),
+    ("/* banner */\n.a , .b > .c { margin: 0 auto ; }", ".a,.b>.c{margin:0 auto}"),
+    # a space before a colon is kept: outside a declaration it is a descendant combinator
+    ("a { color : red }", "a{color :red}"),
+    (".a { width: calc(100% - 2 * var(--gap)); }", ".a{width:calc(100% - 2 * var(--gap))}"),
+    (".a { width: calc( 1px + -2px ); }", ".a{width:calc(1px + -2px)}"),
+    ("@media screen and (max-width: 600px) { .a { b: c } }", "@media screen and (max-width:600px){.a{b:c}}"),
+    (".a :hover, .b::after { x: y }", ".a :hover,.b::after{x:y}"),
+    (".a { content: \"  /* not a comment */  \"; }", '.a{content:"  /* not a comment */  "}'),
+    (".a { grid-area: 1 / 2 / 3; font: 12px/1.5 serif }", ".a{grid-area:1 / 2 / 3;font:12px/1.5 serif}"),
+])
+def test_minify_css(source, expected):
+    assert manager.minify_css(source) == expected
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("let a = 1 ;  // trailing\nlet b = 2;", "let a=1;let b=2;"),
+    ("a = b\n++c", "a=b\n++c"),
+    ("return\nvalue", "return\nvalue"),
+    ("x = a + +b; y = a - -b; z = a++ + b", "x=a+ +b;y=a- -b;z=a++ +b"),
+    ("n = 1 .toString()", "n=1 .toString()"),
+    ("x = a / b / c", "x=a/b/c"),
+    ("if (s.match( /a b\\/ [/ ]c/g )) return /  x  /.test(y)", "if(s.match(/a b\\/ [/ ]c/g))return/  x  /.test(y)"),
+    ("s = `a   ${ b  ?  `c  d` : '  e  ' }   f`", "s=`a   ${ b  ?  `c  d` : '  e  ' }   f`"),
+    ("a/* inline */b", "a b"),
+    ("foo(a,\n  b)\n.then(c)", "foo(a,b).then(c)"),
+])
+def test_minify_js(source, expected):
+    assert manager.minify_js(source) == expected
+
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node is not installed")
+def test_minify_js_keeps_behaviour():
+    source = """
+    const out = []
+    let a = 1, b = 2
+    const re = /[/"']+\\s/g   // a quote in a regex class
+    out.push("x\\"y  ' z".replace(re, "_"))
+    out.push(a + +b, a - -b, a++ + b)
+    let c = a
+    ++b
+    out.push(c, b)
+    const t = `${a}  ${`nested ${b}`}  // not a comment`
+    out.push(t)
+    function f() {
+      return
+      42
+    }
+    out.push(String(f()))
+    out.push(10 / 2 / 5, 1 .toFixed(1))
+    console.log(JSON.stringify(out))
+    """
+    def run(code):
+        return subprocess.run(["node", "-e", code], capture_output=True, text=True, check=True).stdout
+    assert run(manager.minify_js(source)) == run(source)
+
+
+def test_minify_html_collapses_markup_but_not_raw_text():
+    source = """<!DOCTYPE html>
+<html>
+  <head>
+    <!-- dropped -->
+    <!--[if IE]><p>kept</p><![endif]-->
+    <style>
+      .a  { color: red ; }
+    </style>
+    <script>
+      const x = 1   // comment
+      const y = 2
+    </script>
+    <script type="application/ld+json">
+      { "@type": "Person",  "name": "A  B" }
+    </script>
+    <script type="text/template"><div>  keep  </div></script>
+  </head>
+  <body>
+    <p>Hello   <b>bold</b>   <i>world</i>
+    </p>
+    <pre>  line one
+    line  two</pre>
+    <textarea name="t">  raw
+  text</textarea>
+  </body>
+</html>
+"""
+    out = manager.minify_html(source)
+    assert "dropped" not in out and "<!--[if IE]><p>kept</p><![endif]-->" in out
+    assert "<style>.a{color:red}</style>" in out
+    assert "<script>const x=1\nconst y=2</script>" in out
+    assert '<script type="application/ld+json">' + json.dumps({"@type": "Person", "name": "A  B"}, separators=(",", ":")) in out
+    assert "<script type=\"text/template\"><div>  keep  </div></script>" in out
+    assert "<p>Hello <b>bold</b> <i>world</i></p>" in out
+    assert "<pre>  line one\n    line  two</pre> <textarea" in out
+    assert '<textarea name="t">  raw\n  text</textarea>' in out
+    assert out.startswith("<!DOCTYPE html><html><head>")
@@ -0,0 +1,129 @@
+import re
+
+import pytest
+
+import manager
+
+
+def purge(css, content, standard=(), deep=(), greedy=()):
+    """Purges `css` against the tokens of `content`, like purge_unused_css does per stylesheet."""
+    safelist = {"standard": [re.compile(p) for p in standard], "deep": [re.compile(p) for p in deep],
+                "greedy": [re.compile(p) for p in greedy]}
+    keep = manager._make_selector_filter(set(manager._CONTENT_TOKEN_RE.findall(content)), safelist)
+    return manager._emit_purged_css(manager._parse_css_rules(css), keep)
+
+
+def selectors(purged):
+    return [s.strip() for s in re.findall(r"([^{}]+)\{", purged) if not s.strip().startswith("@")]
+
+
+def test_parse_js_literal_handles_config_syntax():
+    source = """{
+      // line comment
+      content: ['./index.html', "./pages/**/*.html",],  /* block comment */
+      'output': `./out/`,
+      safelist: { standard: [/^active$/, /^Theme-/i], deep: [], },
+      rejected: true, limit: 2, ratio: 0.5, none: null
+    }"""
+    value, end = manager._parse_js_literal(source)
+    assert end == len(source)
+    assert value["content"] == ["./index.html", "./pages/**/*.html"]
+    assert value["output"] == "./out/"
+    standard = value["safelist"]["standard"]
+    assert [p.pattern for p in standard] == ["^active$", "^Theme-"]
+    assert standard[1].search("theme-dark") and not standard[0].search("inactive")
+    assert (value["rejected"], value["limit"], value["ratio"], value["none"]) == (True, 2, 0.5, None)
+
+
+def test_parse_js_literal_rejects_what_it_cannot_read():
+    with pytest.raises(ValueError):
+        manager._parse_js_literal("{ content: require('./globs') }")
+    with pytest.raises(ValueError):
+        manager._parse_js_literal("{ [computed]: 1 }")
+
+
+def test_load_config_accepts_a_plain_safelist_array(tmp_path):
+    path = tmp_path / "purgecss.config.js"
+    path.write_text("module.exports = { content: [], css: [], safelist: [/^keep/] };\n", encoding="utf-8")
+    config = manager.load_purgecss_config(str(path))
+    assert [p.pattern for p in config["safelist"]["standard"]] == ["^keep"]
+    assert config["safelist"]["deep"] == [] and config["safelist"]["greedy"] == []
+
+
+def test_repo_config_globs_all_match_files():
+    config = manager.load_purgecss_config()
+    for pattern in config["content"] + config["css"]:
+        assert manager._expand_config_globs([pattern]), f"{pattern} matches no file"
+
+
+def test_unused_selectors_go_and_selector_lists_are_split():
+    out = purge(".used, .unused { color: red }\n.gone { color: blue }\ndiv.used > span { margin: 0 }",
+                '<div class="used"><span></span></div>')
+    assert selectors(out) == [".used", "div.used > span"]
+
+
+def test_standard_safelist_matches_each_name_of_the_selector():
+    css = ".menu.open { a: b }\n.menu .badge { a: b }\n.opener { a: b }"
+    out = purge(css, '<nav class="menu">', standard=[r"^open$"])
+    # .open is safelisted by name; .badge is not, so the descendant rule goes; ^open$ does not match .opener
+    assert selectors(out) == [".menu.open"]
+
+
+def test_deep_safelist_keeps_rules_mentioning_the_name_anywhere():
+    css = ".modal .title { a: b }\n.page .modal-body p { a: b }\n.page .title { a: b }"
+    out = purge(css, "", deep=[r"modal"])
+    assert selectors(out) == [".modal .title", ".page .modal-body p"]
+
+
+def test_greedy_safelist_matches_the_selector_text():
+    css = '[data-state="open"] .x { a: b }\n.y[aria-expanded] { a: b }\n.z { a: b }'
+    out = purge(css, "", greedy=[r"data-", r"aria-"])
+    assert selectors(out) == ['[data-state="open"] .x', ".y[aria-expanded]"]
+
+
+def test_attribute_selectors_need_the_attribute_name_in_content():
+    css = '[data-theme="dark"] body { a: b }\n[hidden] { a: b }\ninput[type="range"] { a: b }'
+    out = purge(css, '<html data-theme="light"><body><input type="text">')
+    assert selectors(out) == ['[data-theme="dark"] body', 'input[type="range"]']
+
+
+def test_functional_pseudo_class_arguments_never_purge_a_rule():
+    css = (".card:not(.missing) { a: b }\n:is(.missing, .absent) p { a: b }\n"
+           ".card:where(.x):hover { a: b }\n.gone:not(.card) { a: b }\n.card::before { a: b }")
+    out = purge(css, '<p class="card">')
+    assert selectors(out) == [".card:not(.missing)", ":is(.missing, .absent) p", ".card:where(.x):hover", ".card::before"]
+
+
+def test_media_and_supports_blocks_keep_only_used_rules_and_vanish_when_empty():
+    css = (
+        "@media (max-width: 600px) { .used { a: b } .gone { a: b } }\n"
+        "@supports (display: grid) { @media print { .gone { a: b } } }\n"
+        "@supports (gap: 1px) { @media screen { .used { a: b } } }\n"
+    )
+    out = purge(css, 'class="used"')
+    assert "@media (max-width: 600px)" in out and ".gone" not in out
+    assert "@media print" not in out and "@supports (display: grid)" not in out
+    assert re.search(r"@supports \(gap: 1px\) \{\s*@media screen \{\s*\.used", out)
+
+
+def test_non_grouping_at_rules_are_kept_verbatim():
+    css = ('@import url("x.css");\n@font-face { font-family: X; src: url(x.woff2) }\n'
+           "@keyframes spin { from { transform: rotate(0) } to { transform: rotate(1turn) } }\n.gone { a: b }")
+    out = purge(css, "")
+    assert '@import url("x.css");' in out
+    assert "@font-face { font-family: X; src: url(x.woff2) }" in out
+    assert "@keyframes spin { from { transform: rotate(0) } to { transform: rotate(1turn) } }" in out
+    assert ".gone" not in out
+
+
+def test_braces_in_strings_do_not_end_a_rule():
+    out = purge('.used::after { content: "}{"; color: red }\n.gone { a: b }', 'class="used"')
+    assert selectors(out) == [".used::after"] and 'content: "}{"' in out
+
+
+def test_repo_safelist_keeps_the_runtime_install_prompt():
+    config = manager.load_purgecss_config()
+    # The prompt is built by script at runtime, so no page mentions its classes; tags still come from the pages
+    keep = manager._make_selector_filter({"strong"}, config["safelist"])
+    for selector in (".install-btn", ".install-prompt-close:hover", ".ios-step strong", ".settings-panel.active"):
+        assert keep(selector, manager._selector_atoms(selector)), selector